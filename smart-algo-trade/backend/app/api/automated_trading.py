@@ -15,12 +15,8 @@ from datetime import datetime, timedelta
 from fastapi import APIRouter, Query
 from pydantic import BaseModel
 
-# Try to import Fyers API
-try:
-    from fyers_apiv3 import fyersModel
-    FYERS_AVAILABLE = True
-except ImportError:
-    FYERS_AVAILABLE = False
+from app.services import indicators as ind
+from app.services.history_client import history_client
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -78,32 +74,9 @@ class AutomatedTradingService:
         self._init_fyers()
     
     def _init_fyers(self):
-        """Initialize Fyers API client"""
-        if not FYERS_AVAILABLE:
-            logger.warning("Fyers API not available.")
-            return
-        
-        try:
-            from pathlib import Path
-            
-            client_id_path = Path("client_id.txt")
-            access_token_path = Path("access_token.txt")
-            
-            if client_id_path.exists() and access_token_path.exists():
-                client_id = client_id_path.read_text().strip()
-                access_token = access_token_path.read_text().strip()
-                
-                self.fyers = fyersModel.FyersModel(
-                    client_id=client_id,
-                    is_async=False,
-                    token=access_token,
-                    log_path=""
-                )
-                self.initialized = True
-                logger.info("Fyers client for automated trading initialized")
-        
-        except Exception as e:
-            logger.error(f"Failed to initialize Fyers client: {e}")
+        """Use the process-wide Fyers history client"""
+        self.fyers = history_client.fyers
+        self.initialized = history_client.initialized
     
     def fetch_ohlc(self, ticker: str, interval: str, duration: int) -> Optional[pd.DataFrame]:
         """Fetch OHLC data"""
@@ -111,36 +84,12 @@ class AutomatedTradingService:
             return None
         
         try:
-            import datetime as dt
-            import pytz
-            
-            range_from = dt.date.today() - dt.timedelta(days=duration)
-            range_to = dt.date.today()
-            
-            from_date_string = range_from.strftime("%Y-%m-%d")
-            to_date_string = range_to.strftime("%Y-%m-%d")
+            # Shared client: coalesced, keep-alive, candle store backed
+            df = history_client.fetch_ohlc(ticker, interval, duration)
             
-            data = {
-                "symbol": ticker,
-                "resolution": interval,
-                "date_format": "1",
-                "range_from": from_date_string,
-                "range_to": to_date_string,
-                "cont_flag": "1"
-            }
-            
-            response = self.fyers.history(data=data)
-            
-            if response and 'candles' in response:
-                candles = response['candles']
-                
-                # Create DataFrame
-                columns = ['Timestamp', 'Open', 'High', 'Low', 'Close', 'Volume']
-                df = pd.DataFrame(candles, columns=columns)
-                
-                # Convert timestamp to datetime
-                df['Timestamp'] = pd.to_datetime(df['Timestamp'], unit='s')
-                
+            if df is not None:
+                # Strategies here work on naive UTC timestamps
+                df['Timestamp'] = df['Timestamp'].dt.tz_convert('UTC').dt.tz_localize(None)
                 logger.info(f"Fetched {len(df)} candles for {ticker}")
                 return df
             
@@ -152,31 +101,19 @@ class AutomatedTradingService:
     
     @staticmethod
     def calculate_atr(ohlc_df: pd.DataFrame, period: int = 14) -> pd.Series:
-        """Calculate Average True Range"""
-        df = ohlc_df.copy()
-        
-        df['High-Low'] = abs(df['High'] - df['Low'])
-        df['High-PrevClose'] = abs(df['High'] - df['Close'].shift(1))
-        df['Low-PrevClose'] = abs(df['Low'] - df['Close'].shift(1))
-        df['TR'] = df[['High-Low', 'High-PrevClose', 'Low-PrevClose']].max(axis=1, skipna=False)
-        df['ATR'] = df['TR'].ewm(com=period, min_periods=period).mean()
-        
-        return df['ATR']
+        """Calculate Average True Range (same values as /api/indicators/calculate-atr)"""
+        atr = ind.atr(ohlc_df['High'], ohlc_df['Low'], ohlc_df['Close'], period=period)
+        return pd.Series(atr, index=ohlc_df.index, name='ATR')
     
     @staticmethod
     def calculate_rsi(ohlc_df: pd.DataFrame, period: int = 14) -> pd.Series:
-        """Calculate Relative Strength Index"""
-        df = ohlc_df.copy()
-        
-        delta = df['Close'].diff()
-        gain = delta.where(delta > 0, 0)
-        loss = -delta.where(delta < 0, 0)
-        avg_gain = gain.rolling(window=period, min_periods=1).mean()
-        avg_loss = loss.rolling(window=period, min_periods=1).mean()
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
+        """
+        Calculate Relative Strength Index (same values as /api/indicators/calculate-rsi)
         
-        return rsi
+        NaN until `period` candles are available (rolling min_periods=period)
+        """
+        rsi = ind.rsi(ohlc_df['Close'], period=period)
+        return pd.Series(rsi, index=ohlc_df.index, name='RSI')
     
     @staticmethod
     def calculate_supertrend(ohlc_df: pd.DataFrame, period: int = 7, multiplier: float = 3.0) -> pd.Series:
@@ -184,58 +121,68 @@ class AutomatedTradingService:
         Calculate Supertrend indicator
         
         Returns the supertrend line which acts as dynamic support/resistance
+        (same values as /api/indicators/calculate-supertrend)
+        
+        The ATR is seeded with TR[0] = High - Low (the library's convention),
+        where this method used to leave the first TR NaN. The difference to
+        the old line decays by period / (period + 1) per candle, so it lasts
+        for some 40-80 candles after both are defined rather than only the
+        warm-up; on a short fetch window the first flips can move.
         """
-        df = ohlc_df.copy()
-        
-        # Calculate ATR
-        df['High-Low'] = abs(df['High'] - df['Low'])
-        df['High-PrevClose'] = abs(df['High'] - df['Close'].shift(1))
-        df['Low-PrevClose'] = abs(df['Low'] - df['Close'].shift(1))
-        df['TR'] = df[['High-Low', 'High-PrevClose', 'Low-PrevClose']].max(axis=1, skipna=False)
-        df['ATR'] = df['TR'].ewm(com=period, min_periods=period).mean()
-        
-        # Calculate basic bands
-        df["BasicUpper"] = ((df['High'] + df['Low']) / 2) + multiplier * df['ATR']
-        df["BasicLower"] = ((df['High'] + df['Low']) / 2) - multiplier * df['ATR']
-        
-        # Calculate final bands with anti-whipsaw logic
-        df["FinalUpper"] = df["BasicUpper"]
-        df["FinalLower"] = df["BasicLower"]
-        
-        ind = df.index
-        for i in range(period, len(df)):
-            if df['Close'][i-1] <= df['FinalUpper'][i-1]:
-                df.loc[ind[i], 'FinalUpper'] = min(df['BasicUpper'][i], df['FinalUpper'][i-1])
-            else:
-                df.loc[ind[i], 'FinalUpper'] = df['BasicUpper'][i]
+        st = ind.supertrend(ohlc_df['High'], ohlc_df['Low'], ohlc_df['Close'],
+                            period=period, multiplier=multiplier, outputs=("supertrend",))
+        return pd.Series(st['supertrend'], index=ohlc_df.index, name='Supertrend')
+    
+    @staticmethod
+    def supertrend_sweep(ohlc_df: pd.DataFrame, periods: List[int],
+                         multipliers: List[float]) -> Dict[str, np.ndarray]:
+        """
+        Evaluate calculate_supertrend() over a (period, multiplier) grid
         
-        for i in range(period, len(df)):
-            if df['Close'][i-1] >= df['FinalLower'][i-1]:
-                df.loc[ind[i], 'FinalLower'] = max(df['BasicLower'][i], df['FinalLower'][i-1])
-            else:
-                df.loc[ind[i], 'FinalLower'] = df['BasicLower'][i]
-        
-        # Calculate supertrend
-        df['Supertrend'] = np.nan
-        for test in range(period, len(df)):
-            if df['Close'][test-1] <= df['FinalUpper'][test-1] and df['Close'][test] > df['FinalUpper'][test]:
-                df.loc[ind[test], 'Supertrend'] = df['FinalLower'][test]
-                break
-            if df['Close'][test-1] >= df['FinalLower'][test-1] and df['Close'][test] < df['FinalLower'][test]:
-                df.loc[ind[test], 'Supertrend'] = df['FinalUpper'][test]
-                break
-        
-        for i in range(test+1, len(df)):
-            if df['Supertrend'][i-1] == df['FinalUpper'][i-1] and df['Close'][i] <= df['FinalUpper'][i]:
-                df.loc[ind[i], 'Supertrend'] = df['FinalUpper'][i]
-            elif df['Supertrend'][i-1] == df['FinalUpper'][i-1] and df['Close'][i] >= df['FinalUpper'][i]:
-                df.loc[ind[i], 'Supertrend'] = df['FinalLower'][i]
-            elif df['Supertrend'][i-1] == df['FinalLower'][i-1] and df['Close'][i] >= df['FinalLower'][i]:
-                df.loc[ind[i], 'Supertrend'] = df['FinalLower'][i]
-            elif df['Supertrend'][i-1] == df['FinalLower'][i-1] and df['Close'][i] <= df['FinalLower'][i]:
-                df.loc[ind[i], 'Supertrend'] = df['FinalUpper'][i]
-        
-        return df['Supertrend']
+        Uses indicators.supertrend_grid(): ATR is computed once per period
+        and shared by all multipliers, and the band ratchet and trend
+        recursion run ONCE over a 2D (candles x grid) array, so the whole
+        grid costs about as much as a few single Supertrend calls.
+        
+        Args:
+            ohlc_df: DataFrame with OHLC data
+            periods: Supertrend periods (grid rows)
+            multipliers: Supertrend multipliers (grid columns)
+        
+        Returns:
+            Dict of (len(periods), len(multipliers)) matrices:
+            - flips: Number of trend reversals after the line is seeded
+            - last_trend: 1 (green, close above line), -1 (red) or 0 (not seeded)
+            - last_supertrend: Latest Supertrend value (NaN if not seeded)
+            - bars_since_flip: Candles since the last reversal (or since seeding; -1 if not seeded)
+        """
+        grid = ind.supertrend_grid(ohlc_df['High'], ohlc_df['Low'], ohlc_df['Close'], periods, multipliers)
+        supertrend, trend = grid["supertrend"], grid["trend"]
+        n = len(trend)
+        
+        shape = trend.shape[1:]
+        if n == 0:
+            return {
+                "flips": np.zeros(shape, dtype=np.int64),
+                "last_trend": np.zeros(shape, dtype=np.int64),
+                "last_supertrend": np.full(shape, np.nan),
+                "bars_since_flip": np.full(shape, -1, dtype=np.int64)
+            }
+        
+        flips = ((trend[1:] != trend[:-1]) & (trend[:-1] != 0)).sum(axis=0)
+        
+        # Last index where the trend changed (a flip or the seed bar)
+        changes = np.concatenate([trend[:1] != 0, trend[1:] != trend[:-1]])
+        last_change = n - 1 - np.argmax(changes[::-1], axis=0)
+        bars_since_flip = np.where(trend[-1] != 0, n - 1 - last_change, -1)
+        
+        logger.info(f"Supertrend sweep: {len(periods)} periods x {len(multipliers)} multipliers over {n} candles")
+        return {
+            "flips": flips,
+            "last_trend": trend[-1].copy(),
+            "last_supertrend": supertrend[-1].copy(),
+            "bars_since_flip": bars_since_flip
+        }
     
     def generate_trade_signal(self, symbol: str, capital: int = 5000, 
                              st_period: int = 7, st_multiplier: float = 3.0,
@@ -563,6 +510,71 @@ async def generate_trade_signal_endpoint(
         return {"status": "error", "message": str(e)}
 
 
+@router.get("/supertrend-sweep")
+async def supertrend_sweep_endpoint(
+    symbol: str = Query(...),
+    periods: str = Query("7,10,14"),
+    multipliers: str = Query("1.5,2,2.5,3"),
+    resolution: str = Query("5"),
+    duration: int = Query(5)
+):
+    """
+    Evaluate Supertrend for a whole (st_period, st_multiplier) grid
+    
+    Use this to tune the st_period / st_multiplier of generate-trade-signal
+    (which uses 5-minute candles over 5 days by default) in one request.
+    Each matrix has one row per period and one column per multiplier.
+    
+    Returns:
+    - flips: trend reversals over the fetched history
+    - last_trend: 1 = green (BUY side), -1 = red (SELL side), 0 = not seeded
+    - last_supertrend: latest Supertrend value
+    - bars_since_flip: candles since the last reversal
+    
+    Example:
+    /api/trading/supertrend-sweep?symbol=NSE:SBIN-EQ&periods=5,7,10&multipliers=1,2,3
+    """
+    try:
+        try:
+            period_list = [int(p.strip()) for p in periods.split(',') if p.strip()]
+            multiplier_list = [float(m.strip()) for m in multipliers.split(',') if m.strip()]
+        except ValueError:
+            return {"status": "error", "message": "periods must be integers and multipliers floats (comma-separated)"}
+        
+        if not period_list or not multiplier_list:
+            return {"status": "error", "message": "At least one period and one multiplier are required"}
+        if any(p < 1 for p in period_list):
+            return {"status": "error", "message": "Periods must be >= 1"}
+        
+        ohlc = trading_service.fetch_ohlc(symbol, resolution, duration)
+        
+        if ohlc is None or len(ohlc) == 0:
+            return {"status": "error", "message": "Failed to fetch data"}
+        
+        result = trading_service.supertrend_sweep(ohlc, period_list, multiplier_list)
+        
+        last_supertrend = result["last_supertrend"]
+        return {
+            "status": "success",
+            "data": {
+                "symbol": symbol,
+                "resolution": resolution,
+                "total_candles": len(ohlc),
+                "current_close": float(ohlc['Close'].iloc[-1]),
+                "periods": period_list,
+                "multipliers": multiplier_list,
+                "flips": result["flips"].tolist(),
+                "last_trend": result["last_trend"].tolist(),
+                "last_supertrend": np.where(np.isnan(last_supertrend), None, last_supertrend).tolist(),
+                "bars_since_flip": result["bars_since_flip"].tolist()
+            }
+        }
+    
+    except Exception as e:
+        logger.error(f"Error running Supertrend sweep: {e}")
+        return {"status": "error", "message": str(e)}
+
+
 @router.post("/place-trade")
 async def place_trade_endpoint(
     symbol: str = Query(...),
@@ -740,6 +752,11 @@ async def get_trading_info():
                     "path": "/generate-trade-signal",
                     "description": "Generate trading signal for a symbol"
                 },
+                {
+                    "method": "GET",
+                    "path": "/supertrend-sweep",
+                    "description": "Supertrend flips / last trend over a (period, multiplier) grid"
+                },
                 {
                     "method": "POST",
                     "path": "/place-trade",
@@ -5,23 +5,28 @@ Created By: Aseem Singhal
 Fyers API V3
 """
 
+import json
 import logging
+import time
 from datetime import datetime, timedelta
 from typing import List, Optional
 import random
 import pandas as pd
-import pytz
-from pathlib import Path
 
 from fastapi import APIRouter, Query
+from fastapi.responses import Response
 from pydantic import BaseModel
 
-# Try to import Fyers API - will fall back to mock if not available
-try:
-    from fyers_apiv3 import fyersModel
-    FYERS_AVAILABLE = True
-except ImportError:
-    FYERS_AVAILABLE = False
+from app.services.candle_cache import CandleCache, CandleSeries
+from app.services.candle_store import candle_store, day_start
+from app.services.history_client import history_client
+from app.services.history_downloader import history_downloader
+from app.services.indicator_cache import SESSION_CLOSE, last_closed_candle
+from app.services.pivot_store import IST
+from app.services.resampler import (
+    arrays_frame, build_pyramid, frame_arrays, parse_session_time, pyramid_cache, resample_frame,
+    timeframe_seconds
+)
 
 logger = logging.getLogger(__name__)
 
@@ -51,6 +56,18 @@ class HistoricalDataRequest(BaseModel):
     resolution: str  # "1m", "5m", "15m", "1h", "4h", "1d", "1w", "1m"
     from_time: Optional[int] = None  # Unix timestamp
     to_time: Optional[int] = None  # Unix timestamp
+    limit: int = 500
+    format: str = "candles"  # "candles" | "columnar"
+
+
+class BackfillRequest(BaseModel):
+    """Full-history download into the candle store"""
+
+    symbol: str
+    resolution: str = "1"  # Fyers resolution ("1", "5", ..., "D")
+    range_from: str  # YYYY-MM-DD
+    range_to: Optional[str] = None  # YYYY-MM-DD, default today
+    refresh: bool = False  # Refetch days already stored
 
 
 # ============================================================================
@@ -69,34 +86,13 @@ class FyersAPIClient:
         self._init_fyers()
     
     def _init_fyers(self):
-        """Initialize Fyers API client"""
-        if not FYERS_AVAILABLE:
-            logger.warning("Fyers API not available. Will use mock data.")
-            return
-        
-        try:
-            # Try to read credentials from files
-            client_id_path = Path("client_id.txt")
-            access_token_path = Path("access_token.txt")
-            
-            if client_id_path.exists() and access_token_path.exists():
-                self.client_id = client_id_path.read_text().strip()
-                self.access_token = access_token_path.read_text().strip()
-                
-                # Initialize FyersModel
-                self.fyers = fyersModel.FyersModel(
-                    client_id=self.client_id,
-                    is_async=False,
-                    token=self.access_token,
-                    log_path=str(Path.cwd() / "logs")
-                )
-                self.initialized = True
-                logger.info("Fyers API client initialized successfully")
-            else:
-                logger.warning("Fyers credentials not found. Will use mock data.")
-        
-        except Exception as e:
-            logger.error(f"Failed to initialize Fyers API: {e}")
+        """Use the process-wide Fyers history client"""
+        self.fyers = history_client.fyers
+        self.client_id = history_client.client_id
+        self.access_token = history_client.access_token
+        self.initialized = history_client.initialized
+        if not self.initialized:
+            logger.warning("Fyers client not initialized. Will use mock data.")
     
     def fetch_ohlc(self, ticker: str, interval: str, duration: int = 250) -> Optional[pd.DataFrame]:
         """
@@ -114,40 +110,10 @@ class FyersAPIClient:
             return None
         
         try:
-            # Calculate date range
-            range_from = datetime.now().date() - timedelta(days=duration)
-            range_to = datetime.now().date()
-            
-            from_date_string = range_from.strftime("%Y-%m-%d")
-            to_date_string = range_to.strftime("%Y-%m-%d")
+            # Shared client: coalesced, keep-alive, candle store backed
+            df = history_client.fetch_ohlc(ticker, interval, duration)
             
-            # Prepare request data
-            data = {
-                "symbol": ticker,
-                "resolution": interval,
-                "date_format": "1",
-                "range_from": from_date_string,
-                "range_to": to_date_string,
-                "cont_flag": "1"
-            }
-            
-            # Fetch history
-            response = self.fyers.history(data=data)
-            
-            if response and 'candles' in response:
-                candles = response['candles']
-                
-                # Create DataFrame
-                columns = ['Timestamp', 'Open', 'High', 'Low', 'Close', 'Volume']
-                df = pd.DataFrame(candles, columns=columns)
-                
-                # Convert Timestamp to datetime in UTC
-                df['Timestamp'] = pd.to_datetime(df['Timestamp'], unit='s').dt.tz_localize(pytz.utc)
-                
-                # Convert to IST
-                ist = pytz.timezone('Asia/Kolkata')
-                df['Timestamp'] = df['Timestamp'].dt.tz_convert(ist)
-                
+            if df is not None:
                 logger.info(f"Fetched {len(df)} candles for {ticker} from Fyers API")
                 return df
             else:
@@ -161,7 +127,8 @@ class FyersAPIClient:
     def fetch_ohlc_full(self, ticker: str, interval: str, inception_date: str) -> Optional[pd.DataFrame]:
         """
         Fetch full historical OHLC data from inception date to today
-        Handles pagination in 50-day chunks to avoid API limits
+        Days missing from the candle store are fetched in concurrent chunks
+        (see history_downloader) and stored
         
         Args:
             ticker: Trading symbol (e.g., 'NSE:NIFTY50-INDEX')
@@ -175,68 +142,13 @@ class FyersAPIClient:
             return None
         
         try:
-            # Parse inception date
-            from_date = datetime.strptime(inception_date, '%Y-%m-%d')
-            
-            # Initialize DataFrame with columns
-            columns = ['Timestamp', 'Open', 'High', 'Low', 'Close', 'Volume']
-            df = pd.DataFrame(columns=columns)
+            from_date = datetime.strptime(inception_date, '%Y-%m-%d').date()
+            df = history_downloader.download(history_client.history, ticker, interval, from_date)
             
-            # Fetch data in 50-day chunks
-            while True:
-                from_date_string = from_date.strftime("%Y-%m-%d")
-                today = datetime.now().date()
-                to_date_string = today.strftime("%Y-%m-%d")
-                
-                # Check if we're within last 50 days - if so, fetch remaining data
-                if from_date.date() >= (today - timedelta(days=50)):
-                    data = {
-                        "symbol": ticker,
-                        "resolution": interval,
-                        "date_format": "1",
-                        "range_from": from_date_string,
-                        "range_to": to_date_string,
-                        "cont_flag": "1"
-                    }
-                    
-                    resp = self.fyers.history(data=data)
-                    if resp and 'candles' in resp:
-                        df1 = pd.DataFrame(resp['candles'], columns=columns)
-                        df = pd.concat([df, df1], ignore_index=True)
-                    break
-                else:
-                    # Fetch 50-day chunk
-                    to_date = from_date + timedelta(days=50)
-                    to_date_string = to_date.strftime("%Y-%m-%d")
-                    
-                    data = {
-                        "symbol": ticker,
-                        "resolution": interval,
-                        "date_format": "1",
-                        "range_from": from_date_string,
-                        "range_to": to_date_string,
-                        "cont_flag": "1"
-                    }
-                    
-                    resp = self.fyers.history(data=data)
-                    if resp and 'candles' in resp:
-                        df1 = pd.DataFrame(resp['candles'], columns=columns)
-                        df = pd.concat([df, df1], ignore_index=True)
-                    
-                    # Move to next chunk
-                    from_date = to_date + timedelta(days=1)
-            
-            if len(df) == 0:
+            if df is None:
                 logger.warning(f"No data fetched for {ticker}")
                 return None
             
-            # Convert Timestamp to datetime in UTC
-            df['Timestamp'] = pd.to_datetime(df['Timestamp'], unit='s').dt.tz_localize(pytz.utc)
-            
-            # Convert to IST
-            ist = pytz.timezone('Asia/Kolkata')
-            df['Timestamp'] = df['Timestamp'].dt.tz_convert(ist)
-            
             logger.info(f"Fetched {len(df)} candles for {ticker} from {inception_date} to today")
             return df
         
@@ -269,33 +181,14 @@ class FyersAPIClient:
             return None
         
         try:
-            # Prepare request data
-            data = {
-                "symbol": ticker,
-                "resolution": interval,
-                "date_format": "1",
-                "range_from": range_from,
-                "range_to": range_to,
-                "cont_flag": "1"
-            }
-            
-            # Fetch history
-            response = self.fyers.history(data=data)
+            # Stored candles + only the missing days from Fyers
+            df = candle_store.fetch_range(
+                history_client.history, ticker, interval,
+                datetime.strptime(range_from, '%Y-%m-%d').date(),
+                datetime.strptime(range_to, '%Y-%m-%d').date()
+            )
             
-            if response and 'candles' in response:
-                candles = response['candles']
-                
-                # Create DataFrame
-                columns = ['Timestamp', 'Open', 'High', 'Low', 'Close', 'Volume']
-                df = pd.DataFrame(candles, columns=columns)
-                
-                # Convert Timestamp to datetime in UTC
-                df['Timestamp'] = pd.to_datetime(df['Timestamp'], unit='s').dt.tz_localize(pytz.utc)
-                
-                # Convert to IST
-                ist = pytz.timezone('Asia/Kolkata')
-                df['Timestamp'] = df['Timestamp'].dt.tz_convert(ist)
-                
+            if df is not None:
                 logger.info(f"Fetched {len(df)} candles for {ticker} from {range_from} to {range_to}")
                 return df
             else:
@@ -320,11 +213,15 @@ def resample_to_timeframe(df: pd.DataFrame, timeframe: str = '15T') -> pd.DataFr
     """
     Resample OHLCV data to a different timeframe
     
+    Minute / hour / day periods are aggregated on epoch arithmetic with
+    intraday bars anchored at the 09:15 IST session open (see resampler);
+    other pandas aliases (W, M, ...) fall back to DataFrame.resample.
+    
     Args:
-        df: DataFrame with 'Timestamp' index and OHLCV columns
+        df: DataFrame with 'Timestamp' index (or column) and OHLCV columns
         timeframe: Resampling period:
-            - '15T' = 15 minutes
-            - 'H' = 1 hour
+            - '15T' / '15m' = 15 minutes
+            - 'H' / '1h' = 1 hour (09:15, 10:15, ...)
             - 'D' = 1 day
             - etc. (any valid pandas offset alias)
     
@@ -332,23 +229,27 @@ def resample_to_timeframe(df: pd.DataFrame, timeframe: str = '15T') -> pd.DataFr
         Resampled DataFrame with proper OHLCV aggregation
     """
     try:
-        # Ensure Timestamp is set as index and is datetime
-        if 'Timestamp' in df.columns:
-            df = df.copy()
-            df['Timestamp'] = pd.to_datetime(df['Timestamp'])
-            df.set_index('Timestamp', inplace=True)
-        
-        # Resample with OHLCV aggregation rules
-        resampled = df.resample(timeframe).agg({
-            'Open': 'first',
-            'High': 'max',
-            'Low': 'min',
-            'Close': 'last',
-            'Volume': 'sum'
-        })
-        
-        # Drop NaN rows
-        resampled.dropna(inplace=True)
+        seconds = timeframe_seconds(timeframe)
+        if seconds is not None:
+            resampled = resample_frame(df, seconds)
+        else:
+            # Ensure Timestamp is set as index and is datetime
+            if 'Timestamp' in df.columns:
+                df = df.copy()
+                df['Timestamp'] = pd.to_datetime(df['Timestamp'])
+                df.set_index('Timestamp', inplace=True)
+            
+            # Resample with OHLCV aggregation rules
+            resampled = df.resample(timeframe).agg({
+                'Open': 'first',
+                'High': 'max',
+                'Low': 'min',
+                'Close': 'last',
+                'Volume': 'sum'
+            })
+            
+            # Drop NaN rows
+            resampled.dropna(inplace=True)
         
         logger.info(f"Resampled {len(df)} candles to {timeframe}: {len(resampled)} bars")
         return resampled
@@ -358,31 +259,27 @@ def resample_to_timeframe(df: pd.DataFrame, timeframe: str = '15T') -> pd.DataFr
         return None
 
 
+# Pyramid level -> response key of /multi-timeframe
+TIMEFRAME_KEYS = {"5m": "5m", "15m": "15m", "1h": "hourly", "1D": "daily"}
+
+
 def get_multiple_timeframes(df: pd.DataFrame) -> dict:
     """
     Generate multiple timeframe aggregations from 1-minute data
     
+    All levels come from one pyramid pass (1m -> 5m -> 15m -> 1h -> 1D),
+    each aggregated from the level below it.
+    
     Args:
         df: DataFrame with 'Timestamp' as index and OHLCV columns
     
     Returns:
-        Dictionary with keys: '15m', 'hourly', 'daily', and resampled DataFrames
+        Dictionary with keys: '5m', '15m', 'hourly', 'daily', and resampled DataFrames
     """
     try:
-        result = {}
-        
-        # 15-minute timeframe
-        result['15m'] = resample_to_timeframe(df, '15T')
-        logger.info("Generated 15-minute timeframe")
-        
-        # Hourly timeframe
-        result['hourly'] = resample_to_timeframe(df, 'H')
-        logger.info("Generated hourly timeframe")
-        
-        # Daily timeframe
-        result['daily'] = resample_to_timeframe(df, 'D')
-        logger.info("Generated daily timeframe")
-        
+        pyramid = build_pyramid(*frame_arrays(df))
+        result = {key: arrays_frame(*pyramid[level]) for level, key in TIMEFRAME_KEYS.items()}
+        logger.info(f"Generated timeframes {', '.join(result)} from {len(df)} candles")
         return result
     
     except Exception as e:
@@ -394,11 +291,8 @@ def get_hourly_with_market_session(df: pd.DataFrame, market_open_time: str = '09
     """
     Generate hourly bars aligned with market session (9:15 AM - 3:30 PM for NSE)
     
-    This function:
-    1. Filters data to market hours (until 3:30 PM)
-    2. Adjusts timestamps by subtracting market_open_time offset
-    3. Resamples to hourly bars
-    4. Restores original timestamp offset
+    Candles after 3:30 PM are dropped and hourly buckets are anchored at
+    market_open_time on the epoch seconds directly (no index shifting).
     
     Args:
         df: DataFrame with 'Timestamp' as index and OHLCV columns
@@ -408,40 +302,8 @@ def get_hourly_with_market_session(df: pd.DataFrame, market_open_time: str = '09
         Resampled hourly DataFrame with market session alignment
     """
     try:
-        df_copy = df.copy()
-        
-        # Ensure Timestamp is index
-        if 'Timestamp' not in df_copy.index.name:
-            if 'Timestamp' in df_copy.columns:
-                df_copy.set_index('Timestamp', inplace=True)
-        
-        # Convert index to datetime if not already
-        df_copy.index = pd.to_datetime(df_copy.index)
-        
-        # Filter to market hours (until 3:30 PM / 15:30)
-        df_market = df_copy[df_copy.index.time <= pd.Timestamp('15:30').time()]
-        
-        # Parse market open time
-        open_hour, open_minute = map(int, market_open_time.split(':'))
-        time_offset = pd.Timedelta(hours=open_hour, minutes=open_minute)
-        
-        # Adjust timestamps by subtracting offset
-        df_market.index = df_market.index - time_offset
-        
-        # Resample to hourly with OHLCV aggregation
-        hourly_df = df_market.resample('H').agg({
-            'Open': 'first',
-            'High': 'max',
-            'Low': 'min',
-            'Close': 'last',
-            'Volume': 'sum'
-        })
-        
-        # Drop NaN rows
-        hourly_df.dropna(inplace=True)
-        
-        # Restore original timestamp offset
-        hourly_df.index = hourly_df.index + time_offset
+        hourly_df = resample_frame(df, 3600, anchor=parse_session_time(market_open_time),
+                                   session_close=SESSION_CLOSE)
         
         logger.info(f"Generated market session hourly bars: {len(hourly_df)} bars")
         return hourly_df
@@ -451,14 +313,15 @@ def get_hourly_with_market_session(df: pd.DataFrame, market_open_time: str = '09
         return None
 
 
-
-
-
 class HistoricalDataService:
     """Service to fetch and cache historical market data"""
 
+    # Default look-back when no from_time is given
+    DEFAULT_DAYS = 250
+
     def __init__(self):
-        self.cache: dict = {}
+        # (symbol, resolution) -> range-indexed columns, bounded by bytes
+        self.cache = CandleCache()
 
     def get_candles(
         self,
@@ -483,7 +346,24 @@ class HistoricalDataService:
         Returns:
             List of Candle objects
         """
-        cache_key = f"{symbol}:{resolution}"
+        series = self.get_series(symbol, resolution, from_time, to_time, limit, use_real_api)
+        return [Candle(**c) for c in series.to_records()]
+
+    def get_series(
+        self,
+        symbol: str,
+        resolution: str,
+        from_time: Optional[int] = None,
+        to_time: Optional[int] = None,
+        limit: int = 500,
+        use_real_api: bool = True,
+    ) -> CandleSeries:
+        """
+        Same as get_candles, as a column view into the cache (no per-candle objects)
+
+        Only the parts of [from_time, to_time] not cached yet are fetched.
+        """
+        cache_key = (symbol, resolution)
 
         # Try to fetch from real Fyers API first
         if use_real_api and fyers_client.initialized:
@@ -502,53 +382,46 @@ class HistoricalDataService:
                 
                 fyers_resolution = resolution_map.get(resolution, "1440")
                 
-                # Fetch from Fyers
-                df = fyers_client.fetch_ohlc(symbol, fyers_resolution, duration=250)
+                now_ms = int(time.time() * 1000)
+                start = from_time if from_time is not None else now_ms - self.DEFAULT_DAYS * 86400 * 1000
+                end = min(to_time, now_ms) if to_time is not None else now_ms
+                
+                # Fetch only the uncovered spans (whole IST days) and merge them in
+                for gap_from, gap_to in self.cache.missing(cache_key, start, end):
+                    first_day = datetime.fromtimestamp(gap_from / 1000, IST).date()
+                    last_day = datetime.fromtimestamp(gap_to / 1000, IST).date()
+                    df = fyers_client.fetch_ohlc_range(symbol, fyers_resolution, first_day.isoformat(),
+                                                       last_day.isoformat())
+                    if df is None:
+                        raise RuntimeError(f"no data for {first_day}..{last_day}")
+                    covered_to = min(day_start(last_day + timedelta(days=1)) * 1000 - 1, now_ms)
+                    self.cache.put(cache_key, CandleSeries.from_frame(df), day_start(first_day) * 1000, covered_to)
                 
-                if df is not None and len(df) > 0:
-                    candles = self._dataframe_to_candles(df)
-                    self.cache[cache_key] = candles
-                    filtered = self._filter_by_time(candles, from_time, to_time)
-                    return filtered[-limit:] if len(filtered) > limit else filtered
+                series = self.cache.get(cache_key, start, end)
+                if series is not None and len(series) > 0:
+                    return series.tail(limit)
             
             except Exception as e:
                 logger.warning(f"Failed to fetch from real API, using mock data: {e}")
 
         # Try to get from cache
-        if cache_key in self.cache:
-            cached_candles = self.cache[cache_key]
-            filtered = self._filter_by_time(cached_candles, from_time, to_time)
-            return filtered[-limit:] if len(filtered) > limit else filtered
+        cached = self.cache.get(cache_key)
+        if cached is not None and len(cached) > 0:
+            return cached.slice(from_time, to_time).tail(limit)
 
-        # Generate synthetic/mock data as fallback
-        candles = self._generate_mock_candles(symbol, resolution, limit)
-        self.cache[cache_key] = candles
+        # Mock candles live under their own key, so they never mark a span of
+        # the real series as covered
+        mock_key = cache_key + ("mock",)
+        cached = self.cache.get(mock_key)
+        if cached is not None and len(cached) > 0:
+            return cached.slice(from_time, to_time).tail(limit)
 
-        return candles
+        # Generate synthetic/mock data as fallback
+        mock = CandleSeries.from_records(self._generate_mock_candles(symbol, resolution, limit))
+        if len(mock):
+            self.cache.put(mock_key, mock, int(mock.time[0]), int(mock.time[-1]))
 
-    @staticmethod
-    def _dataframe_to_candles(df: pd.DataFrame) -> List[Candle]:
-        """Convert DataFrame from Fyers API to Candle objects"""
-        candles = []
-        try:
-            for _, row in df.iterrows():
-                # Convert IST timestamp to milliseconds
-                timestamp = int(pd.Timestamp(row['Timestamp']).timestamp() * 1000)
-                
-                candle = Candle(
-                    time=timestamp,
-                    open=round(float(row['Open']), 2),
-                    high=round(float(row['High']), 2),
-                    low=round(float(row['Low']), 2),
-                    close=round(float(row['Close']), 2),
-                    volume=int(row['Volume'])
-                )
-                candles.append(candle)
-        
-        except Exception as e:
-            logger.error(f"Error converting DataFrame to candles: {e}")
-        
-        return candles
+        return mock
 
     @staticmethod
     def _generate_mock_candles(symbol: str, resolution: str, count: int = 500) -> List[Candle]:
@@ -652,20 +525,6 @@ class HistoricalDataService:
         }
         return mapping.get(resolution, 60)
 
-    @staticmethod
-    def _filter_by_time(candles: List[Candle], from_time: Optional[int], to_time: Optional[int]):
-        """Filter candles by time range"""
-        if from_time is None and to_time is None:
-            return candles
-
-        filtered = candles
-        if from_time:
-            filtered = [c for c in filtered if c.time >= from_time]
-        if to_time:
-            filtered = [c for c in filtered if c.time <= to_time]
-
-        return filtered
-
 
 # Singleton instance
 historical_service = HistoricalDataService()
@@ -676,6 +535,14 @@ historical_service = HistoricalDataService()
 # ============================================================================
 
 
+HISTORY_FORMATS = ("candles", "columnar")
+
+
+def _json_response(payload) -> Response:
+    """Pre-encoded JSON (skips response_model validation of every candle)"""
+    return Response(content=json.dumps(payload, separators=(",", ":")), media_type="application/json")
+
+
 @router.get("/history", response_model=List[Candle])
 async def get_historical_data(
     symbol: str = Query(..., description="Trading symbol (e.g., NSE:INFY-EQ)"),
@@ -683,15 +550,27 @@ async def get_historical_data(
     from_time: Optional[int] = Query(None, description="Start time (Unix timestamp in ms)"),
     to_time: Optional[int] = Query(None, description="End time (Unix timestamp in ms)"),
     limit: int = Query(500, description="Maximum candles to return"),
+    format: str = Query("candles", description="candles (list of candle objects) | columnar (t/o/h/l/c/v arrays)"),
 ):
     """
     Get historical candlestick data
 
+    format=candles returns the list of {time, open, high, low, close, volume}
+    objects; format=columnar returns one array per field, which is much
+    cheaper to build and parse for large ranges:
+
+        {"symbol": ..., "resolution": ..., "count": n,
+         "t": [ms, ...], "o": [...], "h": [...], "l": [...], "c": [...], "v": [...]}
+
     Example:
         GET /api/portfolio/history?symbol=NSE:INFY-EQ&resolution=1d&limit=100
+        GET /api/portfolio/history?symbol=NSE:INFY-EQ&resolution=5m&limit=20000&format=columnar
     """
     try:
-        candles = historical_service.get_candles(
+        if format not in HISTORY_FORMATS:
+            raise ValueError(f"Unknown format '{format}' (use one of {', '.join(HISTORY_FORMATS)})")
+
+        series = historical_service.get_series(
             symbol=symbol,
             resolution=resolution,
             from_time=from_time,
@@ -699,8 +578,11 @@ async def get_historical_data(
             limit=limit,
         )
 
-        logger.info(f"Returned {len(candles)} candles for {symbol} @ {resolution}")
-        return candles
+        logger.info(f"Returned {len(series)} candles for {symbol} @ {resolution}")
+        if format == "columnar":
+            return _json_response({"symbol": symbol, "resolution": resolution, "count": len(series),
+                                   **series.to_columns()})
+        return _json_response(series.to_records())
 
     except Exception as e:
         logger.error(f"Error fetching historical data: {e}")
@@ -717,7 +599,8 @@ async def get_historical_data_post(request: HistoricalDataRequest):
         "symbol": "NSE:INFY-EQ",
         "resolution": "1d",
         "from_time": 1704067200000,
-        "to_time": 1704153600000
+        "to_time": 1704153600000,
+        "format": "columnar"
     }
     """
     return await get_historical_data(
@@ -725,6 +608,8 @@ async def get_historical_data_post(request: HistoricalDataRequest):
         resolution=request.resolution,
         from_time=request.from_time,
         to_time=request.to_time,
+        limit=request.limit,
+        format=request.format,
     )
 
 
@@ -760,6 +645,71 @@ async def get_available_resolutions():
     }
 
 
+# ============================================================================
+# Candle Store / Backfill Endpoints
+# ============================================================================
+
+
+@router.post("/history/backfill")
+async def start_backfill(request: BackfillRequest):
+    """
+    Download full history into the candle store as a background job
+
+    Request body example:
+    {
+        "symbol": "NSE:NIFTY50-INDEX",
+        "resolution": "1",
+        "range_from": "2015-01-01"
+    }
+    """
+    try:
+        if not fyers_client.initialized or not fyers_client.fyers:
+            return {"status": "error", "message": "Fyers client not initialized"}
+
+        start = datetime.strptime(request.range_from, '%Y-%m-%d').date()
+        end = datetime.strptime(request.range_to, '%Y-%m-%d').date() if request.range_to else None
+        job = history_downloader.start(history_client.history, request.symbol, request.resolution,
+                                       start, end, refresh=request.refresh)
+        return {"status": "success", "data": job}
+
+    except Exception as e:
+        logger.error(f"Error starting backfill: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+@router.get("/history/backfill")
+async def list_backfills():
+    """Status of all backfill jobs"""
+    return {"status": "success", "data": history_downloader.jobs()}
+
+
+@router.get("/history/backfill/{job_id}")
+async def get_backfill(job_id: str):
+    """Progress of one backfill job (chunks done / failed, candles fetched)"""
+    job = history_downloader.job(job_id)
+    if job is None:
+        return {"status": "error", "message": f"Unknown backfill job {job_id}"}
+    return {"status": "success", "data": job}
+
+
+@router.get("/candle-store/stats")
+async def get_candle_store_stats():
+    """Candle store hit / fetch counters"""
+    return {"status": "success", "data": candle_store.stats()}
+
+
+@router.get("/history/client/stats")
+async def get_history_client_stats():
+    """Shared history client counters (requests, coalesced, broker calls)"""
+    return {"status": "success", "data": history_client.stats()}
+
+
+@router.get("/history/cache/stats")
+async def get_history_cache_stats():
+    """In-memory candle cache counters (series, bytes, hits, evictions)"""
+    return {"status": "success", "data": historical_service.cache.stats()}
+
+
 # ============================================================================
 # Timeframe Resampling Endpoints
 # ============================================================================
@@ -799,10 +749,6 @@ async def resample_historical_data(
             logger.warning(f"No data fetched for {symbol}")
             return {"error": "No data available", "symbol": symbol}
         
-        # Prepare DataFrame for resampling
-        df['Timestamp'] = pd.to_datetime(df['Timestamp'])
-        df.set_index('Timestamp', inplace=True)
-        
         # Resample to target timeframe
         resampled_df = resample_to_timeframe(df, to_resolution)
         
@@ -832,25 +778,30 @@ async def get_multiple_timeframes_endpoint(
     duration: int = Query(20, description="Duration in days for historical data"),
 ):
     """
-    Fetch historical data and generate multiple timeframes (15m, 1h, 1d)
+    Fetch historical data and generate multiple timeframes (5m, 15m, 1h, 1d)
+    
+    Hourly bars are session aligned (09:15, 10:15, ...).
     
     Example:
         GET /api/portfolio/multi-timeframe?symbol=NSE:SBIN-EQ&duration=20
     """
     try:
-        # Fetch 1-minute data
-        df = fyers_client.fetch_ohlc(symbol, "1", duration=duration)
+        # Pyramid stays valid until the next 1-minute candle closes
+        cache_key = (symbol, "1", "pyramid", duration, last_closed_candle("1"))
+        timeframes_dict = pyramid_cache.get(cache_key)
         
-        if df is None or len(df) == 0:
-            logger.warning(f"No data fetched for {symbol}")
-            return {"error": "No data available", "symbol": symbol}
-        
-        # Prepare DataFrame
-        df['Timestamp'] = pd.to_datetime(df['Timestamp'])
-        df.set_index('Timestamp', inplace=True)
-        
-        # Generate multiple timeframes
-        timeframes_dict = get_multiple_timeframes(df)
+        if timeframes_dict is None:
+            # Fetch 1-minute data
+            df = fyers_client.fetch_ohlc(symbol, "1", duration=duration)
+            
+            if df is None or len(df) == 0:
+                logger.warning(f"No data fetched for {symbol}")
+                return {"error": "No data available", "symbol": symbol}
+            
+            # Generate multiple timeframes
+            timeframes_dict = get_multiple_timeframes(df)
+            if timeframes_dict:
+                pyramid_cache.put(cache_key, timeframes_dict)
         
         # Convert to JSON-serializable format
         result = {
@@ -896,10 +847,6 @@ async def get_market_session_hourly(
             logger.warning(f"No data fetched for {symbol}")
             return {"error": "No data available", "symbol": symbol}
         
-        # Prepare DataFrame
-        df['Timestamp'] = pd.to_datetime(df['Timestamp'])
-        df.set_index('Timestamp', inplace=True)
-        
         # Generate market session hourly bars
         hourly_df = get_hourly_with_market_session(df, market_open_time=market_open_time)
         
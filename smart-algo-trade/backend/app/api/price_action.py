@@ -6,7 +6,9 @@ Created By: Aseem Singhal
 Fyers API V3
 """
 
+import asyncio
 import logging
+import numpy as np
 import pandas as pd
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
@@ -14,12 +16,14 @@ from datetime import datetime, timedelta
 from fastapi import APIRouter, Query
 from pydantic import BaseModel
 
-# Try to import Fyers API
-try:
-    from fyers_apiv3 import fyersModel
-    FYERS_AVAILABLE = True
-except ImportError:
-    FYERS_AVAILABLE = False
+from app.services import compute_backend as compute
+from app.services import indicators as ind
+from app.services import pattern_scanner
+from app.services.history_client import history_client
+from app.services.pattern_index import pattern_index
+from app.services.pattern_screener import PatternScreener
+from app.api.technical_indicators import pivot_store, watchlist_scanner
+from config import settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -37,6 +41,22 @@ class PatternDetectionRequest(BaseModel):
     duration: int = 5  # days
 
 
+class ScreenerJobRequest(BaseModel):
+    """Periodic universe screen"""
+    symbols: List[str] = []  # empty -> settings.SCREENER_UNIVERSE
+    resolution: str = "5"
+    duration: int = 5  # days
+    interval_seconds: int = 300
+    bars: int = 200
+
+
+class PatternIndexUpdateRequest(BaseModel):
+    """Backfill / refresh the pattern occurrence index"""
+    symbols: List[str]
+    resolution: str = "15"
+    duration: int = 30  # days
+
+
 class PatternResponse(BaseModel):
     """Pattern detection response"""
     symbol: str
@@ -59,32 +79,9 @@ class PriceActionService:
         self._init_fyers()
     
     def _init_fyers(self):
-        """Initialize Fyers API client"""
-        if not FYERS_AVAILABLE:
-            logger.warning("Fyers API not available.")
-            return
-        
-        try:
-            from pathlib import Path
-            
-            client_id_path = Path("client_id.txt")
-            access_token_path = Path("access_token.txt")
-            
-            if client_id_path.exists() and access_token_path.exists():
-                client_id = client_id_path.read_text().strip()
-                access_token = access_token_path.read_text().strip()
-                
-                self.fyers = fyersModel.FyersModel(
-                    client_id=client_id,
-                    is_async=False,
-                    token=access_token,
-                    log_path=""
-                )
-                self.initialized = True
-                logger.info("Fyers client for patterns initialized")
-        
-        except Exception as e:
-            logger.error(f"Failed to initialize Fyers client: {e}")
+        """Use the process-wide Fyers history client"""
+        self.fyers = history_client.fyers
+        self.initialized = history_client.initialized
     
     def fetch_ohlc(self, ticker: str, interval: str, duration: int) -> Optional[pd.DataFrame]:
         """Fetch OHLC data for pattern analysis"""
@@ -92,40 +89,10 @@ class PriceActionService:
             return None
         
         try:
-            import datetime as dt
-            import pytz
-            
-            range_from = dt.date.today() - dt.timedelta(days=duration)
-            range_to = dt.date.today()
-            
-            from_date_string = range_from.strftime("%Y-%m-%d")
-            to_date_string = range_to.strftime("%Y-%m-%d")
+            # Shared client: coalesced, keep-alive, candle store backed
+            df = history_client.fetch_ohlc(ticker, interval, duration)
             
-            data = {
-                "symbol": ticker,
-                "resolution": interval,
-                "date_format": "1",
-                "range_from": from_date_string,
-                "range_to": to_date_string,
-                "cont_flag": "1"
-            }
-            
-            response = self.fyers.history(data=data)
-            
-            if response and 'candles' in response:
-                candles = response['candles']
-                
-                # Create DataFrame
-                columns = ['Timestamp', 'Open', 'High', 'Low', 'Close', 'Volume']
-                df = pd.DataFrame(candles, columns=columns)
-                
-                # Convert Timestamp to datetime in UTC
-                df['Timestamp'] = pd.to_datetime(df['Timestamp'], unit='s').dt.tz_localize(pytz.utc)
-                
-                # Convert to IST
-                ist = pytz.timezone('Asia/Kolkata')
-                df['Timestamp'] = df['Timestamp'].dt.tz_convert(ist)
-                
+            if df is not None:
                 logger.info(f"Fetched {len(df)} candles for {ticker}")
                 return df
             
@@ -151,21 +118,11 @@ class PriceActionService:
             DataFrame with 'Doji' column added
         """
         df = ohlc_df.copy()
-        doji_values = []
-        
-        for index, row in df.iterrows():
-            oc_diff = abs(row["Open"] - row["Close"])
-            hl_range = row['High'] - row['Low']
-            
-            # DOJI condition
-            if oc_diff <= threshold * hl_range:
-                doji_values.append(True)
-            else:
-                doji_values.append(False)
+        doji_values = pattern_scanner.doji(df["Open"], df["High"], df["Low"], df["Close"], threshold)
         
         df["Doji"] = doji_values
         
-        logger.info(f"Detected {sum(doji_values)} DOJI patterns out of {len(df)} candles")
+        logger.info(f"Detected {int(doji_values.sum())} DOJI patterns out of {len(df)} candles")
         return df
     
     @staticmethod
@@ -188,22 +145,10 @@ class PriceActionService:
             DataFrame with 'Hammer' column added
         """
         df = ohlc_df.copy()
-        hammer_values = []
-        
-        for index, row in df.iterrows():
-            # Red candle (Open > Close)
-            if (row["Open"] - row["Close"] > 0) and \
-               (row["Open"] - row["Low"] >= 2 * (row["High"] - row["Close"])):
-                hammer_values.append(True)
-            # Green candle (Close > Open)
-            elif (row["Close"] - row["Open"] > 0) and \
-                 (row["Close"] - row["Low"] >= 2 * (row["High"] - row["Open"])):
-                hammer_values.append(True)
-            else:
-                hammer_values.append(False)
+        hammer_values = pattern_scanner.hammer(df["Open"], df["High"], df["Low"], df["Close"])
         
         df["Hammer"] = hammer_values
-        logger.info(f"Detected {sum(hammer_values)} HAMMER patterns")
+        logger.info(f"Detected {int(hammer_values.sum())} HAMMER patterns")
         return df
     
     @staticmethod
@@ -223,23 +168,10 @@ class PriceActionService:
             DataFrame with 'BullishEngulfing' column added
         """
         df = ohlc_df.copy()
-        bullish_engulfing_values = [False]  # First candle cannot have pattern
-        
-        for i in range(1, len(df)):
-            previous_row = df.iloc[i - 1]
-            current_row = df.iloc[i]
-            
-            # Previous candle bearish, current bullish, and current engulfs
-            if (previous_row["Open"] > previous_row["Close"]) and \
-               (current_row["Close"] > current_row["Open"]) and \
-               (current_row["Open"] <= previous_row["Close"]) and \
-               (current_row["Close"] >= previous_row["Open"]):
-                bullish_engulfing_values.append(True)
-            else:
-                bullish_engulfing_values.append(False)
+        bullish_engulfing_values = pattern_scanner.bullish_engulfing(df["Open"], df["Close"])
         
         df["BullishEngulfing"] = bullish_engulfing_values
-        logger.info(f"Detected {sum(bullish_engulfing_values)} BULLISH ENGULFING patterns")
+        logger.info(f"Detected {int(bullish_engulfing_values.sum())} BULLISH ENGULFING patterns")
         return df
     
     @staticmethod
@@ -259,23 +191,10 @@ class PriceActionService:
             DataFrame with 'BearishEngulfing' column added
         """
         df = ohlc_df.copy()
-        bearish_engulfing_values = [False]  # First candle cannot have pattern
-        
-        for i in range(1, len(df)):
-            previous_row = df.iloc[i - 1]
-            current_row = df.iloc[i]
-            
-            # Previous candle bullish, current bearish, and current engulfs
-            if (previous_row["Open"] < previous_row["Close"]) and \
-               (current_row["Open"] > current_row["Close"]) and \
-               (current_row["Open"] >= previous_row["Close"]) and \
-               (current_row["Close"] <= previous_row["Open"]):
-                bearish_engulfing_values.append(True)
-            else:
-                bearish_engulfing_values.append(False)
+        bearish_engulfing_values = pattern_scanner.bearish_engulfing(df["Open"], df["Close"])
         
         df["BearishEngulfing"] = bearish_engulfing_values
-        logger.info(f"Detected {sum(bearish_engulfing_values)} BEARISH ENGULFING patterns")
+        logger.info(f"Detected {int(bearish_engulfing_values.sum())} BEARISH ENGULFING patterns")
         return df
     
     @staticmethod
@@ -312,18 +231,10 @@ class PriceActionService:
             DataFrame with 'BullishMarubozu' column added
         """
         df = ohlc_df.copy()
-        bullish_marubozu_values = []
-        
-        for index, row in df.iterrows():
-            if (row["Close"] > row["Open"] and 
-                abs(row["High"] - row["Close"]) <= buffer and 
-                abs(row["Low"] - row["Open"]) <= buffer):
-                bullish_marubozu_values.append(True)
-            else:
-                bullish_marubozu_values.append(False)
+        bullish_marubozu_values = pattern_scanner.bullish_marubozu(df["Open"], df["High"], df["Low"], df["Close"], buffer)
         
         df["BullishMarubozu"] = bullish_marubozu_values
-        logger.info(f"Detected {sum(bullish_marubozu_values)} BULLISH MARUBOZU patterns")
+        logger.info(f"Detected {int(bullish_marubozu_values.sum())} BULLISH MARUBOZU patterns")
         return df
     
     @staticmethod
@@ -345,18 +256,10 @@ class PriceActionService:
             DataFrame with 'BearishMarubozu' column added
         """
         df = ohlc_df.copy()
-        bearish_marubozu_values = []
-        
-        for index, row in df.iterrows():
-            if (row["Open"] > row["Close"] and 
-                abs(row["High"] - row["Open"]) <= buffer and 
-                abs(row["Low"] - row["Close"]) <= buffer):
-                bearish_marubozu_values.append(True)
-            else:
-                bearish_marubozu_values.append(False)
+        bearish_marubozu_values = pattern_scanner.bearish_marubozu(df["Open"], df["High"], df["Low"], df["Close"], buffer)
         
         df["BearishMarubozu"] = bearish_marubozu_values
-        logger.info(f"Detected {sum(bearish_marubozu_values)} BEARISH MARUBOZU patterns")
+        logger.info(f"Detected {int(bearish_marubozu_values.sum())} BEARISH MARUBOZU patterns")
         return df
     
     @staticmethod
@@ -378,22 +281,10 @@ class PriceActionService:
             DataFrame with 'ShootingStar' column added
         """
         df = ohlc_df.copy()
-        shooting_star_values = []
-        
-        for index, row in df.iterrows():
-            # Red candle (Open > Close)
-            if (row["Open"] - row["Close"] > 0) and \
-               (row["High"] - row["Open"] >= 2 * (row["Close"] - row["Low"])):
-                shooting_star_values.append(True)
-            # Green candle (Close > Open)
-            elif (row["Close"] - row["Open"] > 0) and \
-                 (row["High"] - row["Close"] >= 2 * (row["Open"] - row["Low"])):
-                shooting_star_values.append(True)
-            else:
-                shooting_star_values.append(False)
+        shooting_star_values = pattern_scanner.shooting_star(df["Open"], df["High"], df["Low"], df["Close"])
         
         df["ShootingStar"] = shooting_star_values
-        logger.info(f"Detected {sum(shooting_star_values)} SHOOTING STAR patterns")
+        logger.info(f"Detected {int(shooting_star_values.sum())} SHOOTING STAR patterns")
         return df
     
     @staticmethod
@@ -424,36 +315,29 @@ class PriceActionService:
         
         # Get the most recent (last) day's values
         last_row = ohlc_df.iloc[-1]
+        levels = ind.pivot_levels(last_row["High"], last_row["Low"], last_row["Close"])
+        result = PriceActionService.pivot_points_from_levels(levels)
         
-        high = round(float(last_row["High"]), 2)
-        low = round(float(last_row["Low"]), 2)
-        close = round(float(last_row["Close"]), 2)
-        
-        # Calculate pivot and levels
-        pivot = round((high + low + close) / 3, 2)
-        r1 = round((2 * pivot) - low, 2)
-        r2 = round(pivot + (high - low), 2)
-        r3 = round(high + 2 * (pivot - low), 2)
-        s1 = round((2 * pivot) - high, 2)
-        s2 = round(pivot - (high - low), 2)
-        s3 = round(low - 2 * (high - pivot), 2)
-        
-        result = {
-            "high": high,
-            "low": low,
-            "close": close,
-            "pivot": pivot,
-            "resistance_1": r1,
-            "resistance_2": r2,
-            "resistance_3": r3,
-            "support_1": s1,
-            "support_2": s2,
-            "support_3": s3
-        }
-        
-        logger.info(f"Pivot Points Calculated: Pivot={pivot}, R1={r1}, S1={s1}")
+        logger.info(f"Pivot Points Calculated: Pivot={result['pivot']}, R1={result['resistance_1']}, S1={result['support_1']}")
         return result
     
+    @staticmethod
+    def pivot_points_from_levels(levels: Dict[str, float]) -> Dict[str, float]:
+        """Rename indicators.pivot_levels() keys to the pivot-points response keys"""
+        return {
+            "high": levels["high"],
+            "low": levels["low"],
+            "close": levels["close"],
+            "pivot": levels["pivot"],
+            "resistance_1": levels["r1"],
+            "resistance_2": levels["r2"],
+            "resistance_3": levels["r3"],
+            "support_1": levels["s1"],
+            "support_2": levels["s2"],
+            "support_3": levels["s3"]
+        }
+    
+    @staticmethod
     def detect_inside_bar(ohlc_df: pd.DataFrame) -> pd.DataFrame:
         """
         Detect INSIDE BAR patterns (mother bar + inside bar)
@@ -467,69 +351,57 @@ class PriceActionService:
             DataFrame with 'InsideBar' column added
         """
         df = ohlc_df.copy()
-        inside_bar_values = []
-        
-        for index in range(len(df)):
-            if index == 0:
-                inside_bar_values.append(False)
-                continue
-            
-            prev_row = df.iloc[index - 1]
-            curr_row = df.iloc[index]
-            
-            # Current bar is inside previous bar
-            is_inside = (curr_row["High"] < prev_row["High"] and 
-                        curr_row["Low"] > prev_row["Low"])
-            
-            inside_bar_values.append(is_inside)
+        inside_bar_values = pattern_scanner.inside_bar(df["High"], df["Low"])
         
         df["InsideBar"] = inside_bar_values
-        logger.info(f"Detected {sum(inside_bar_values)} INSIDE BAR patterns")
+        logger.info(f"Detected {int(inside_bar_values.sum())} INSIDE BAR patterns")
         return df
     
     @staticmethod
-    def detect_breakout(ohlc_df: pd.DataFrame, lookback: int = 5) -> pd.DataFrame:
+    def detect_breakout(ohlc_df: pd.DataFrame, lookback: int = 5,
+                        lookbacks: Optional[List[int]] = None) -> pd.DataFrame:
         """
         Detect BREAKOUT patterns
         
         Breakout: Current High > Previous N candles High (or Low < Previous N candles Low)
         
+        Rolling extremes are O(n) whatever the lookback, so several ranges
+        (e.g. 5/20/55) can be scanned in one call.
+        
         Args:
             ohlc_df: DataFrame with OHLC data
             lookback: Number of candles to look back
+            lookbacks: Extra lookbacks; adds 'Breakout_<k>', 'BreakoutUp_<k>'
+                       and 'BreakoutDown_<k>' columns for each
         
         Returns:
             DataFrame with 'Breakout' column added
         """
         df = ohlc_df.copy()
-        breakout_values = []
         
-        for index in range(len(df)):
-            if index < lookback:
-                breakout_values.append(False)
-                continue
-            
-            curr_row = df.iloc[index]
-            prev_rows = df.iloc[index - lookback:index]
-            
-            prev_high = prev_rows["High"].max()
-            prev_low = prev_rows["Low"].min()
-            
-            # Breakout: high or low breakout
-            is_breakout = (curr_row["High"] > prev_high or 
-                          curr_row["Low"] < prev_low)
-            
-            breakout_values.append(is_breakout)
+        # Window scans run on the configured compute backend (numpy or numba)
+        all_lookbacks = [lookback] + [k for k in (lookbacks or []) if k != lookback]
+        up, down = compute.breakout_grid(df["High"].to_numpy(), df["Low"].to_numpy(), all_lookbacks)
         
+        breakout_values = up[:, 0] | down[:, 0]
         df["Breakout"] = breakout_values
-        logger.info(f"Detected {sum(breakout_values)} BREAKOUT patterns")
+        
+        for j, k in enumerate(all_lookbacks):
+            if lookbacks and k in lookbacks:
+                df[f"Breakout_{k}"] = up[:, j] | down[:, j]
+                df[f"BreakoutUp_{k}"] = up[:, j]
+                df[f"BreakoutDown_{k}"] = down[:, j]
+        
+        logger.info(f"Detected {int(breakout_values.sum())} BREAKOUT patterns")
         return df
     
     def analyze_patterns(self, symbol: str, resolution: str, duration: int) -> Optional[Dict]:
         """
         Comprehensive pattern analysis
         
-        Detects all patterns and returns summary
+        Detects all patterns in one vectorised pass (per-candle bitmask from
+        pattern_scanner) and returns summary; only candles with a pattern
+        are serialised
         """
         try:
             # Fetch OHLC data
@@ -539,63 +411,39 @@ class PriceActionService:
                 logger.warning(f"No data fetched for {symbol}")
                 return None
             
-            # Detect all patterns
-            df = self.detect_doji(df)
-            df = self.detect_hammer(df)
-            df = self.detect_engulfing(df)
-            df = self.detect_bullish_marubozu(df)
-            df = self.detect_bearish_marubozu(df)
-            df = self.detect_shooting_star(df)
-            df = self.detect_inside_bar(df)
-            df = self.detect_breakout(df)
+            # Closed candles not yet in the occurrence index are indexed for free
+            try:
+                pattern_index.update(symbol, resolution, df)
+            except Exception as e:
+                logger.error(f"Pattern index update failed for {symbol}: {e}")
             
-            # Count patterns
-            patterns_found = {
-                "Doji": int(df["Doji"].sum()),
-                "Hammer": int(df["Hammer"].sum()),
-                "BullishEngulfing": int(df["BullishEngulfing"].sum()),
-                "BearishEngulfing": int(df["BearishEngulfing"].sum()),
-                "Engulfing": int(df["Engulfing"].sum()),
-                "BullishMarubozu": int(df["BullishMarubozu"].sum()),
-                "BearishMarubozu": int(df["BearishMarubozu"].sum()),
-                "ShootingStar": int(df["ShootingStar"].sum()),
-                "InsideBar": int(df["InsideBar"].sum()),
-                "Breakout": int(df["Breakout"].sum()),
-            }
+            # All patterns in one pass -> one bitmask per candle
+            mask = pattern_scanner.scan_patterns(df["Open"], df["High"], df["Low"], df["Close"])
+            patterns_found = pattern_scanner.pattern_counts(mask)
             
-            # Get candles with patterns
-            candles_with_patterns = []
-            for idx, row in df.iterrows():
-                patterns = []
-                if row["Doji"]:
-                    patterns.append("Doji")
-                if row["Hammer"]:
-                    patterns.append("Hammer")
-                if row["BullishEngulfing"]:
-                    patterns.append("BullishEngulfing")
-                if row["BearishEngulfing"]:
-                    patterns.append("BearishEngulfing")
-                if row["BullishMarubozu"]:
-                    patterns.append("BullishMarubozu")
-                if row["BearishMarubozu"]:
-                    patterns.append("BearishMarubozu")
-                if row["ShootingStar"]:
-                    patterns.append("ShootingStar")
-                if row["InsideBar"]:
-                    patterns.append("InsideBar")
-                if row["Breakout"]:
-                    patterns.append("Breakout")
-                
-                if patterns:
-                    candles_with_patterns.append({
-                        "timestamp": row["Timestamp"].isoformat() if pd.notna(row["Timestamp"]) else None,
-                        "open": float(row["Open"]),
-                        "high": float(row["High"]),
-                        "low": float(row["Low"]),
-                        "close": float(row["Close"]),
-                        "volume": int(row["Volume"]),
-                        "patterns": patterns
-                    })
+            # Only candles with at least one pattern are serialised
+            rows = np.flatnonzero(mask)
+            timestamps = pattern_scanner.isoformat_timestamps(df["Timestamp"].iloc[rows])
+            candles_with_patterns = [
+                {
+                    "timestamp": ts,
+                    "open": o,
+                    "high": h,
+                    "low": l,
+                    "close": c,
+                    "volume": int(v),
+                    "patterns": pattern_scanner.pattern_names(m)
+                }
+                for ts, o, h, l, c, v, m in zip(
+                    timestamps,
+                    df["Open"].to_numpy(dtype=float)[rows].tolist(),
+                    df["High"].to_numpy(dtype=float)[rows].tolist(),
+                    df["Low"].to_numpy(dtype=float)[rows].tolist(),
+                    df["Close"].to_numpy(dtype=float)[rows].tolist(),
+                    df["Volume"].to_numpy()[rows].tolist(),
+                    mask[rows].tolist()
+                )
+            ]
             
             result = {
                 "symbol": symbol,
@@ -615,6 +463,8 @@ class PriceActionService:
 
 # Initialize service
 price_action_service = PriceActionService()
+pattern_screener = PatternScreener(price_action_service.fetch_ohlc, rate_limiter=watchlist_scanner.rate_limiter,
+                                   index=pattern_index)
 
 
 # ============================================================================
@@ -965,6 +815,240 @@ async def detect_shooting_star_endpoint(
         return {"status": "error", "message": str(e)}
 
 
+@router.get("/detect-breakout")
+async def detect_breakout_endpoint(
+    symbol: str = Query(...),
+    resolution: str = Query("30"),
+    duration: int = Query(5),
+    lookbacks: str = Query("5,20,55", description="Comma-separated lookbacks")
+):
+    """
+    Detect BREAKOUT patterns over several lookbacks in one pass
+    
+    Upside breakout: High above the highest High of the previous N candles
+    Downside breakout: Low below the lowest Low of the previous N candles
+    
+    Example:
+    /detect-breakout?symbol=NSE:SBIN-EQ&resolution=15&duration=30&lookbacks=5,20,55
+    """
+    try:
+        periods = sorted({int(k) for k in lookbacks.split(",") if k.strip()})
+        if not periods or periods[0] < 1:
+            return {"status": "error", "message": "lookbacks must be positive integers"}
+        
+        df = price_action_service.fetch_ohlc(symbol, resolution, duration)
+        
+        if df is None:
+            return {"status": "error", "message": "Failed to fetch data"}
+        
+        up, down = compute.breakout_grid(df["High"].to_numpy(), df["Low"].to_numpy(), periods)
+        
+        # Only candles breaking out on some lookback are listed
+        rows = np.flatnonzero((up | down).any(axis=1))
+        timestamps = pattern_scanner.isoformat_timestamps(df["Timestamp"].iloc[rows])
+        candles = [
+            {
+                "timestamp": ts,
+                "high": h,
+                "low": l,
+                "close": c,
+                "up": [k for k, flag in zip(periods, up_row) if flag],
+                "down": [k for k, flag in zip(periods, down_row) if flag]
+            }
+            for ts, h, l, c, up_row, down_row in zip(
+                timestamps,
+                df["High"].to_numpy(dtype=float)[rows].tolist(),
+                df["Low"].to_numpy(dtype=float)[rows].tolist(),
+                df["Close"].to_numpy(dtype=float)[rows].tolist(),
+                up[rows].tolist(),
+                down[rows].tolist()
+            )
+        ]
+        
+        return {
+            "status": "success",
+            "data": {
+                "symbol": symbol,
+                "pattern": "Breakout",
+                "total_candles": len(df),
+                "counts": {
+                    str(k): {"up": int(up[:, j].sum()), "down": int(down[:, j].sum())}
+                    for j, k in enumerate(periods)
+                },
+                "current": {
+                    str(k): {"up": bool(up[-1, j]), "down": bool(down[-1, j])}
+                    for j, k in enumerate(periods)
+                } if len(df) else {},
+                "candles": candles
+            }
+        }
+    
+    except Exception as e:
+        logger.error(f"Error detecting BREAKOUT: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+@router.get("/screener")
+async def pattern_screener_endpoint(
+    symbols: Optional[str] = Query(None, description="Comma-separated symbols (default: screener universe)"),
+    resolution: str = Query(None),
+    duration: int = Query(5),
+    bars: int = Query(200, ge=10, le=5000),
+    refresh: bool = Query(False, description="Run a new screen instead of returning the job's latest")
+):
+    """
+    Ranked table of symbols whose latest closed candle shows a pattern
+    
+    Without symbols the latest result of the periodic screener job is
+    returned while the job is running; otherwise the universe is loaded,
+    scanned as one (symbols x bars) matrix and ranked now.
+    
+    Example:
+    /screener?symbols=NSE:SBIN-EQ,NSE:INFY-EQ,NSE:TCS-EQ&resolution=5
+    """
+    try:
+        latest = pattern_screener.latest
+        if not symbols and not refresh and latest is not None and pattern_screener.running:
+            return {"status": "success", "data": latest}
+        
+        job = pattern_screener.status()
+        universe = ([s for s in symbols.split(",") if s.strip()] if symbols
+                    else pattern_screener.job_symbols or settings.SCREENER_UNIVERSE)
+        if not universe:
+            return {"status": "error", "message": "No symbols given and no screener universe configured"}
+        
+        resolution = resolution or job["resolution"] or settings.SCREENER_RESOLUTION
+        # Blocking history fetches - keep them off the event loop
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, lambda: pattern_screener.run(universe, resolution, duration, bars))
+        return {"status": "success", "data": result}
+    
+    except Exception as e:
+        logger.error(f"Error running pattern screener: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+@router.post("/screener/job")
+async def start_screener_job(request: ScreenerJobRequest):
+    """
+    Start (or restart) the periodic universe screen
+    
+    Example request:
+    {"symbols": ["NSE:SBIN-EQ", "NSE:INFY-EQ"], "resolution": "5", "interval_seconds": 300}
+    """
+    try:
+        universe = request.symbols or settings.SCREENER_UNIVERSE
+        if not universe:
+            return {"status": "error", "message": "No symbols given and no screener universe configured"}
+        
+        status = pattern_screener.start(universe, request.resolution, request.duration,
+                                        request.interval_seconds, request.bars)
+        return {"status": "success", "data": status}
+    
+    except Exception as e:
+        logger.error(f"Error starting screener job: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+@router.get("/screener/job")
+async def screener_job_status():
+    """Periodic screener status"""
+    return {"status": "success", "data": pattern_screener.status()}
+
+
+@router.post("/screener/job/stop")
+async def stop_screener_job():
+    """Stop the periodic screener"""
+    pattern_screener.stop()
+    return {"status": "success", "data": pattern_screener.status()}
+
+
+def _split_param(value: Optional[str]) -> Optional[List[str]]:
+    """Comma-separated query parameter -> list (None when empty)"""
+    items = [item.strip() for item in (value or "").split(",") if item.strip()]
+    return items or None
+
+
+def _since_epoch(days: Optional[int]) -> Optional[int]:
+    return int((datetime.now() - timedelta(days=days)).timestamp()) if days else None
+
+
+@router.get("/index/occurrences")
+async def pattern_occurrences_endpoint(
+    patterns: Optional[str] = Query(None, description="Comma-separated pattern names (default: all)"),
+    symbols: Optional[str] = Query(None, description="Comma-separated symbols (default: all indexed)"),
+    resolution: Optional[str] = Query(None),
+    days: Optional[int] = Query(30, ge=1),
+    limit: int = Query(500, ge=1, le=10000)
+):
+    """
+    Indexed pattern occurrences, newest first - no fetch, no rescan
+    
+    Example:
+    /index/occurrences?patterns=Hammer&symbols=NSE:SBIN-EQ,NSE:INFY-EQ&resolution=15&days=30
+    """
+    try:
+        result = pattern_index.query(_split_param(patterns), _split_param(symbols), resolution,
+                                     since=_since_epoch(days), limit=limit)
+        return {"status": "success", "data": result}
+    
+    except Exception as e:
+        logger.error(f"Error querying pattern index: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+@router.get("/index/statistics")
+async def pattern_statistics_endpoint(
+    patterns: Optional[str] = Query(None),
+    symbols: Optional[str] = Query(None),
+    resolution: Optional[str] = Query(None),
+    days: Optional[int] = Query(None, ge=1)
+):
+    """
+    Historical pattern counts per pattern and symbol, from the index alone
+    
+    Example:
+    /index/statistics?patterns=BullishEngulfing,BearishEngulfing&resolution=15&days=90
+    """
+    try:
+        result = pattern_index.statistics(_split_param(patterns), _split_param(symbols), resolution,
+                                          since=_since_epoch(days))
+        return {"status": "success", "data": {**result, "index": pattern_index.stats()}}
+    
+    except Exception as e:
+        logger.error(f"Error computing pattern statistics: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+@router.post("/index/update")
+async def update_pattern_index(request: PatternIndexUpdateRequest):
+    """
+    Fetch history and index the closed candles newer than each symbol's watermark
+    
+    Example request:
+    {"symbols": ["NSE:SBIN-EQ", "NSE:INFY-EQ"], "resolution": "15", "duration": 30}
+    """
+    try:
+        def backfill():
+            scanned = {}
+            for symbol in watchlist_scanner.unique_symbols(request.symbols):
+                watchlist_scanner.rate_limiter.acquire()
+                # Reach back to the watermark so no candles are skipped
+                duration = pattern_index.fetch_days(symbol, request.resolution, request.duration)
+                df = price_action_service.fetch_ohlc(symbol, request.resolution, duration)
+                scanned[symbol] = pattern_index.update(symbol, request.resolution, df, save=False)
+            pattern_index.save()
+            return scanned
+        
+        # Blocking history fetches - keep them off the event loop
+        scanned = await asyncio.get_running_loop().run_in_executor(None, backfill)
+        return {"status": "success", "data": {"scanned": scanned, "index": pattern_index.stats()}}
+    
+    except Exception as e:
+        logger.error(f"Error updating pattern index: {e}")
+        return {"status": "error", "message": str(e)}
+
+
 @router.get("/pivot-points")
 async def get_pivot_points_endpoint(
     symbol: str = Query(...),
@@ -987,8 +1071,25 @@ async def get_pivot_points_endpoint(
     - S1 = (2 * Pivot) - High
     - S2 = Pivot - (High - Low)
     - S3 = Low - 2 * (High - Pivot)
+    
+    Daily pivots (resolution=D) are served from the per-trading-day pivot
+    store and are based on the previous completed session; other
+    resolutions use the last candle of the fetched history.
     """
     try:
+        if resolution.upper() in ("D", "1D"):
+            pivots = await asyncio.get_running_loop().run_in_executor(None, pivot_store.get, symbol, duration)
+            if pivots is None:
+                return {"status": "error", "message": "Unable to calculate pivot points"}
+            
+            return {
+                "status": "success",
+                "data": {
+                    "symbol": symbol,
+                    "pivot_points": price_action_service.pivot_points_from_levels(pivots.levels)
+                }
+            }
+        
         df = price_action_service.fetch_ohlc(symbol, resolution, duration)
         
         if df is None:
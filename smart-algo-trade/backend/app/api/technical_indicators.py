@@ -6,21 +6,25 @@ Created By: Aseem Singhal
 Fyers API V3
 """
 
+import asyncio
+import json
 import logging
+import time
 import pandas as pd
 import numpy as np
 from typing import Optional, Dict, List, Any
 from datetime import datetime, timedelta
 
 from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-# Try to import Fyers API
-try:
-    from fyers_apiv3 import fyersModel
-    FYERS_AVAILABLE = True
-except ImportError:
-    FYERS_AVAILABLE = False
+from app.services import indicators as ind
+from app.services.history_client import history_client
+from app.services.indicator_cache import indicator_cache, cached_indicator
+from app.services.swing_levels import swing_level_store
+from app.services.pivot_store import PivotStore, SessionPivots, previous_session, trading_day
+from app.services.watchlist_scanner import WatchlistScanner, to_json_scalar
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -38,6 +42,36 @@ class IndicatorRequest(BaseModel):
     duration: int = 5  # days
 
 
+class IndicatorSpec(BaseModel):
+    """One indicator of a batch request"""
+    name: str                               # atr, adx, rsi, macd, bollinger, ema, sma, wma, stochastic, supertrend, ...
+    params: Dict[str, Any] = {}             # e.g. {"period": 20}
+    id: Optional[str] = None                # key in the response (default: name + params)
+
+
+class BatchIndicatorRequest(BaseModel):
+    """Several indicators over one OHLC fetch"""
+    symbol: str
+    resolution: str
+    duration: int = 5  # days
+    indicators: List[IndicatorSpec]
+    include_series: bool = True  # False: only current values
+
+
+class WatchlistScanRequest(BaseModel):
+    """Same indicator set over many symbols"""
+    symbols: List[str]
+    resolution: str
+    duration: int = 5  # days
+    indicators: List[IndicatorSpec]
+
+
+class PivotRefreshRequest(BaseModel):
+    """Recompute daily pivots for a watchlist"""
+    symbols: List[str]
+    daily_duration: int = 10  # days of daily history per symbol
+
+
 class ATRResponse(BaseModel):
     """ATR calculation response"""
     symbol: str
@@ -60,32 +94,9 @@ class TechnicalIndicatorsService:
         self._init_fyers()
     
     def _init_fyers(self):
-        """Initialize Fyers API client"""
-        if not FYERS_AVAILABLE:
-            logger.warning("Fyers API not available.")
-            return
-        
-        try:
-            from pathlib import Path
-            
-            client_id_path = Path("client_id.txt")
-            access_token_path = Path("access_token.txt")
-            
-            if client_id_path.exists() and access_token_path.exists():
-                client_id = client_id_path.read_text().strip()
-                access_token = access_token_path.read_text().strip()
-                
-                self.fyers = fyersModel.FyersModel(
-                    client_id=client_id,
-                    is_async=False,
-                    token=access_token,
-                    log_path=""
-                )
-                self.initialized = True
-                logger.info("Fyers client for indicators initialized")
-        
-        except Exception as e:
-            logger.error(f"Failed to initialize Fyers client: {e}")
+        """Use the process-wide Fyers history client"""
+        self.fyers = history_client.fyers
+        self.initialized = history_client.initialized
     
     def fetch_ohlc(self, ticker: str, interval: str, duration: int) -> Optional[pd.DataFrame]:
         """Fetch OHLC data for indicator analysis"""
@@ -93,44 +104,10 @@ class TechnicalIndicatorsService:
             return None
         
         try:
-            import datetime as dt
-            import pytz
-            
-            range_from = dt.date.today() - dt.timedelta(days=duration)
-            range_to = dt.date.today()
-            
-            from_date_string = range_from.strftime("%Y-%m-%d")
-            to_date_string = range_to.strftime("%Y-%m-%d")
-            
-            data = {
-                "symbol": ticker,
-                "resolution": interval,
-                "date_format": "1",
-                "range_from": from_date_string,
-                "range_to": to_date_string,
-                "cont_flag": "1"
-            }
-            
-            response = self.fyers.history(data=data)
+            # Shared client: coalesced, keep-alive, candle store backed
+            df = history_client.fetch_ohlc(ticker, interval, duration)
             
-            if response and 'candles' in response:
-                candles = response['candles']
-                
-                # Create DataFrame
-                columns = ['Timestamp', 'Open', 'High', 'Low', 'Close', 'Volume']
-                df = pd.DataFrame(candles, columns=columns)
-                
-                # Convert Timestamp to datetime in UTC
-                df['Timestamp'] = pd.to_datetime(df['Timestamp'], unit='s').dt.tz_localize(pytz.utc)
-                
-                # Convert to IST
-                ist = pytz.timezone('Asia/Kolkata')
-                df['Timestamp'] = df['Timestamp'].dt.tz_convert(ist)
-                
-                # Ensure numeric types
-                for col in ['Open', 'High', 'Low', 'Close', 'Volume']:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-                
+            if df is not None:
                 logger.info(f"Fetched {len(df)} candles for {ticker}")
                 return df
             
@@ -160,16 +137,8 @@ class TechnicalIndicatorsService:
         """
         df = ohlc_df.copy()
         
-        # Calculate True Range components
-        df['High-Low'] = abs(df['High'] - df['Low'])
-        df['High-PrevClose'] = abs(df['High'] - df['Close'].shift(1))
-        df['Low-PrevClose'] = abs(df['Low'] - df['Close'].shift(1))
-        
-        # True Range is the maximum of the three components
-        df['TR'] = df[['High-Low', 'High-PrevClose', 'Low-PrevClose']].max(axis=1, skipna=False)
-        
-        # ATR is the exponential moving average of True Range
-        df['ATR'] = df['TR'].ewm(com=period, min_periods=period).mean()
+        # TR = max(High-Low, |High-PrevClose|, |Low-PrevClose|), ATR = EWM of TR
+        df['ATR'] = ind.atr(df['High'], df['Low'], df['Close'], period=period)
         
         logger.info(f"ATR calculated with period {period}")
         return df
@@ -189,7 +158,8 @@ class TechnicalIndicatorsService:
         Calculation Steps:
         1. Calculate True Range (TR)
         2. Calculate Directional Movements: +DM and -DM using np.where
-        3. Apply Wilder's smoothing to TR and DM values
+        3. Apply Wilder's smoothing to TR and DM values (running sums,
+           a recursive filter over the whole column)
         4. Calculate +DI and -DI from smoothed values
         5. Calculate DX = |+DI - -DI| / (+DI + -DI) * 100
         6. ADX = Smoothed DX using Wilder's method
@@ -203,82 +173,11 @@ class TechnicalIndicatorsService:
         """
         df = ohlc_df.copy()
         
-        # ===== Step 1: Calculate True Range =====
-        df['High-Low'] = abs(df['High'] - df['Low'])
-        df['High-PrevClose'] = abs(df['High'] - df['Close'].shift(1))
-        df['Low-PrevClose'] = abs(df['Low'] - df['Close'].shift(1))
-        df['TR'] = df[['High-Low', 'High-PrevClose', 'Low-PrevClose']].max(axis=1, skipna=False)
-        
-        # ===== Step 2: Calculate Directional Movements =====
-        # Using numpy.where for efficient conditional logic (Aseem's approach)
-        df['DMplus'] = np.where(
-            (df['High'] - df['High'].shift(1)) > (df['Low'].shift(1) - df['Low']),
-            df['High'] - df['High'].shift(1),
-            0
-        )
-        df['DMplus'] = np.where(df['DMplus'] < 0, 0, df['DMplus'])
-        
-        df['DMminus'] = np.where(
-            (df['Low'].shift(1) - df['Low']) > (df['High'] - df['High'].shift(1)),
-            df['Low'].shift(1) - df['Low'],
-            0
-        )
-        df['DMminus'] = np.where(df['DMminus'] < 0, 0, df['DMminus'])
-        
-        # ===== Step 3: Apply Wilder's Smoothing =====
-        # Convert to lists for iterative calculation
-        TR_list = df['TR'].tolist()
-        DMplus_list = df['DMplus'].tolist()
-        DMminus_list = df['DMminus'].tolist()
-        
-        TRn = []
-        DMplusN = []
-        DMminusN = []
-        
-        for i in range(len(df)):
-            if i < period:
-                TRn.append(np.NaN)
-                DMplusN.append(np.NaN)
-                DMminusN.append(np.NaN)
-            elif i == period:
-                # First smoothed values are simple sums
-                TRn.append(df['TR'].iloc[0:period+1].sum())
-                DMplusN.append(df['DMplus'].iloc[0:period+1].sum())
-                DMminusN.append(df['DMminus'].iloc[0:period+1].sum())
-            else:
-                # Wilder's smoothing: previous_sum - (previous_sum/period) + current
-                TRn.append(TRn[i-1] - (TRn[i-1]/period) + TR_list[i])
-                DMplusN.append(DMplusN[i-1] - (DMplusN[i-1]/period) + DMplus_list[i])
-                DMminusN.append(DMminusN[i-1] - (DMminusN[i-1]/period) + DMminus_list[i])
-        
-        df['TRn'] = np.array(TRn)
-        df['DMplusN'] = np.array(DMplusN)
-        df['DMminusN'] = np.array(DMminusN)
-        
-        # ===== Step 4: Calculate +DI and -DI =====
-        df['DI+'] = 100 * (df['DMplusN'] / df['TRn'])
-        df['DI-'] = 100 * (df['DMminusN'] / df['TRn'])
-        
-        # ===== Step 5: Calculate DX =====
-        df['DIdiff'] = abs(df['DI+'] - df['DI-'])
-        df['DIsum'] = df['DI+'] + df['DI-']
-        df['DX'] = 100 * (df['DIdiff'] / df['DIsum'])
-        
-        # ===== Step 6: Calculate ADX using Wilder's smoothing =====
-        DX_list = df['DX'].tolist()
-        ADX = []
-        
-        for j in range(len(df)):
-            if j < 2 * period - 1:
-                ADX.append(np.NaN)
-            elif j == 2 * period - 1:
-                # First ADX is the average of DX
-                ADX.append(df['DX'].iloc[j-period+1:j+1].mean())
-            else:
-                # Wilder's smoothing for ADX
-                ADX.append(((period - 1) * ADX[j - 1] + DX_list[j]) / period)
-        
-        df['ADX'] = np.array(ADX)
+        # Steps 1-6 run in the shared indicator library (app.services.indicators.adx)
+        adx = ind.adx(df['High'], df['Low'], df['Close'], period=period)
+        df['ADX'] = adx['adx']
+        df['DI+'] = adx['di_plus']
+        df['DI-'] = adx['di_minus']
         
         logger.info(f"ADX calculated with period {period} using Wilder's smoothing")
         return df
@@ -315,25 +214,61 @@ class TechnicalIndicatorsService:
         """
         df = ohlc_df.copy()
         
-        # Step 1: Calculate price deltas
-        delta = df['Close'].diff()
+        # Steps 1-7: rolling means of gains / losses (app.services.indicators.rsi)
+        df['RSI'] = ind.rsi(df['Close'], period=period)
         
-        # Step 2: Separate gains and losses
-        # Gains: positive changes, Losses: absolute value of negative changes
-        gain = delta.where(delta > 0, 0)
-        loss = -delta.where(delta < 0, 0)
+        logger.info(f"RSI calculated with period {period} using standard formula")
+        return df
+    
+    @staticmethod
+    def calculate_atr_wilder(ohlc_df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
+        """
+        Calculate Average True Range with Wilder's smoothing (RMA)
+        
+        Calculation:
+        1. True Range (TR) = max(High - Low, |High - Previous Close|, |Low - Previous Close|)
+        2. First ATR (at index period) = average of the first period TR values
+        3. ATR = ((period - 1) * Previous ATR + Current TR) / period
         
-        # Step 3: Calculate average gain and average loss over period
-        avg_gain = gain.rolling(window=period, min_periods=period).mean()
-        avg_loss = loss.rolling(window=period, min_periods=period).mean()
+        Args:
+            ohlc_df: DataFrame with OHLC data
+            period: Period for ATR calculation (default 14)
         
-        # Step 4: Calculate RS (Relative Strength)
-        rs = avg_gain / avg_loss
+        Returns:
+            DataFrame with 'TR' and 'ATR' columns added
+        """
+        df = ohlc_df.copy()
         
-        # Step 5: Calculate RSI using standard formula
-        df['RSI'] = 100 - (100 / (1 + rs))
+        df['TR'] = ind.true_range(df['High'], df['Low'], df['Close'])
+        df['ATR'] = ind.atr(df['High'], df['Low'], df['Close'], period=period, wilder=True,
+                            tr=df['TR'].to_numpy())
         
-        logger.info(f"RSI calculated with period {period} using standard formula")
+        logger.info(f"ATR calculated with period {period} using Wilder's smoothing")
+        return df
+    
+    @staticmethod
+    def calculate_rsi_wilder(ohlc_df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
+        """
+        Calculate Relative Strength Index with Wilder's smoothing
+        
+        Same gains/losses as calculate_rsi(), but the averages are Wilder
+        moving averages instead of simple rolling means:
+        1. First AvgU / AvgD (at index period) = simple average of the first period moves
+        2. AvgU = ((period - 1) * Previous AvgU + U) / period (same for AvgD)
+        3. RSI = 100 - (100 / (1 + AvgU / AvgD))
+        
+        Args:
+            ohlc_df: DataFrame with OHLC data
+            period: Period for RSI calculation (default 14)
+        
+        Returns:
+            DataFrame with 'RSI' column added
+        """
+        df = ohlc_df.copy()
+        
+        df['RSI'] = ind.rsi(df['Close'], period=period, wilder=True)
+        
+        logger.info(f"RSI calculated with period {period} using Wilder's smoothing")
         return df
     
     @staticmethod
@@ -369,20 +304,13 @@ class TechnicalIndicatorsService:
         """
         df = ohlc_df.copy()
         
-        # Step 1: Calculate Fast MA (12-period EWM)
-        df['MA_Fast'] = df['Close'].ewm(span=fast, min_periods=fast).mean()
-        
-        # Step 2: Calculate Slow MA (26-period EWM)
-        df['MA_Slow'] = df['Close'].ewm(span=slow, min_periods=slow).mean()
-        
-        # Step 3: Calculate MACD line (difference between fast and slow)
-        df['MACD'] = df['MA_Fast'] - df['MA_Slow']
-        
-        # Step 4: Calculate Signal line (9-period EWM of MACD)
-        df['Signal'] = df['MACD'].ewm(span=signal, min_periods=signal).mean()
-        
-        # Step 5: Calculate MACD Histogram (difference between MACD and Signal)
-        df['MACD_Histogram'] = df['MACD'] - df['Signal']
+        # Steps 1-5 (app.services.indicators.macd)
+        macd = ind.macd(df['Close'], fast=fast, slow=slow, signal=signal, outputs=ind.MACD_OUTPUTS)
+        df['MA_Fast'] = macd['fast_ma']
+        df['MA_Slow'] = macd['slow_ma']
+        df['MACD'] = macd['macd']
+        df['Signal'] = macd['signal']
+        df['MACD_Histogram'] = macd['histogram']
         
         logger.info(f"MACD calculated: MA_Fast={fast}, MA_Slow={slow}, Signal={signal}")
         return df
@@ -419,18 +347,11 @@ class TechnicalIndicatorsService:
         """
         df = ohlc_df.copy()
         
-        # Calculate Simple Moving Average using rolling window
-        df['MA'] = df['Close'].rolling(period).mean()
-        
-        # Calculate standard deviation using rolling window
-        rolling_std = df['Close'].rolling(period).std()
-        
-        # Calculate upper and lower bands
-        df['BB_up'] = df['MA'] + (rolling_std * std_dev)
-        df['BB_dn'] = df['MA'] - (rolling_std * std_dev)
-        
-        # Calculate band width
-        df['BB_width'] = df['BB_up'] - df['BB_dn']
+        bands = ind.bollinger_bands(df['Close'], period=period, std_dev=std_dev)
+        df['MA'] = bands['ma']
+        df['BB_up'] = bands['upper']
+        df['BB_dn'] = bands['lower']
+        df['BB_width'] = bands['width']
         
         # Remove NaN rows from rolling window period
         df.dropna(inplace=True)
@@ -459,7 +380,7 @@ class TechnicalIndicatorsService:
         df = ohlc_df.copy()
         
         # Calculate EMA using exponential weighted mean
-        df['EMA'] = df[column].ewm(span=period).mean()
+        df['EMA'] = ind.ema(df[column], period=period)
         
         logger.info(f"EMA calculated with period {period} on column {column}")
         return df
@@ -546,8 +467,8 @@ class TechnicalIndicatorsService:
         """
         df = ohlc_df.copy()
         
-        # Calculate SMA using pandas rolling window (Method 1 - Optimized)
-        df['SMA'] = df[column].rolling(window=period).mean()
+        # Calculate SMA using a rolling window (Method 1 - Optimized)
+        df['SMA'] = ind.sma(df[column], period=period)
         
         logger.info(f"SMA calculated with period {period} on column {column}")
         return df
@@ -567,15 +488,16 @@ class TechnicalIndicatorsService:
         METHOD 1 (CUSTOM WEIGHTS - Used by Aseem):
             weights = [0.40, 0.30, 0.20, 0.10]  # Period 4 example
             wma_value = Close[i]*0.40 + Close[i-1]*0.30 + Close[i-2]*0.20 + Close[i-3]*0.10
-            - Time Complexity: O(n × period)
             - Use Case: Custom weight schemes
             
-        METHOD 2 (LINEAR DECREASING WEIGHTS - OPTIMIZED):
+        METHOD 2 (LINEAR DECREASING WEIGHTS):
             weights = [period, period-1, ..., 2, 1] / sum(weights)
             wma = sum(Close * weight) / sum(weight)
-            - Time Complexity: O(n)
             - Use Case: Standard linear WMA (most common)
         
+        Both methods run as a single np.convolve over the column
+        (app.services.indicators.wma) - no per-row df.loc lookups.
+        
         FORMULA:
         WMA = (Close[0] × w[0] + Close[1] × w[1] + ... + Close[n-1] × w[n-1]) / sum(w)
         where w = [weight_0, weight_1, ..., weight_n-1]
@@ -587,11 +509,8 @@ class TechnicalIndicatorsService:
         ALGORITHM BREAKDOWN (Custom Weights Method):
         1. Validate period >= 1
         2. Calculate or validate weights (must sum to ~1.0)
-        3. For each candle i >= period:
-            a. Multiply each close price by corresponding weight
-            b. Sum all weighted prices
-            c. Store in WMA column
-        4. First (period-1) values are None (insufficient data)
+        3. Convolve the column with the weights (weights[0] on the current candle)
+        4. First (period-1) values are NaN (insufficient data)
         
         TRADING SIGNAL INTERPRETATION:
         - Same as SMA/EMA but responds faster to recent price changes
@@ -625,39 +544,54 @@ class TechnicalIndicatorsService:
         """
         df = ohlc_df.copy()
         
-        # Set default linear weights if not provided
-        if weights is None:
-            # Linear decreasing weights: [period, period-1, ..., 1]
-            weights = [float(period - i) for i in range(period)]
-            # Normalize weights to sum to 1
-            weight_sum = sum(weights)
-            weights = [w / weight_sum for w in weights]
-        else:
-            # Validate provided weights
-            if len(weights) != period:
-                raise ValueError(f"Weights length ({len(weights)}) must equal period ({period})")
-            # Normalize if they don't sum to 1
-            weight_sum = sum(weights)
-            if abs(weight_sum - 1.0) > 0.001:  # Allow small floating point error
-                weights = [w / weight_sum for w in weights]
-        
-        # Calculate WMA
-        wma_values = []
-        for i in range(len(df)):
-            if i >= period - 1:
-                # Calculate weighted average: most recent price has highest weight
-                wma_value = 0.0
-                for j in range(period):
-                    wma_value += df.loc[i - j, column] * weights[j]
-                wma_values.append(wma_value)
-            else:
-                wma_values.append(None)
-        
-        df['WMA'] = wma_values
+        # Validation, default linear weights and normalisation live in ind.wma()
+        df['WMA'] = ind.wma(df[column], period=period, weights=weights)
         
         logger.info(f"WMA calculated with period {period} on column {column}")
         return df
     
+    TREND_METHODS = ("advanced", "simple", "rolling")
+    
+    @staticmethod
+    def trend_series(ohlc_df: pd.DataFrame, method: str = "advanced",
+                     period: int = 7, threshold: float = 0.7) -> pd.Series:
+        """
+        Trend label at EVERY candle in one vectorised pass
+        
+        Same rules as detect_trend_advanced / detect_trend_simple /
+        detect_trend_rolling, evaluated for each bar from shifted array
+        comparisons (and rolling counts for 'rolling') instead of scalar
+        lookups on the last candle only - for chart overlays and backtests.
+        
+        Args:
+            ohlc_df: DataFrame with OHLC data
+            method: 'advanced' (5-candle), 'simple' (3-candle) or 'rolling'
+            period: Rolling window ('rolling' only)
+            threshold: Share of the window that must agree ('rolling' only)
+        
+        Returns:
+            pd.Series (object dtype, same index as ohlc_df) of
+            'Uptrend', 'Downtrend' or None
+        
+        Example:
+            >>> df = fetchOHLC2("NSE:SBIN-EQ", "15", 5)
+            >>> trends = TechnicalIndicatorsService.trend_series(df, method="simple")
+            >>> trends.value_counts()
+        """
+        columns = (ohlc_df['Open'], ohlc_df['High'], ohlc_df['Low'], ohlc_df['Close'])
+        
+        if method == "advanced":
+            codes = ind.trend_advanced(*columns)
+        elif method == "simple":
+            codes = ind.trend_simple(*columns)
+        elif method == "rolling":
+            codes = ind.trend_rolling(*columns, period=period, threshold=threshold)
+        else:
+            raise ValueError(f"Unknown trend method '{method}'. "
+                             f"Available: {', '.join(TechnicalIndicatorsService.TREND_METHODS)}")
+        
+        return pd.Series(ind.trend_labels(codes), index=ohlc_df.index, dtype=object, name='Trend')
+    
     @staticmethod
     def detect_trend_advanced(ohlc_df: pd.DataFrame) -> Optional[str]:
         """
@@ -693,54 +627,16 @@ class TechnicalIndicatorsService:
             return None
         
         try:
-            df = ohlc_df.copy()
-            i = len(df) - 1
-            
-            # Uptrend condition (5 criteria)
-            # Last 3 candles bullish with ascending highs/lows
-            if (df.loc[i, 'Close'] > df.loc[i, 'Open'] and
-                df.loc[i-1, 'Close'] > df.loc[i-1, 'Open'] and
-                df.loc[i-2, 'Close'] > df.loc[i-2, 'Open'] and
-                df.loc[i, 'High'] > df.loc[i-1, 'High'] and
-                df.loc[i-1, 'High'] > df.loc[i-2, 'High'] and
-                df.loc[i, 'Low'] > df.loc[i-1, 'Low'] and
-                df.loc[i-1, 'Low'] > df.loc[i-2, 'Low'] and
-                df.loc[i-3, 'Close'] < df.loc[i-3, 'Open'] and
-                df.loc[i-4, 'Close'] < df.loc[i-4, 'Open'] and
-                df.loc[i-2, 'High'] < df.loc[i-3, 'High'] and
-                df.loc[i-3, 'High'] < df.loc[i-4, 'High'] and
-                df.loc[i-2, 'Low'] < df.loc[i-3, 'Low'] and
-                df.loc[i-3, 'Low'] < df.loc[i-4, 'Low']):
-                trend = 'Uptrend'
-                logger.info(f"Advanced uptrend detected with 5-candle confirmation")
-                return trend
-            
-            # Downtrend condition (5 criteria)
-            # Last 3 candles bearish with descending highs/lows
-            elif (df.loc[i, 'Close'] < df.loc[i, 'Open'] and
-                  df.loc[i-1, 'Close'] < df.loc[i-1, 'Open'] and
-                  df.loc[i-2, 'Close'] < df.loc[i-2, 'Open'] and
-                  df.loc[i, 'High'] < df.loc[i-1, 'High'] and
-                  df.loc[i-1, 'High'] < df.loc[i-2, 'High'] and
-                  df.loc[i, 'Low'] < df.loc[i-1, 'Low'] and
-                  df.loc[i-1, 'Low'] < df.loc[i-2, 'Low'] and
-                  df.loc[i-3, 'Close'] > df.loc[i-3, 'Open'] and
-                  df.loc[i-4, 'Close'] > df.loc[i-4, 'Open'] and
-                  df.loc[i-2, 'High'] > df.loc[i-3, 'High'] and
-                  df.loc[i-3, 'High'] > df.loc[i-4, 'High'] and
-                  df.loc[i-2, 'Low'] > df.loc[i-3, 'Low'] and
-                  df.loc[i-3, 'Low'] > df.loc[i-4, 'Low']):
-                trend = 'Downtrend'
-                logger.info(f"Advanced downtrend detected with 5-candle confirmation")
-                return trend
-            
-            else:
-                logger.info("No advanced trend pattern detected")
-                return None
-        
-        except (KeyError, IndexError) as e:
+            trend = TechnicalIndicatorsService.trend_series(ohlc_df, method="advanced").iloc[-1]
+        except KeyError as e:
             logger.error(f"Error detecting advanced trend: {e}")
             return None
+        
+        if trend:
+            logger.info(f"Advanced {trend.lower()} detected with 5-candle confirmation")
+        else:
+            logger.info("No advanced trend pattern detected")
+        return trend
     
     @staticmethod
     def detect_trend_simple(ohlc_df: pd.DataFrame) -> Optional[str]:
@@ -774,42 +670,16 @@ class TechnicalIndicatorsService:
             return None
         
         try:
-            df = ohlc_df.copy()
-            i = len(df) - 1
-            
-            # Uptrend condition
-            # Last 3 candles bullish with ascending highs and lows
-            if (df.loc[i, 'Close'] > df.loc[i, 'Open'] and
-                df.loc[i-1, 'Close'] > df.loc[i-1, 'Open'] and
-                df.loc[i-2, 'Close'] > df.loc[i-2, 'Open'] and
-                df.loc[i, 'High'] > df.loc[i-1, 'High'] and
-                df.loc[i-1, 'High'] > df.loc[i-2, 'High'] and
-                df.loc[i, 'Low'] > df.loc[i-1, 'Low'] and
-                df.loc[i-1, 'Low'] > df.loc[i-2, 'Low']):
-                trend = 'Uptrend'
-                logger.info(f"Simple uptrend detected (3-candle confirmation)")
-                return trend
-            
-            # Downtrend condition
-            # Last 3 candles bearish with descending highs and lows
-            elif (df.loc[i, 'Close'] < df.loc[i, 'Open'] and
-                  df.loc[i-1, 'Close'] < df.loc[i-1, 'Open'] and
-                  df.loc[i-2, 'Close'] < df.loc[i-2, 'Open'] and
-                  df.loc[i, 'High'] < df.loc[i-1, 'High'] and
-                  df.loc[i-1, 'High'] < df.loc[i-2, 'High'] and
-                  df.loc[i, 'Low'] < df.loc[i-1, 'Low'] and
-                  df.loc[i-1, 'Low'] < df.loc[i-2, 'Low']):
-                trend = 'Downtrend'
-                logger.info(f"Simple downtrend detected (3-candle confirmation)")
-                return trend
-            
-            else:
-                logger.info("No simple trend pattern detected")
-                return None
-        
-        except (KeyError, IndexError) as e:
+            trend = TechnicalIndicatorsService.trend_series(ohlc_df, method="simple").iloc[-1]
+        except KeyError as e:
             logger.error(f"Error detecting simple trend: {e}")
             return None
+        
+        if trend:
+            logger.info(f"Simple {trend.lower()} detected (3-candle confirmation)")
+        else:
+            logger.info("No simple trend pattern detected")
+        return trend
     
     @staticmethod
     def detect_trend_rolling(ohlc_df: pd.DataFrame, period: int = 7, threshold: float = 0.7) -> Optional[str]:
@@ -846,36 +716,18 @@ class TechnicalIndicatorsService:
             return None
         
         try:
-            df = ohlc_df.copy()
-            
-            # Calculate rolling comparisons
-            df["up"] = (df["Low"] >= df["Low"].shift(1)).astype(int)
-            df["dn"] = (df["High"] <= df["High"].shift(1)).astype(int)
-            
-            # Get last N candles
-            up_count = df["up"].iloc[-period:].sum()
-            dn_count = df["dn"].iloc[-period:].sum()
-            
-            current_close = df["Close"].iloc[-1]
-            current_open = df["Open"].iloc[-1]
-            
-            # Uptrend: consistent higher lows + current candle bullish
-            if (up_count / period) >= threshold and current_close > current_open:
-                logger.info(f"Rolling uptrend detected ({up_count}/{period} candles, {(up_count/period)*100:.1f}%)")
-                return "Uptrend"
-            
-            # Downtrend: consistent lower highs + current candle bearish
-            elif (dn_count / period) >= threshold and current_close < current_open:
-                logger.info(f"Rolling downtrend detected ({dn_count}/{period} candles, {(dn_count/period)*100:.1f}%)")
-                return "Downtrend"
-            
-            else:
-                logger.info("No rolling trend pattern detected")
-                return None
-        
-        except (KeyError, IndexError) as e:
+            trend = TechnicalIndicatorsService.trend_series(
+                ohlc_df, method="rolling", period=period, threshold=threshold
+            ).iloc[-1]
+        except KeyError as e:
             logger.error(f"Error detecting rolling trend: {e}")
             return None
+        
+        if trend:
+            logger.info(f"Rolling {trend.lower()} detected over {period} candles")
+        else:
+            logger.info("No rolling trend pattern detected")
+        return trend
     
     @staticmethod
     def get_resistance_support(ohlc_intraday: pd.DataFrame, ohlc_daily: pd.DataFrame) -> Dict[str, float]:
@@ -886,11 +738,16 @@ class TechnicalIndicatorsService:
         levels relative to current intraday price.
         
         ALGORITHM:
-        1. Calculate daily pivot points (P, R1, R2, R3, S1, S2, S3)
+        1. Calculate pivot points (P, R1, R2, R3, S1, S2, S3) from the
+           previous completed daily candle
         2. Get current close price from intraday data
         3. Find closest level above current price (resistance)
         4. Find closest level below current price (support)
         
+        The endpoint reads the pivots from the per-day pivot store instead;
+        this is the self-contained variant for callers that already hold
+        daily data.
+        
         Args:
             ohlc_intraday: Intraday OHLC DataFrame (for current price)
             ohlc_daily: Daily OHLC DataFrame (for pivot calculation)
@@ -899,87 +756,63 @@ class TechnicalIndicatorsService:
             Dict with keys:
             - 'current_price': Current close price
             - 'pivot': Pivot point
-            - 'resistance': Nearest resistance level above price
-            - 'support': Nearest support level below price
+            - 'nearest_resistance' / 'nearest_resistance_label': Closest level above price
+            - 'nearest_support' / 'nearest_support_label': Closest level below price
             - 'r1', 'r2', 'r3', 's1', 's2', 's3': All pivot levels
         
         Example:
             >>> intraday_df = fetchOHLC2("NSE:SBIN-EQ", "15", 5)
             >>> daily_df = fetchOHLC2("NSE:SBIN-EQ", "D", 30)
             >>> levels = TechnicalIndicatorsService.get_resistance_support(intraday_df, daily_df)
-            >>> print(f"Resistance: {levels['resistance']}, Support: {levels['support']}")
+            >>> print(f"Resistance: {levels['nearest_resistance']}, Support: {levels['nearest_support']}")
         """
         if len(ohlc_intraday) == 0 or len(ohlc_daily) == 0:
             logger.warning("Insufficient data for resistance/support calculation")
             return {}
         
         try:
-            # Get previous day's OHLC for pivot calculation
-            high = round(float(ohlc_daily["High"].iloc[-2]), 2)
-            low = round(float(ohlc_daily["Low"].iloc[-2]), 2)
-            close = round(float(ohlc_daily["Close"].iloc[-2]), 2)
-            
-            # Calculate pivot points
-            pivot = round((high + low + close) / 3, 2)
-            r1 = round((2 * pivot - low), 2)
-            r2 = round((pivot + (high - low)), 2)
-            r3 = round((high + 2 * (pivot - low)), 2)
-            s1 = round((2 * pivot - high), 2)
-            s2 = round((pivot - (high - low)), 2)
-            s3 = round((low - 2 * (high - pivot)), 2)
-            
-            # Current price
-            current_price = round(float(ohlc_intraday["Close"].iloc[-1]), 2)
-            
-            # Create dictionary of levels
-            levels_dict = {
-                'p': pivot,
-                'r1': r1,
-                'r2': r2,
-                'r3': r3,
-                's1': s1,
-                's2': s2,
-                's3': s3
-            }
-            
-            # Find closest level above current price (resistance)
-            closest_above = float('inf')
-            closest_above_label = None
-            for label, value in levels_dict.items():
-                if value > current_price and (value - current_price) < closest_above:
-                    closest_above = value - current_price
-                    closest_above_label = label
-            
-            # Find closest level below current price (support)
-            closest_below = float('-inf')
-            closest_below_label = None
-            for label, value in levels_dict.items():
-                if value < current_price and (current_price - value) > closest_below:
-                    closest_below = current_price - value
-                    closest_below_label = label
-            
-            result = {
-                "current_price": current_price,
-                "pivot": pivot,
-                "r1": r1,
-                "r2": r2,
-                "r3": r3,
-                "s1": s1,
-                "s2": s2,
-                "s3": s3,
-                "nearest_resistance": levels_dict.get(closest_above_label, None),
-                "nearest_resistance_label": closest_above_label,
-                "nearest_support": levels_dict.get(closest_below_label, None),
-                "nearest_support_label": closest_below_label
-            }
+            session = trading_day()
+            row = previous_session(ohlc_daily, session)
+            if row is None:
+                logger.warning("No completed daily candle for pivot calculation")
+                return {}
             
-            logger.info(f"Resistance/Support: Current={current_price}, R={result['nearest_resistance']}, S={result['nearest_support']}")
-            return result
+            table = ind.pivot_table([row["High"]], [row["Low"]], [row["Close"]])
+            pivots = SessionPivots("", session, None, table[0])
+            return TechnicalIndicatorsService.resistance_support_from_pivots(
+                float(ohlc_intraday["Close"].iloc[-1]), pivots)
         
         except (KeyError, IndexError, ValueError) as e:
             logger.error(f"Error calculating resistance/support: {e}")
             return {}
     
+    @staticmethod
+    def resistance_support_from_pivots(price: float, pivots: SessionPivots) -> Dict[str, float]:
+        """
+        Nearest resistance/support to price among precomputed pivot levels
+        
+        Levels are kept sorted, so both lookups are a bisect.
+        
+        Returns:
+            Same dict as get_resistance_support()
+        """
+        current_price = round(float(price), 2)
+        levels = pivots.levels
+        result = {
+            "current_price": current_price,
+            "pivot": levels["pivot"],
+            "r1": levels["r1"],
+            "r2": levels["r2"],
+            "r3": levels["r3"],
+            "s1": levels["s1"],
+            "s2": levels["s2"],
+            "s3": levels["s3"],
+            **pivots.nearest(current_price)
+        }
+        
+        logger.info(f"Resistance/Support: Current={current_price}, R={result['nearest_resistance']}, S={result['nearest_support']}")
+        return result
+    
     @staticmethod
     def detect_candle_pattern_advanced(ohlc_intraday: pd.DataFrame, ohlc_daily: pd.DataFrame, 
                                        period: int = 7) -> Dict[str, Any]:
@@ -1253,18 +1086,10 @@ class TechnicalIndicatorsService:
         """
         df = ohlc_df.copy()
         
-        # Calculate rolling high and low
-        highest_high = df['High'].rolling(window=period).max()
-        lowest_low = df['Low'].rolling(window=period).min()
-        
-        # Calculate K% (Stochastic Oscillator)
-        k_percent = ((df['Close'] - lowest_low) * 100 / (highest_high - lowest_low))
-        
-        # Calculate D% (3-period SMA of K%)
-        d_percent = k_percent.rolling(window=3).mean()
-        
-        df['K'] = k_percent
-        df['D'] = d_percent
+        # Method 2 (rolling extremes) - app.services.indicators.stochastic
+        stoch = ind.stochastic(df['High'], df['Low'], df['Close'], period=period)
+        df['K'] = stoch['k']
+        df['D'] = stoch['d']
         
         logger.info(f"Stochastic calculated with period {period}")
         return df
@@ -1296,10 +1121,12 @@ class TechnicalIndicatorsService:
             - Use Case: Production, real-time (RECOMMENDED)
             - Performance: 100-200x faster than Method 1
         
-        METHOD 3 (VECTORIZED - Not yet implemented):
-            Uses numpy operations for maximum speed
+        METHOD 3 (ARRAY KERNEL - CURRENT):
+            ATR/bands as in Method 2, computed by the shared
+            app.services.indicators.supertrend() over contiguous float64
+            arrays (no per-row df.loc reads/writes)
             - Time Complexity: O(n)
-            - Use Case: Ultra-high-frequency applications
+            - Use Case: Production, long intraday histories
         
         FORMULA:
         1. ATR = EWM(True Range, period)
@@ -1354,79 +1181,190 @@ class TechnicalIndicatorsService:
         """
         df = ohlc_df.copy()
         
-        # Calculate True Range components
-        df['HL'] = df['High'] - df['Low']
-        df['HC'] = abs(df['High'] - df['Close'].shift(1))
-        df['LC'] = abs(df['Low'] - df['Close'].shift(1))
-        df['TR'] = df[['HL', 'HC', 'LC']].max(axis=1)
-        
-        # Calculate ATR using EWM (Exponential Weighted Mean) - More efficient than SMA
-        df['ATR'] = df['TR'].ewm(com=period, min_periods=period).mean()
-        
-        # Calculate basic bands
-        df['HL2'] = (df['High'] + df['Low']) / 2
-        df['BasicUpper'] = df['HL2'] + multiplier * df['ATR']
-        df['BasicLower'] = df['HL2'] - multiplier * df['ATR']
-        
-        # Initialize final bands and supertrend
-        df['FinalUpper'] = df['BasicUpper']
-        df['FinalLower'] = df['BasicLower']
-        df['Strend'] = np.nan
-        df['Trend'] = 0
-        
-        # Calculate FinalUpper and FinalLower bands (prevents whipsaws)
-        for i in range(period, len(df)):
-            if i == period:
-                df.loc[i, 'FinalUpper'] = df.loc[i, 'BasicUpper']
-                df.loc[i, 'FinalLower'] = df.loc[i, 'BasicLower']
-            else:
-                # FinalUpper cannot be higher than BasicUpper if Close was below it
-                if df.loc[i-1, 'Close'] <= df.loc[i-1, 'FinalUpper']:
-                    df.loc[i, 'FinalUpper'] = min(df.loc[i, 'BasicUpper'], df.loc[i-1, 'FinalUpper'])
-                else:
-                    df.loc[i, 'FinalUpper'] = df.loc[i, 'BasicUpper']
-                
-                # FinalLower cannot be lower than BasicLower if Close was above it
-                if df.loc[i-1, 'Close'] >= df.loc[i-1, 'FinalLower']:
-                    df.loc[i, 'FinalLower'] = max(df.loc[i, 'BasicLower'], df.loc[i-1, 'FinalLower'])
-                else:
-                    df.loc[i, 'FinalLower'] = df.loc[i, 'BasicLower']
-        
-        # Calculate Supertrend and Trend
-        for i in range(period, len(df)):
-            if i == period:
-                # Initial supertrend assignment
-                if df.loc[i, 'Close'] < df.loc[i, 'FinalUpper']:
-                    df.loc[i, 'Strend'] = df.loc[i, 'FinalUpper']
-                    df.loc[i, 'Trend'] = -1
-                else:
-                    df.loc[i, 'Strend'] = df.loc[i, 'FinalLower']
-                    df.loc[i, 'Trend'] = 1
-            else:
-                # Supertrend transitions
-                if df.loc[i-1, 'Strend'] == df.loc[i-1, 'FinalUpper']:
-                    # Was on upper band (downtrend)
-                    if df.loc[i, 'Close'] <= df.loc[i, 'FinalUpper']:
-                        df.loc[i, 'Strend'] = df.loc[i, 'FinalUpper']
-                        df.loc[i, 'Trend'] = -1
-                    else:
-                        df.loc[i, 'Strend'] = df.loc[i, 'FinalLower']
-                        df.loc[i, 'Trend'] = 1
-                elif df.loc[i-1, 'Strend'] == df.loc[i-1, 'FinalLower']:
-                    # Was on lower band (uptrend)
-                    if df.loc[i, 'Close'] >= df.loc[i, 'FinalLower']:
-                        df.loc[i, 'Strend'] = df.loc[i, 'FinalLower']
-                        df.loc[i, 'Trend'] = 1
-                    else:
-                        df.loc[i, 'Strend'] = df.loc[i, 'FinalUpper']
-                        df.loc[i, 'Trend'] = -1
+        st = ind.supertrend(df['High'], df['Low'], df['Close'], period=period, multiplier=multiplier,
+                            outputs=ind.SUPERTREND_OUTPUTS)
+        df['ATR'] = st['atr']
+        df['BasicUpper'] = st['basic_upper']
+        df['BasicLower'] = st['basic_lower']
+        df['FinalUpper'] = st['final_upper']
+        df['FinalLower'] = st['final_lower']
+        df['Strend'] = st['supertrend']
+        df['Trend'] = st['trend']
         
         logger.info(f"Supertrend calculated with period {period}, multiplier {multiplier}")
         return df
 
+    @staticmethod
+    def calculate_batch(ohlc_df: pd.DataFrame, specs: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Calculate several indicators over one OHLC frame in a single pass
+        
+        All indicators share one IndicatorBatch, so the True Range is computed
+        once and repeated specs are reused (no per-indicator df.copy()).
+        Results are the same as the individual calculate_* methods, except
+        that Bollinger rows are kept (NaN warm-up) so every series stays
+        aligned with the candles.
+        
+        Args:
+            ohlc_df: DataFrame with OHLC data
+            specs: [{"name": "rsi", "params": {"period": 14}, "id": "rsi14"}, ...]
+        
+        Returns:
+            {id: {"name", "params", "columns": {column: pd.Series}}} or
+            {id: {"name", "params", "error": message}} for a failed spec
+        """
+        batch = IndicatorBatch(ohlc_df)
+        results = {}
+        
+        for spec in specs:
+            name = spec["name"].lower()
+            params = dict(spec.get("params") or {})
+            key = spec.get("id") or IndicatorBatch.make_key(name, params)
+            
+            try:
+                columns = batch.calculate(name, **params)
+                results[key] = {"name": name, "params": params, "columns": columns}
+            except Exception as e:
+                logger.error(f"Batch indicator {key} failed: {e}")
+                results[key] = {"name": name, "params": params, "error": str(e)}
+        
+        logger.info(f"Batch calculated {len(specs)} indicators over {len(ohlc_df)} candles")
+        return results
+
+
+# ============================================================================
+# Batch Calculation (shared intermediates)
+# ============================================================================
+
+
+class IndicatorBatch:
+    """
+    Memoised indicator results for one OHLC frame
+    
+    Every indicator comes from the shared library (app.services.indicators);
+    the batch only adds memoisation of the intermediates several indicators
+    share - True Range (ATR / ADX / Supertrend), the close delta (RSI and
+    Wilder RSI), close EMAs (MACD specs with a common span, EMA) and close
+    SMAs (Bollinger middle band, SMA) - and repeated specs with the same
+    parameters reuse the first result.
+    """
+    
+    def __init__(self, ohlc_df: pd.DataFrame):
+        self.df = ohlc_df
+        self.high = ohlc_df['High'].to_numpy(dtype=np.float64)
+        self.low = ohlc_df['Low'].to_numpy(dtype=np.float64)
+        self.close = ohlc_df['Close'].to_numpy(dtype=np.float64)
+        self._memo: Dict[Any, Any] = {}
+    
+    @staticmethod
+    def make_key(name: str, params: Dict[str, Any]) -> str:
+        """Default response key, e.g. 'ema:period=20'"""
+        if not params:
+            return name
+        return name + ":" + ",".join(f"{k}={params[k]}" for k in sorted(params))
+    
+    def _cached(self, key, build):
+        if key not in self._memo:
+            self._memo[key] = build()
+        return self._memo[key]
+    
+    def true_range(self, skipna: bool = False) -> np.ndarray:
+        """
+        True Range
+        skipna=False: NaN on the first candle (ATR/ADX convention)
+        skipna=True: High-Low on the first candle (Supertrend convention)
+        """
+        return self._cached(('tr', skipna), lambda: ind.true_range(self.high, self.low, self.close, skipna=skipna))
+    
+    def close_delta(self) -> np.ndarray:
+        """Bar-to-bar close change (first bar 0)"""
+        return self._cached('delta', lambda: ind.close_delta(self.close))
+    
+    def close_ema(self, period: int, min_periods: int = 0) -> np.ndarray:
+        """Close ewm(span=period, min_periods=min_periods)"""
+        return self._cached(('close_ema', period, min_periods), lambda: ind.ema(self.close, period, min_periods=min_periods))
+    
+    def close_sma(self, period: int) -> np.ndarray:
+        """Close rolling(period).mean()"""
+        return self._cached(('close_sma', period), lambda: ind.sma(self.close, period))
+    
+    def _series(self, columns: Dict[str, np.ndarray]) -> Dict[str, pd.Series]:
+        return {name: pd.Series(values, index=self.df.index) for name, values in columns.items()}
+    
+    # ----- indicators -----
+    
+    def calculate(self, name: str, **params) -> Dict[str, pd.Series]:
+        """Calculate one indicator; returns {output column: Series}"""
+        method = getattr(self, f"_calc_{name}", None)
+        if method is None:
+            raise ValueError(f"Unknown indicator '{name}'. Available: {', '.join(self.available())}")
+        key = (name, json.dumps(params, sort_keys=True, default=str))
+        return self._cached(key, lambda: self._series(method(**params)))
+    
+    @classmethod
+    def available(cls) -> List[str]:
+        return sorted(attr[len('_calc_'):] for attr in dir(cls) if attr.startswith('_calc_'))
+    
+    def _calc_atr(self, period: int = 14):
+        return {'ATR': ind.atr(self.high, self.low, self.close, period=period, tr=self.true_range())}
+    
+    def _calc_atr_wilder(self, period: int = 14):
+        return {'ATR': ind.atr(self.high, self.low, self.close, period=period, wilder=True,
+                               tr=self.true_range())}
+    
+    def _calc_adx(self, period: int = 14):
+        adx = ind.adx(self.high, self.low, self.close, period=period, tr=self.true_range())
+        return {'ADX': adx['adx'], 'DI+': adx['di_plus'], 'DI-': adx['di_minus']}
+    
+    def _calc_rsi(self, period: int = 14):
+        return {'RSI': ind.rsi(self.close, period=period, delta=self.close_delta())}
+    
+    def _calc_rsi_wilder(self, period: int = 14):
+        return {'RSI': ind.rsi(self.close, period=period, wilder=True, delta=self.close_delta())}
+    
+    def _calc_macd(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        macd = ind.macd(self.close, fast=fast, slow=slow, signal=signal,
+                        fast_ma=self.close_ema(fast, fast), slow_ma=self.close_ema(slow, slow))
+        return {'MACD': macd['macd'], 'Signal': macd['signal'], 'MACD_Histogram': macd['histogram']}
+    
+    def _calc_bollinger(self, period: int = 20, std_dev: float = 2.0):
+        bands = ind.bollinger_bands(self.close, period=period, std_dev=std_dev, ma=self.close_sma(period))
+        return {'MA': bands['ma'], 'BB_up': bands['upper'], 'BB_dn': bands['lower'], 'BB_width': bands['width']}
+    
+    def _calc_ema(self, period: int = 14, column: str = 'Close'):
+        if column == 'Close':
+            return {'EMA': self.close_ema(period)}
+        return {'EMA': ind.ema(self.df[column], period=period)}
+    
+    def _calc_sma(self, period: int = 20, column: str = 'Close'):
+        if column == 'Close':
+            return {'SMA': self.close_sma(period)}
+        return {'SMA': ind.sma(self.df[column], period=period)}
+    
+    def _calc_wma(self, period: int = 4, weights: Optional[List[float]] = None, column: str = 'Close'):
+        return {'WMA': ind.wma(self.df[column], period=period, weights=weights)}
+    
+    def _calc_stochastic(self, period: int = 14):
+        stoch = ind.stochastic(self.high, self.low, self.close, period=period)
+        return {'K': stoch['k'], 'D': stoch['d']}
+    
+    def _calc_supertrend(self, period: int = 7, multiplier: float = 3.0):
+        st = ind.supertrend(self.high, self.low, self.close, period=period, multiplier=multiplier,
+                            outputs=("supertrend", "trend", "final_upper", "final_lower", "atr"),
+                            tr=self.true_range(skipna=True))
+        return {
+            'Strend': st['supertrend'],
+            'Trend': st['trend'],
+            'FinalUpper': st['final_upper'],
+            'FinalLower': st['final_lower'],
+            'ATR': st['atr']
+        }
+
 
 # Initialize service
 indicators_service = TechnicalIndicatorsService()
+watchlist_scanner = WatchlistScanner(indicators_service)
+pivot_store = PivotStore(indicators_service.fetch_ohlc, rate_limiter=watchlist_scanner.rate_limiter)
 
 
 # ============================================================================
@@ -1434,7 +1372,18 @@ indicators_service = TechnicalIndicatorsService()
 # ============================================================================
 
 
+def _defined(values: np.ndarray) -> list:
+    """Array -> list without the NaN warm-up values (like Series.dropna().tolist())"""
+    return values[~np.isnan(values)].tolist()
+
+
+def _last(values: np.ndarray) -> Optional[float]:
+    """Last array value as float, None when NaN"""
+    return float(values[-1]) if len(values) and pd.notna(values[-1]) else None
+
+
 @router.post("/calculate-atr")
+@cached_indicator(indicator_cache, "atr")
 async def calculate_atr_endpoint(request: IndicatorRequest):
     """
     Calculate Average True Range (ATR)
@@ -1454,10 +1403,10 @@ async def calculate_atr_endpoint(request: IndicatorRequest):
         if df is None or len(df) == 0:
             return {"status": "error", "message": "Failed to fetch data"}
         
-        df = indicators_service.calculate_atr(df)
+        atr = ind.atr(df['High'], df['Low'], df['Close'])
         
-        atr_values = df['ATR'].dropna().tolist()
-        current_atr = float(df['ATR'].iloc[-1]) if pd.notna(df['ATR'].iloc[-1]) else None
+        atr_values = _defined(atr)
+        current_atr = _last(atr)
         
         return {
             "status": "success",
@@ -1476,6 +1425,7 @@ async def calculate_atr_endpoint(request: IndicatorRequest):
 
 
 @router.post("/calculate-adx")
+@cached_indicator(indicator_cache, "adx")
 async def calculate_adx_endpoint(request: IndicatorRequest):
     """
     Calculate Average Directional Index (ADX)
@@ -1498,12 +1448,12 @@ async def calculate_adx_endpoint(request: IndicatorRequest):
         if df is None or len(df) == 0:
             return {"status": "error", "message": "Failed to fetch data"}
         
-        df = indicators_service.calculate_adx(df)
+        adx = ind.adx(df['High'], df['Low'], df['Close'])
         
-        adx_values = df['ADX'].dropna().tolist()
-        current_adx = float(df['ADX'].iloc[-1]) if pd.notna(df['ADX'].iloc[-1]) else None
-        current_di_plus = float(df['DI+'].iloc[-1]) if pd.notna(df['DI+'].iloc[-1]) else None
-        current_di_minus = float(df['DI-'].iloc[-1]) if pd.notna(df['DI-'].iloc[-1]) else None
+        adx_values = _defined(adx['adx'])
+        current_adx = _last(adx['adx'])
+        current_di_plus = _last(adx['di_plus'])
+        current_di_minus = _last(adx['di_minus'])
         
         return {
             "status": "success",
@@ -1525,6 +1475,7 @@ async def calculate_adx_endpoint(request: IndicatorRequest):
 
 
 @router.post("/calculate-rsi")
+@cached_indicator(indicator_cache, "rsi")
 async def calculate_rsi_endpoint(request: IndicatorRequest):
     """
     Calculate Relative Strength Index (RSI)
@@ -1546,10 +1497,10 @@ async def calculate_rsi_endpoint(request: IndicatorRequest):
         if df is None or len(df) == 0:
             return {"status": "error", "message": "Failed to fetch data"}
         
-        df = indicators_service.calculate_rsi(df)
+        rsi = ind.rsi(df['Close'])
         
-        rsi_values = df['RSI'].dropna().tolist()
-        current_rsi = float(df['RSI'].iloc[-1]) if pd.notna(df['RSI'].iloc[-1]) else None
+        rsi_values = _defined(rsi)
+        current_rsi = _last(rsi)
         
         rsi_signal = "Oversold" if current_rsi and current_rsi < 30 else ("Overbought" if current_rsi and current_rsi > 70 else "Neutral")
         
@@ -1571,6 +1522,7 @@ async def calculate_rsi_endpoint(request: IndicatorRequest):
 
 
 @router.post("/calculate-macd")
+@cached_indicator(indicator_cache, "macd")
 async def calculate_macd_endpoint(request: IndicatorRequest):
     """
     Calculate MACD (Moving Average Convergence Divergence)
@@ -1590,11 +1542,11 @@ async def calculate_macd_endpoint(request: IndicatorRequest):
         if df is None or len(df) == 0:
             return {"status": "error", "message": "Failed to fetch data"}
         
-        df = indicators_service.calculate_macd(df)
+        macd = ind.macd(df['Close'])
         
-        current_macd = float(df['MACD'].iloc[-1]) if pd.notna(df['MACD'].iloc[-1]) else None
-        current_signal = float(df['Signal'].iloc[-1]) if pd.notna(df['Signal'].iloc[-1]) else None
-        current_histogram = float(df['MACD_Histogram'].iloc[-1]) if pd.notna(df['MACD_Histogram'].iloc[-1]) else None
+        current_macd = _last(macd['macd'])
+        current_signal = _last(macd['signal'])
+        current_histogram = _last(macd['histogram'])
         
         return {
             "status": "success",
@@ -1605,7 +1557,7 @@ async def calculate_macd_endpoint(request: IndicatorRequest):
                 "current_macd": current_macd,
                 "current_signal": current_signal,
                 "current_histogram": current_histogram,
-                "macd_values": df['MACD'].dropna().tolist()
+                "macd_values": _defined(macd['macd'])
             }
         }
     
@@ -1615,6 +1567,7 @@ async def calculate_macd_endpoint(request: IndicatorRequest):
 
 
 @router.post("/calculate-bollinger-bands")
+@cached_indicator(indicator_cache, "bollinger")
 async def calculate_bollinger_bands_endpoint(request: IndicatorRequest):
     """
     Calculate Bollinger Bands
@@ -1639,12 +1592,12 @@ async def calculate_bollinger_bands_endpoint(request: IndicatorRequest):
         if df is None or len(df) == 0:
             return {"status": "error", "message": "Failed to fetch data"}
         
-        df = indicators_service.calculate_bollinger_bands(df)
+        bands = ind.bollinger_bands(df['Close'])
         
         current_close = float(df['Close'].iloc[-1]) if pd.notna(df['Close'].iloc[-1]) else None
-        current_sma = float(df['SMA'].iloc[-1]) if pd.notna(df['SMA'].iloc[-1]) else None
-        current_upper = float(df['UpperBand'].iloc[-1]) if pd.notna(df['UpperBand'].iloc[-1]) else None
-        current_lower = float(df['LowerBand'].iloc[-1]) if pd.notna(df['LowerBand'].iloc[-1]) else None
+        current_sma = _last(bands['ma'])
+        current_upper = _last(bands['upper'])
+        current_lower = _last(bands['lower'])
         
         return {
             "status": "success",
@@ -1656,7 +1609,7 @@ async def calculate_bollinger_bands_endpoint(request: IndicatorRequest):
                 "sma": current_sma,
                 "upper_band": current_upper,
                 "lower_band": current_lower,
-                "bb_width": float(current_upper - current_lower) if (current_upper and current_lower) else None
+                "bb_width": _last(bands['width'])
             }
         }
     
@@ -1666,6 +1619,7 @@ async def calculate_bollinger_bands_endpoint(request: IndicatorRequest):
 
 
 @router.post("/calculate-ema")
+@cached_indicator(indicator_cache, "ema")
 async def calculate_ema_endpoint(
     symbol: str = Query(...),
     resolution: str = Query("30"),
@@ -1688,10 +1642,10 @@ async def calculate_ema_endpoint(
         if df is None or len(df) == 0:
             return {"status": "error", "message": "Failed to fetch data"}
         
-        df = indicators_service.calculate_ema(df, period=period)
+        ema = ind.ema(df['Close'], period=period)
         
-        ema_values = df['EMA'].dropna().tolist()
-        current_ema = float(df['EMA'].iloc[-1]) if pd.notna(df['EMA'].iloc[-1]) else None
+        ema_values = _defined(ema)
+        current_ema = _last(ema)
         current_close = float(df['Close'].iloc[-1]) if pd.notna(df['Close'].iloc[-1]) else None
         
         return {
@@ -1713,6 +1667,7 @@ async def calculate_ema_endpoint(
 
 
 @router.post("/calculate-sma")
+@cached_indicator(indicator_cache, "sma")
 async def calculate_sma_endpoint(
     symbol: str = Query(...),
     resolution: str = Query("30"),
@@ -1735,10 +1690,10 @@ async def calculate_sma_endpoint(
         if df is None or len(df) == 0:
             return {"status": "error", "message": "Failed to fetch data"}
         
-        df = indicators_service.calculate_sma(df, period=period)
+        sma = ind.sma(df['Close'], period=period)
         
-        sma_values = df['SMA'].dropna().tolist()
-        current_sma = float(df['SMA'].iloc[-1]) if pd.notna(df['SMA'].iloc[-1]) else None
+        sma_values = _defined(sma)
+        current_sma = _last(sma)
         current_close = float(df['Close'].iloc[-1]) if pd.notna(df['Close'].iloc[-1]) else None
         
         return {
@@ -1759,295 +1714,60 @@ async def calculate_sma_endpoint(
         return {"status": "error", "message": str(e)}
 
 
-    @staticmethod
-    def calculate_stochastic(ohlc_df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
-        """
-        Calculate Stochastic Oscillator (K% and D%)
+
+@router.post("/calculate-wma")
+@cached_indicator(indicator_cache, "wma")
+async def calculate_wma_endpoint(
+    symbol: str = Query(...),
+    resolution: str = Query("30"),
+    duration: int = Query(5),
+    period: int = Query(4),
+    weights: Optional[str] = Query(None)
+):
+    """
+    Calculate Weighted Moving Average (WMA)
+    
+    WMA gives more weight to recent prices using custom or linear weights.
+    
+    Formula: WMA = sum(Close[i] * weight[i]) / sum(weights)
+    
+    Linear Default Weights (if not provided):
+    - Period 4: [0.40, 0.30, 0.20, 0.10]
+    - Period 5: [0.333, 0.267, 0.200, 0.133, 0.067]
+    
+    Custom Weights Example (as per Aseem):
+    - weights=[0.40,0.30,0.20,0.10] for period=4
+    
+    Example:
+    /calculate-wma?symbol=NSE:SBIN-EQ&resolution=30&duration=5&period=4
+    /calculate-wma?symbol=NSE:SBIN-EQ&period=4&weights=0.40,0.30,0.20,0.10
+    """
+    try:
+        df = indicators_service.fetch_ohlc(symbol, resolution, duration)
         
-        Stochastic Oscillator measures the momentum of price movement by comparing
-        closing price to the high-low range over a specified period.
+        if df is None or len(df) == 0:
+            return {"status": "error", "message": "Failed to fetch data"}
         
-        2 IMPLEMENTATION METHODS:
+        # Parse weights if provided
+        weights_list = None
+        if weights:
+            try:
+                weights_list = [float(w.strip()) for w in weights.split(',')]
+                if len(weights_list) != period:
+                    return {
+                        "status": "error",
+                        "message": f"Weights count ({len(weights_list)}) must equal period ({period})"
+                    }
+            except ValueError:
+                return {
+                    "status": "error",
+                    "message": "Weights must be comma-separated float values"
+                }
         
-        METHOD 1 (MANUAL LOOP - Used by Aseem):
-            for i in range(len(data)):
-                if i >= period:
-                    highest_high = max(data.loc[i-j, 'High'] for j in range(period))
-                    lowest_low = min(data.loc[i-j, 'Low'] for j in range(period))
-                    k_value = (Close - lowest_low) * 100 / (highest_high - lowest_low)
-                    K.append(k_value)
-                    if i >= period + 3:
-                        d_value = (K[i] + K[i-1] + K[i-2]) / 3
-            - Time Complexity: O(n × period)
-            - Use Case: Exact control, debugging
-            
-        METHOD 2 (PANDAS ROLLING - OPTIMIZED):
-            highest_high = df['High'].rolling(window=period).max()
-            lowest_low = df['Low'].rolling(window=period).min()
-            k_percent = (df['Close'] - lowest_low) * 100 / (highest_high - lowest_low)
-            d_percent = k_percent.rolling(window=3).mean()
-            - Time Complexity: O(n)
-            - Use Case: Production, real-time (RECOMMENDED)
-        
-        FORMULA:
-        K% = (Close - Lowest Low) * 100 / (Highest High - Lowest Low)
-        where:
-        - Close = Current candle's closing price
-        - Lowest Low = Minimum low over past 'period' candles
-        - Highest High = Maximum high over past 'period' candles
-        
-        D% = 3-period SMA of K%
-        
-        ALGORITHM BREAKDOWN (Method 2 - Pandas Rolling):
-        1. Find highest high over 'period' candles: rolling(period).max()
-        2. Find lowest low over 'period' candles: rolling(period).min()
-        3. Calculate K%: (Close - Lowest Low) / (Highest High - Lowest Low) * 100
-        4. Calculate D%: 3-period SMA of K%
-        
-        TRADING SIGNAL INTERPRETATION:
-        - Overbought: K% > 80 (potential reversal/pullback)
-        - Oversold: K% < 20 (potential bounce/reversal)
-        - Buy Signal: K% crosses above D% when K% < 30 (bullish)
-        - Sell Signal: K% crosses below D% when K% > 70 (bearish)
-        - K-D Divergence: Price makes new high but K% doesn't (bearish divergence)
-        
-        OUTPUT COLUMNS:
-        - K: Stochastic K% line (0-100 range)
-        - D: Stochastic D% line (3-period SMA of K) (0-100 range)
-        
-        Args:
-            ohlc_df: DataFrame with OHLC data
-            period: Lookback period for stochastic calculation (default 14)
-        
-        Returns:
-            DataFrame with 'K' and 'D' columns added
-        """
-        df = ohlc_df.copy()
-        
-        # Calculate rolling high and low
-        highest_high = df['High'].rolling(window=period).max()
-        lowest_low = df['Low'].rolling(window=period).min()
-        
-        # Calculate K% (Stochastic Oscillator)
-        k_percent = ((df['Close'] - lowest_low) * 100 / (highest_high - lowest_low))
-        
-        # Calculate D% (3-period SMA of K%)
-        d_percent = k_percent.rolling(window=3).mean()
-        
-        df['K'] = k_percent
-        df['D'] = d_percent
-        
-        logger.info(f"Stochastic calculated with period {period}")
-        return df
-
-    @staticmethod
-    def calculate_supertrend(ohlc_df: pd.DataFrame, period: int = 7, multiplier: float = 3.0) -> pd.DataFrame:
-        """
-        Calculate Supertrend Indicator
-        
-        Supertrend is a trend-following indicator that identifies trend direction and
-        provides dynamic support/resistance levels based on ATR (Average True Range).
-        
-        3 IMPLEMENTATION APPROACHES:
-        
-        METHOD 1 (MANUAL LOOP - Iterative calculation):
-            - Calculates ATR manually in each iteration
-            - Updates upper/lower bands iteratively
-            - Tracks trend transitions
-            - Time Complexity: O(n × period)
-            - Use Case: Debugging, educational
-            
-        METHOD 2 (OPTIMIZED WITH EWM ATR):
-            atr = (df['TR'].ewm(com=period, min_periods=period).mean())
-            BasicUpper = HL2 + multiplier * ATR
-            BasicLower = HL2 - multiplier * ATR
-            FinalUpper = min(BasicUpper, FinalUpper_prev) if Close_prev <= FinalUpper_prev else BasicUpper
-            FinalLower = max(BasicLower, FinalLower_prev) if Close_prev >= FinalLower_prev else BasicLower
-            - Time Complexity: O(n)
-            - Use Case: Production, real-time (RECOMMENDED)
-            - Performance: 100-200x faster than Method 1
-        
-        METHOD 3 (VECTORIZED - Not yet implemented):
-            Uses numpy operations for maximum speed
-            - Time Complexity: O(n)
-            - Use Case: Ultra-high-frequency applications
-        
-        FORMULA:
-        1. ATR = EWM(True Range, period)
-        2. HL2 = (High + Low) / 2
-        3. BasicUpper = HL2 + multiplier × ATR
-        4. BasicLower = HL2 - multiplier × ATR
-        5. FinalUpper = min(BasicUpper, FinalUpper[t-1]) if Close[t-1] <= FinalUpper[t-1] else BasicUpper
-        6. FinalLower = max(BasicLower, FinalLower[t-1]) if Close[t-1] >= FinalLower[t-1] else BasicLower
-        7. Supertrend = FinalUpper (in downtrend) or FinalLower (in uptrend)
-        
-        ALGORITHM BREAKDOWN (Method 2 - EWM ATR):
-        1. Calculate True Range: TR = max(H-L, abs(H-Cp), abs(L-Cp))
-        2. Calculate ATR using EWM: exponential weighted moving average
-        3. Calculate HL2: midpoint = (High + Low) / 2
-        4. Calculate BasicUpper: midpoint + multiplier × ATR
-        5. Calculate BasicLower: midpoint - multiplier × ATR
-        6. Calculate FinalUpper: prevents whipsaws by not letting upper band rise
-        7. Calculate FinalLower: prevents whipsaws by not letting lower band fall
-        8. Calculate Supertrend: switches between upper and lower based on close position
-        
-        TRADING SIGNAL INTERPRETATION:
-        - Uptrend: Close > Supertrend, Supertrend = FinalLower (green)
-        - Downtrend: Close < Supertrend, Supertrend = FinalUpper (red)
-        - Buy Signal: Price breaks above Supertrend (uptrend starts)
-        - Sell Signal: Price breaks below Supertrend (downtrend starts)
-        - Support Level: When in uptrend, Supertrend acts as dynamic support
-        - Resistance Level: When in downtrend, Supertrend acts as dynamic resistance
-        - Stop Loss: Place stop below Supertrend in uptrend, above in downtrend
-        
-        OUTPUT COLUMNS:
-        - ATR: Average True Range
-        - BasicUpper: Upper band before smoothing
-        - BasicLower: Lower band before smoothing
-        - FinalUpper: Final upper band (smoothed, prevents whipsaws)
-        - FinalLower: Final lower band (smoothed, prevents whipsaws)
-        - Strend: Supertrend line (main indicator output)
-        - Trend: Direction indicator (1 = uptrend, -1 = downtrend)
-        
-        Args:
-            ohlc_df: DataFrame with OHLC data
-            period: ATR period for calculation (default 7)
-            multiplier: Multiplier for ATR (default 3.0)
-        
-        Returns:
-            DataFrame with ATR, upper/lower bands, and Supertrend columns added
-            
-        Example:
-            >>> df = fetch_ohlc_data(ticker)
-            >>> df = calculate_supertrend(df, period=7, multiplier=3.0)
-            >>> uptrend = df[df['Trend'] == 1]
-            >>> print(uptrend[['Close', 'Strend']].tail())
-        """
-        df = ohlc_df.copy()
-        
-        # Calculate True Range components
-        df['HL'] = df['High'] - df['Low']
-        df['HC'] = abs(df['High'] - df['Close'].shift(1))
-        df['LC'] = abs(df['Low'] - df['Close'].shift(1))
-        df['TR'] = df[['HL', 'HC', 'LC']].max(axis=1)
-        
-        # Calculate ATR using EWM (Exponential Weighted Mean) - More efficient than SMA
-        df['ATR'] = df['TR'].ewm(com=period, min_periods=period).mean()
-        
-        # Calculate basic bands
-        df['HL2'] = (df['High'] + df['Low']) / 2
-        df['BasicUpper'] = df['HL2'] + multiplier * df['ATR']
-        df['BasicLower'] = df['HL2'] - multiplier * df['ATR']
-        
-        # Initialize final bands and supertrend
-        df['FinalUpper'] = df['BasicUpper']
-        df['FinalLower'] = df['BasicLower']
-        df['Strend'] = np.nan
-        df['Trend'] = 0
-        
-        # Calculate FinalUpper band (prevents upper band from rising)
-        for i in range(period, len(df)):
-            if i == period:
-                df.loc[i, 'FinalUpper'] = df.loc[i, 'BasicUpper']
-                df.loc[i, 'FinalLower'] = df.loc[i, 'BasicLower']
-            else:
-                # FinalUpper cannot be higher than BasicUpper if Close was below it
-                if df.loc[i-1, 'Close'] <= df.loc[i-1, 'FinalUpper']:
-                    df.loc[i, 'FinalUpper'] = min(df.loc[i, 'BasicUpper'], df.loc[i-1, 'FinalUpper'])
-                else:
-                    df.loc[i, 'FinalUpper'] = df.loc[i, 'BasicUpper']
-                
-                # FinalLower cannot be lower than BasicLower if Close was above it
-                if df.loc[i-1, 'Close'] >= df.loc[i-1, 'FinalLower']:
-                    df.loc[i, 'FinalLower'] = max(df.loc[i, 'BasicLower'], df.loc[i-1, 'FinalLower'])
-                else:
-                    df.loc[i, 'FinalLower'] = df.loc[i, 'BasicLower']
-        
-        # Calculate Supertrend and Trend
-        for i in range(period, len(df)):
-            if i == period:
-                # Initial supertrend assignment
-                if df.loc[i, 'Close'] < df.loc[i, 'FinalUpper']:
-                    df.loc[i, 'Strend'] = df.loc[i, 'FinalUpper']
-                    df.loc[i, 'Trend'] = -1
-                else:
-                    df.loc[i, 'Strend'] = df.loc[i, 'FinalLower']
-                    df.loc[i, 'Trend'] = 1
-            else:
-                # Supertrend transitions
-                if df.loc[i-1, 'Strend'] == df.loc[i-1, 'FinalUpper']:
-                    # Was on upper band (downtrend)
-                    if df.loc[i, 'Close'] <= df.loc[i, 'FinalUpper']:
-                        df.loc[i, 'Strend'] = df.loc[i, 'FinalUpper']
-                        df.loc[i, 'Trend'] = -1
-                    else:
-                        df.loc[i, 'Strend'] = df.loc[i, 'FinalLower']
-                        df.loc[i, 'Trend'] = 1
-                elif df.loc[i-1, 'Strend'] == df.loc[i-1, 'FinalLower']:
-                    # Was on lower band (uptrend)
-                    if df.loc[i, 'Close'] >= df.loc[i, 'FinalLower']:
-                        df.loc[i, 'Strend'] = df.loc[i, 'FinalLower']
-                        df.loc[i, 'Trend'] = 1
-                    else:
-                        df.loc[i, 'Strend'] = df.loc[i, 'FinalUpper']
-                        df.loc[i, 'Trend'] = -1
-        
-        logger.info(f"Supertrend calculated with period {period}, multiplier {multiplier}")
-        return df
-
-
-@router.post("/calculate-wma")
-async def calculate_wma_endpoint(
-    symbol: str = Query(...),
-    resolution: str = Query("30"),
-    duration: int = Query(5),
-    period: int = Query(4),
-    weights: Optional[str] = Query(None)
-):
-    """
-    Calculate Weighted Moving Average (WMA)
-    
-    WMA gives more weight to recent prices using custom or linear weights.
-    
-    Formula: WMA = sum(Close[i] * weight[i]) / sum(weights)
-    
-    Linear Default Weights (if not provided):
-    - Period 4: [0.40, 0.30, 0.20, 0.10]
-    - Period 5: [0.333, 0.267, 0.200, 0.133, 0.067]
-    
-    Custom Weights Example (as per Aseem):
-    - weights=[0.40,0.30,0.20,0.10] for period=4
-    
-    Example:
-    /calculate-wma?symbol=NSE:SBIN-EQ&resolution=30&duration=5&period=4
-    /calculate-wma?symbol=NSE:SBIN-EQ&period=4&weights=0.40,0.30,0.20,0.10
-    """
-    try:
-        df = indicators_service.fetch_ohlc(symbol, resolution, duration)
+        wma = ind.wma(df['Close'], period=period, weights=weights_list)
         
-        if df is None or len(df) == 0:
-            return {"status": "error", "message": "Failed to fetch data"}
-        
-        # Parse weights if provided
-        weights_list = None
-        if weights:
-            try:
-                weights_list = [float(w.strip()) for w in weights.split(',')]
-                if len(weights_list) != period:
-                    return {
-                        "status": "error",
-                        "message": f"Weights count ({len(weights_list)}) must equal period ({period})"
-                    }
-            except ValueError:
-                return {
-                    "status": "error",
-                    "message": "Weights must be comma-separated float values"
-                }
-        
-        df = indicators_service.calculate_wma(df, period=period, weights=weights_list)
-        
-        wma_values = df['WMA'].dropna().tolist()
-        current_wma = float(df['WMA'].iloc[-1]) if pd.notna(df['WMA'].iloc[-1]) else None
+        wma_values = _defined(wma)
+        current_wma = _last(wma)
         current_close = float(df['Close'].iloc[-1]) if pd.notna(df['Close'].iloc[-1]) else None
         
         return {
@@ -2070,6 +1790,7 @@ async def calculate_wma_endpoint(
 
 
 @router.get("/calculate-stochastic")
+@cached_indicator(indicator_cache, "stochastic")
 async def calculate_stochastic_endpoint(
     symbol: str = Query(...),
     resolution: str = Query("30"),
@@ -2097,12 +1818,12 @@ async def calculate_stochastic_endpoint(
         if df is None or len(df) == 0:
             return {"status": "error", "message": "Failed to fetch data"}
         
-        df = indicators_service.calculate_stochastic(df, period=period)
+        stoch = ind.stochastic(df['High'], df['Low'], df['Close'], period=period)
         
-        k_values = df['K'].dropna().tolist()
-        d_values = df['D'].dropna().tolist()
-        current_k = float(df['K'].iloc[-1]) if pd.notna(df['K'].iloc[-1]) else None
-        current_d = float(df['D'].iloc[-1]) if pd.notna(df['D'].iloc[-1]) else None
+        k_values = _defined(stoch['k'])
+        d_values = _defined(stoch['d'])
+        current_k = _last(stoch['k'])
+        current_d = _last(stoch['d'])
         current_close = float(df['Close'].iloc[-1]) if pd.notna(df['Close'].iloc[-1]) else None
         
         return {
@@ -2126,6 +1847,7 @@ async def calculate_stochastic_endpoint(
 
 
 @router.get("/calculate-supertrend")
+@cached_indicator(indicator_cache, "supertrend")
 async def calculate_supertrend_endpoint(
     symbol: str = Query(...),
     resolution: str = Query("30"),
@@ -2154,17 +1876,18 @@ async def calculate_supertrend_endpoint(
         if df is None or len(df) == 0:
             return {"status": "error", "message": "Failed to fetch data"}
         
-        df = indicators_service.calculate_supertrend(df, period=period, multiplier=multiplier)
+        st = ind.supertrend(df['High'], df['Low'], df['Close'], period=period, multiplier=multiplier,
+                            outputs=ind.SUPERTREND_OUTPUTS)
         
-        supertrend_values = df['Strend'].dropna().tolist()
-        upper_values = df['FinalUpper'].dropna().tolist()
-        lower_values = df['FinalLower'].dropna().tolist()
-        trend_values = df['Trend'].dropna().tolist()
+        supertrend_values = _defined(st['supertrend'])
+        upper_values = _defined(st['final_upper'])
+        lower_values = _defined(st['final_lower'])
+        trend_values = st['trend'].tolist()
         
-        current_supertrend = float(df['Strend'].iloc[-1]) if pd.notna(df['Strend'].iloc[-1]) else None
-        current_trend = int(df['Trend'].iloc[-1]) if pd.notna(df['Trend'].iloc[-1]) else None
+        current_supertrend = _last(st['supertrend'])
+        current_trend = int(st['trend'][-1])
         current_close = float(df['Close'].iloc[-1]) if pd.notna(df['Close'].iloc[-1]) else None
-        current_atr = float(df['ATR'].iloc[-1]) if pd.notna(df['ATR'].iloc[-1]) else None
+        current_atr = _last(st['atr'])
         
         return {
             "status": "success",
@@ -2190,6 +1913,157 @@ async def calculate_supertrend_endpoint(
         return {"status": "error", "message": str(e)}
 
 
+@router.post("/calculate-batch")
+@cached_indicator(indicator_cache, "batch")
+async def calculate_batch_endpoint(request: BatchIndicatorRequest):
+    """
+    Calculate several indicators with ONE OHLC fetch
+    
+    Intermediates shared between indicators (True Range, deltas, EWMs,
+    rolling highs/lows) are computed once. Series are aligned with
+    "timestamps" (warm-up values are null). A failing spec reports its own
+    error without failing the rest of the batch.
+    
+    Available indicators: atr, atr_wilder, adx, rsi, rsi_wilder, macd,
+    bollinger, ema, sma, wma, stochastic, supertrend
+    
+    Example request:
+    {
+        "symbol": "NSE:SBIN-EQ",
+        "resolution": "30",
+        "duration": 10,
+        "indicators": [
+            {"name": "atr"},
+            {"name": "rsi", "params": {"period": 14}},
+            {"name": "ema", "params": {"period": 20}, "id": "ema20"},
+            {"name": "supertrend", "params": {"period": 7, "multiplier": 3}}
+        ]
+    }
+    """
+    try:
+        if not request.indicators:
+            return {"status": "error", "message": "No indicators requested"}
+        
+        df = indicators_service.fetch_ohlc(request.symbol, request.resolution, request.duration)
+        
+        if df is None or len(df) == 0:
+            return {"status": "error", "message": "Failed to fetch data"}
+        
+        results = indicators_service.calculate_batch(df, [spec.model_dump() for spec in request.indicators])
+        
+        def to_list(series: pd.Series) -> list:
+            return series.astype(object).where(series.notna(), None).tolist()
+        
+        indicators = {}
+        for key, result in results.items():
+            if "error" in result:
+                indicators[key] = {"status": "error", "name": result["name"],
+                                   "params": result["params"], "message": result["error"]}
+                continue
+            
+            columns = result["columns"]
+            entry = {
+                "status": "success",
+                "name": result["name"],
+                "params": result["params"],
+                "current": {col: to_json_scalar(series.iloc[-1]) for col, series in columns.items()}
+            }
+            if request.include_series:
+                entry["values"] = {col: to_list(series) for col, series in columns.items()}
+            indicators[key] = entry
+        
+        data = {
+            "symbol": request.symbol,
+            "resolution": request.resolution,
+            "total_candles": len(df),
+            "current_close": float(df['Close'].iloc[-1]) if pd.notna(df['Close'].iloc[-1]) else None,
+            "indicators": indicators
+        }
+        if request.include_series and 'Timestamp' in df:
+            data["timestamps"] = [ts.isoformat() for ts in df['Timestamp']]
+        
+        return {"status": "success", "data": data}
+    
+    except Exception as e:
+        logger.error(f"Error calculating indicator batch: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+@router.post("/scan-watchlist")
+async def scan_watchlist_endpoint(request: WatchlistScanRequest):
+    """
+    Calculate the same indicators for a whole watchlist
+    
+    Symbols are fetched concurrently on a bounded worker pool under a shared
+    history rate limit (SCAN_MAX_WORKERS / HISTORY_RATE_LIMIT). The response
+    is streamed as newline-delimited JSON: one row per symbol in completion
+    order, then a final summary row with "status": "complete".
+    
+    Example request:
+    {
+        "symbols": ["NSE:SBIN-EQ", "NSE:INFY-EQ", "NSE:TCS-EQ"],
+        "resolution": "15",
+        "duration": 10,
+        "indicators": [
+            {"name": "rsi"},
+            {"name": "adx"},
+            {"name": "supertrend", "params": {"period": 7, "multiplier": 3}}
+        ]
+    }
+    
+    Example row:
+    {"symbol": "NSE:SBIN-EQ", "status": "success", "current_close": 812.4,
+     "indicators": {"rsi": {"RSI": 58.1}, ...}, "elapsed_ms": 240.5}
+    """
+    if not request.symbols or not request.indicators:
+        return {"status": "error", "message": "symbols and indicators are required"}
+    
+    specs = [spec.model_dump() for spec in request.indicators]
+    
+    async def rows():
+        start = time.perf_counter()
+        succeeded = failed = 0
+        
+        async for row in watchlist_scanner.scan_async(request.symbols, request.resolution,
+                                                      request.duration, specs):
+            if row["status"] == "success":
+                succeeded += 1
+            else:
+                failed += 1
+            yield json.dumps(row) + "\n"
+        
+        summary = {
+            "status": "complete",
+            "total": succeeded + failed,
+            "succeeded": succeeded,
+            "failed": failed,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)
+        }
+        logger.info(f"Watchlist scan complete: {summary}")
+        yield json.dumps(summary) + "\n"
+    
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+
+@router.get("/cache-stats")
+async def get_cache_stats():
+    """
+    Indicator cache statistics
+    
+    Responses of the calculate-* endpoints are cached per last closed
+    candle; returns entry/byte usage and hit, miss, eviction and
+    invalidation counters.
+    """
+    return {"status": "success", "data": indicator_cache.stats()}
+
+
+@router.delete("/cache")
+async def clear_cache():
+    """Drop all cached indicator responses (counters are kept)"""
+    indicator_cache.clear()
+    return {"status": "success", "message": "Indicator cache cleared"}
+
+
 @router.get("/detect-trend-advanced")
 async def detect_trend_advanced_endpoint(
     symbol: str = Query(...),
@@ -2337,6 +2211,69 @@ async def detect_trend_rolling_endpoint(
         return {"status": "error", "message": str(e)}
 
 
+@router.get("/detect-trend-series")
+async def detect_trend_series_endpoint(
+    symbol: str = Query(...),
+    resolution: str = Query("30"),
+    duration: int = Query(5),
+    method: str = Query("advanced"),
+    period: int = Query(7),
+    threshold: float = Query(0.7)
+):
+    """
+    Trend label for EVERY candle (full-history overlay)
+    
+    Applies the detect-trend-advanced / detect-trend-simple /
+    detect-trend-rolling rules at each bar in one pass; the last entry
+    equals what the single-value endpoint returns.
+    
+    Parameters:
+    - method: 'advanced' (5-candle), 'simple' (3-candle) or 'rolling'
+    - period, threshold: rolling window settings (method=rolling only)
+    
+    Returns:
+    - trend_values: 'Uptrend' / 'Downtrend' / None per candle
+    - timestamps: candle times aligned with trend_values
+    - uptrend_count / downtrend_count
+    
+    Example:
+    /detect-trend-series?symbol=NSE:SBIN-EQ&resolution=15&duration=5&method=simple
+    """
+    try:
+        if method not in TechnicalIndicatorsService.TREND_METHODS:
+            return {"status": "error",
+                    "message": f"Unknown method '{method}'. Available: {', '.join(TechnicalIndicatorsService.TREND_METHODS)}"}
+        
+        df = indicators_service.fetch_ohlc(symbol, resolution, duration)
+        
+        if df is None or len(df) == 0:
+            return {"status": "error", "message": "Failed to fetch data"}
+        
+        trends = indicators_service.trend_series(df, method=method, period=period, threshold=threshold)
+        
+        data = {
+            "symbol": symbol,
+            "resolution": resolution,
+            "method": method,
+            "total_candles": len(df),
+            "current_trend": trends.iloc[-1],
+            "uptrend_count": int((trends == "Uptrend").sum()),
+            "downtrend_count": int((trends == "Downtrend").sum()),
+            "trend_values": trends.tolist()
+        }
+        if method == "rolling":
+            data["period"] = period
+            data["threshold"] = f"{threshold*100:.0f}%"
+        if 'Timestamp' in df:
+            data["timestamps"] = [ts.isoformat() for ts in df['Timestamp']]
+        
+        return {"status": "success", "data": data}
+    
+    except Exception as e:
+        logger.error(f"Error detecting trend series: {e}")
+        return {"status": "error", "message": str(e)}
+
+
 @router.get("/resistance-support")
 async def get_resistance_support_endpoint(
     symbol: str = Query(...),
@@ -2358,21 +2295,26 @@ async def get_resistance_support_endpoint(
     - Nearest support level below current price
     - All pivot levels
     
+    Pivots are read from the per-trading-day pivot store, so a request only
+    fetches intraday data; daily_duration is used when the symbol's pivots
+    for today are not stored yet.
+    
     Example:
     /resistance-support?symbol=NSE:RELIANCE-EQ&intraday_resolution=15&daily_duration=30
     """
     try:
         intraday_df = indicators_service.fetch_ohlc(symbol, intraday_resolution, intraday_duration)
-        daily_df = indicators_service.fetch_ohlc(symbol, "D", daily_duration)
         
-        if intraday_df is None or daily_df is None:
+        if intraday_df is None or len(intraday_df) == 0:
             return {"status": "error", "message": "Failed to fetch data"}
         
-        levels = indicators_service.get_resistance_support(intraday_df, daily_df)
-        
-        if not levels:
+        # Pivots come from the per-day store; daily history is only fetched on a miss
+        pivots = await asyncio.get_running_loop().run_in_executor(None, pivot_store.get, symbol, daily_duration)
+        if pivots is None:
             return {"status": "error", "message": "Failed to calculate levels"}
         
+        levels = indicators_service.resistance_support_from_pivots(intraday_df["Close"].iloc[-1], pivots)
+        
         return {
             "status": "success",
             "data": {
@@ -2400,6 +2342,151 @@ async def get_resistance_support_endpoint(
         return {"status": "error", "message": str(e)}
 
 
+@router.get("/swing-levels")
+async def get_swing_levels_endpoint(
+    symbol: str = Query(...),
+    resolution: str = Query("D"),
+    history_duration: int = Query(365),
+    recent_duration: int = Query(10),
+    window: int = Query(5),
+    tolerance: float = Query(0.005),
+    min_touches: int = Query(1),
+    rebuild: bool = Query(False)
+):
+    """
+    Support/Resistance from clustered swing highs and lows
+    
+    Swing points (scipy find_peaks, confirmed `window` bars on each side)
+    are clustered into levels when within `tolerance` (relative) of each
+    other. The level set is built once from `history_duration` days and
+    persisted per symbol/resolution; later calls fetch only
+    `recent_duration` days and extend it with the new closed bars.
+    
+    Returns every level (price, touches, swing highs/lows, first/last seen)
+    plus the nearest levels above and below the current price.
+    
+    Example:
+    /swing-levels?symbol=NSE:SBIN-EQ&resolution=D&window=5&tolerance=0.005
+    """
+    try:
+        if window < 1 or tolerance < 0:
+            return {"status": "error", "message": "window must be >= 1 and tolerance >= 0"}
+        
+        fetched = []
+        
+        def fetch(duration: int) -> Optional[pd.DataFrame]:
+            df = indicators_service.fetch_ohlc(symbol, resolution, duration)
+            if df is not None and len(df) > 0:
+                fetched.append(df)
+            return df
+        
+        levels = swing_level_store.refresh(symbol, resolution, fetch, history_duration, recent_duration,
+                                           window=window, tolerance=tolerance, rebuild=rebuild)
+        if levels is None:
+            return {"status": "error", "message": "Failed to fetch data"}
+        
+        current_price = round(float(fetched[-1]["Close"].iloc[-1]), 2) if fetched else None
+        nearest = levels.nearest(current_price) if current_price is not None else {}
+        
+        return {
+            "status": "success",
+            "data": {
+                "symbol": symbol,
+                "resolution": resolution,
+                "current_price": current_price,
+                "total_bars": levels.total_bars,
+                "nearest_resistance": nearest.get("resistance"),
+                "nearest_support": nearest.get("support"),
+                "levels": levels.between(float("-inf"), float("inf"), min_touches)
+            }
+        }
+    
+    except Exception as e:
+        logger.error(f"Error calculating swing levels: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+@router.get("/swing-levels/overlay")
+async def get_swing_levels_overlay_endpoint(
+    symbol: str = Query(...),
+    resolution: str = Query("D"),
+    low: float = Query(...),
+    high: float = Query(...),
+    min_touches: int = Query(1)
+):
+    """
+    Stored swing levels inside a price range (chart overlay)
+    
+    Pure in-memory lookup - no history fetch; the level set must have been
+    built by /swing-levels first.
+    
+    Example:
+    /swing-levels/overlay?symbol=NSE:SBIN-EQ&resolution=D&low=580&high=640
+    """
+    levels = swing_level_store.get(symbol, resolution)
+    if levels is None:
+        return {"status": "error", "message": "No swing levels stored; call /swing-levels first"}
+    
+    return {
+        "status": "success",
+        "data": {
+            "symbol": symbol,
+            "resolution": resolution,
+            "levels": levels.between(low, high, min_touches)
+        }
+    }
+
+
+@router.get("/pivots")
+async def get_pivots_endpoint(symbols: str = Query(..., description="Comma-separated symbols")):
+    """
+    Today's stored pivot levels
+    
+    Symbols not in the store yet are computed on demand.
+    
+    Example:
+    /pivots?symbols=NSE:SBIN-EQ,NSE:INFY-EQ
+    """
+    try:
+        def lookup():
+            rows = []
+            for symbol in WatchlistScanner.unique_symbols(symbols.split(",")):
+                pivots = pivot_store.get(symbol)
+                rows.append(pivots.to_dict() if pivots else {"symbol": symbol, "error": "Failed to calculate levels"})
+            return rows
+        
+        # Misses fetch daily history - keep them off the event loop
+        rows = await asyncio.get_running_loop().run_in_executor(None, lookup)
+        return {"status": "success", "data": {"pivots": rows, "store": pivot_store.stats()}}
+    
+    except Exception as e:
+        logger.error(f"Error reading pivots: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+@router.post("/pivots/refresh")
+async def refresh_pivots_endpoint(request: PivotRefreshRequest):
+    """
+    Recompute today's pivots for a watchlist in one pass
+    
+    The symbols join the store's watchlist, which is recomputed together
+    on the first lookup of each new trading day.
+    
+    Example request:
+    {"symbols": ["NSE:SBIN-EQ", "NSE:INFY-EQ", "NSE:TCS-EQ"]}
+    """
+    try:
+        # One daily history call per symbol - keep it off the event loop
+        summary = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: pivot_store.refresh(request.symbols, request.daily_duration)
+        )
+        return {"status": "success", "data": summary}
+    
+    except Exception as e:
+        logger.error(f"Error refreshing pivots: {e}")
+        return {"status": "error", "message": str(e)}
+
+
 @router.get("/detect-pattern-advanced")
 async def detect_pattern_advanced_endpoint(
     symbol: str = Query(...),
@@ -2522,6 +2609,17 @@ async def get_indicators_info():
                 "usage": "Trend identification, smoother than price",
                 "default_period": 20,
                 "endpoint": "/calculate-sma"
+            },
+            {
+                "name": "Batch",
+                "description": "Several indicators over one OHLC fetch with shared intermediates",
+                "includes": IndicatorBatch.available(),
+                "endpoint": "/calculate-batch"
+            },
+            {
+                "name": "Watchlist Scan",
+                "description": "Batch indicators for many symbols, streamed as NDJSON as each symbol completes",
+                "endpoint": "/scan-watchlist"
             }
         ]
     }
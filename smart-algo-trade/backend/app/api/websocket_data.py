@@ -18,12 +18,14 @@ import pandas as pd
 import json
 import logging
 import os
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Callable
 from fyers_apiv3.FyersWebsocket import data_ws
 from fyers_apiv3 import fyersModel
 import threading
 from csv import DictWriter
 
+from app.services.pattern_stream import pattern_stream
+
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
@@ -241,6 +243,20 @@ class OHLCCollectionService:
         self.timeframe_counter = 1
         self.bars_collected = 0
         self.last_bar_time = None
+        self.bar_listeners: List[Callable[[str, str, dict], Any]] = []
+        
+    def add_bar_listener(self, listener: Callable[[str, str, dict], Any]):
+        """Call listener(symbol, timeframe, bar) whenever a bar closes"""
+        if listener not in self.bar_listeners:
+            self.bar_listeners.append(listener)
+    
+    def _notify_bar_closed(self, symbol: str, bar: dict):
+        """Hand a closed bar to the listeners (before the CSV write, to keep them low-latency)"""
+        for listener in self.bar_listeners:
+            try:
+                listener(symbol, str(self.timeframe_minutes), bar)
+            except Exception as e:
+                logger.error(f"Bar listener failed for {symbol}: {e}")
         
     def _init_fyers(self):
         """Initialize Fyers API connection"""
@@ -319,6 +335,7 @@ class OHLCCollectionService:
                 if sym not in self.csv_data:
                     self.csv_data[sym] = []
                 self.csv_data[sym].append(csv_dict)
+                self._notify_bar_closed(sym, csv_dict)
                 
                 # Write to CSV
                 self._write_to_csv(sym, csv_dict)
@@ -441,6 +458,7 @@ class OHLCCollectionService:
 
 streaming_service = RealtimeStreamingService()
 ohlc_service = OHLCCollectionService()
+ohlc_service.add_bar_listener(pattern_stream.on_bar)
 
 
 # ==================== API ENDPOINTS ====================
@@ -572,6 +590,21 @@ async def get_ohlc_data(symbol: str = Query(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/ohlc/patterns")
+async def get_ohlc_patterns(symbol: Optional[str] = Query(None), limit: int = Query(50, ge=1, le=200)):
+    """
+    Recent candlestick patterns detected on live bar close
+    
+    Live clients should subscribe to the "pattern" channel on /ws/market-data
+    instead of polling; this returns the same events.
+    """
+    return {
+        "symbol": symbol,
+        "events": pattern_stream.recent(symbol, limit),
+        "stats": pattern_stream.stats()
+    }
+
+
 @router.get("/websocket-data/info")
 async def get_websocket_info():
     """Get WebSocket data collection system information"""
@@ -589,13 +622,15 @@ async def get_websocket_info():
                 "start": "POST /api/websocket/ohlc/start?symbols=NSE:SBIN-EQ&timeframe=1",
                 "stop": "POST /api/websocket/ohlc/stop",
                 "status": "GET /api/websocket/ohlc/status",
-                "data": "GET /api/websocket/ohlc/data?symbol=NSE:SBIN-EQ"
+                "data": "GET /api/websocket/ohlc/data?symbol=NSE:SBIN-EQ",
+                "patterns": "GET /api/websocket/ohlc/patterns?symbol=NSE:SBIN-EQ"
             }
         },
         "features": [
             "Real-time tick data streaming (LTP updates)",
             "OHLC bar aggregation at configurable timeframes",
             "CSV export for historical analysis",
+            "Candlestick pattern events on bar close (/ws/market-data 'pattern' channel)",
             "Multi-symbol portfolio support",
             "Automatic reconnection on disconnection",
             "In-memory tick buffering (last 100 ticks per symbol)"
@@ -7,7 +7,7 @@ import asyncio
 import json
 import logging
 from datetime import datetime, timedelta
-from typing import Set, Dict
+from typing import Set, Dict, Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from fastapi.websockets import WebSocketState
 
@@ -23,6 +23,11 @@ class MarketDataManager:
         self.active_connections: Set[WebSocket] = set()
         self.subscription_map: Dict[str, Set[WebSocket]] = {}
         self.price_cache: Dict[str, dict] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """Event loop that broadcasts from non-async threads are scheduled on"""
+        self.loop = loop
 
     async def connect(self, websocket: WebSocket):
         """Register new WebSocket connection"""
@@ -97,6 +102,15 @@ class MarketDataManager:
                 except Exception as e:
                     logger.error(f"Failed to send candle update: {e}")
 
+    async def broadcast_pattern_event(self, event: dict):
+        """Broadcast a candlestick pattern detected on bar close"""
+        key = f"pattern:{event['symbol']}:{event['timeframe']}"
+        for websocket in list(self.subscription_map.get(key, ())):
+            try:
+                await websocket.send_json(event)
+            except Exception as e:
+                logger.error(f"Failed to send pattern event: {e}")
+
     @staticmethod
     def _create_subscription_key(channel: str, **kwargs) -> str:
         """Create subscription key from channel and parameters"""
@@ -104,6 +118,8 @@ class MarketDataManager:
             return f"quote:{kwargs.get('symbol')}"
         elif channel == "candle":
             return f"candle:{kwargs.get('symbol')}:{kwargs.get('timeframe')}"
+        elif channel == "pattern":
+            return f"pattern:{kwargs.get('symbol')}:{kwargs.get('timeframe')}"
         return f"{channel}:{':'.join(str(v) for v in kwargs.values())}"
 
 
@@ -177,6 +193,21 @@ async def broadcast_candle_update(
     await market_data_manager.broadcast_candle_update(symbol, timeframe, candle, is_new_candle)
 
 
+def publish_pattern_event(event: dict):
+    """
+    Pattern listener for the bar aggregator thread
+
+    Schedules the broadcast on the server's event loop (bound at startup);
+    events without subscribers are dropped without touching the loop.
+    """
+    loop = market_data_manager.loop
+    if loop is None or loop.is_closed():
+        return
+    if not market_data_manager.subscription_map.get(f"pattern:{event['symbol']}:{event['timeframe']}"):
+        return
+    asyncio.run_coroutine_threadsafe(market_data_manager.broadcast_pattern_event(event), loop)
+
+
 # ============================================================================
 # Background task to simulate real-time market data (for testing)
 # ============================================================================
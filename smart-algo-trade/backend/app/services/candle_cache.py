@@ -0,0 +1,256 @@
+"""
+Candle Cache
+Range-indexed in-memory candle series with byte-bounded LRU eviction
+
+Each (symbol, resolution) series is held as sorted columns - int64 time
+in milliseconds, float64 open/high/low/close, int64 volume - together
+with the time spans that are known to be complete. A time-range query is
+two searchsorted calls and returns views into the columns (no copy, no
+per-candle Python objects); only the spans not covered yet have to be
+fetched, and what is fetched is merged into the series.
+
+    series = candle_cache.get(key, from_ms, to_ms)      # None when not covered
+    for gap_from, gap_to in candle_cache.missing(key, from_ms, to_ms):
+        candle_cache.put(key, fetch(gap_from, gap_to), gap_from, gap_to)
+
+Whole series are evicted least recently used first once the cached
+columns exceed the byte budget.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.swing_levels import epoch_seconds
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+Span = Tuple[int, int]
+
+COLUMNS = ("time", "open", "high", "low", "close", "volume")
+
+
+class CandleSeries:
+    """
+    Sorted candle columns; slices are views sharing the parent's memory
+
+    Args:
+        time: int64 epoch milliseconds, ascending and unique
+        open/high/low/close: float64 prices
+        volume: int64 volumes
+    """
+
+    __slots__ = COLUMNS
+
+    def __init__(self, time: np.ndarray, open: np.ndarray, high: np.ndarray,
+                 low: np.ndarray, close: np.ndarray, volume: np.ndarray):
+        self.time = time
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @classmethod
+    def empty(cls) -> "CandleSeries":
+        prices = np.empty(0, dtype=np.float64)
+        return cls(np.empty(0, dtype=np.int64), prices, prices, prices, prices, np.empty(0, dtype=np.int64))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "CandleSeries":
+        """OHLC DataFrame (Timestamp column) -> series, prices rounded to 2 decimals"""
+        times = epoch_seconds(df['Timestamp']) * 1000
+        order = np.argsort(times, kind="stable")
+        return cls(
+            times[order],
+            np.round(df['Open'].to_numpy(dtype=np.float64)[order], 2),
+            np.round(df['High'].to_numpy(dtype=np.float64)[order], 2),
+            np.round(df['Low'].to_numpy(dtype=np.float64)[order], 2),
+            np.round(df['Close'].to_numpy(dtype=np.float64)[order], 2),
+            df['Volume'].to_numpy(dtype=np.int64)[order],
+        )
+
+    @classmethod
+    def from_records(cls, records: Iterable[Any]) -> "CandleSeries":
+        """Candle models or dicts with time/open/high/low/close/volume"""
+        rows = [r if isinstance(r, dict) else r.model_dump() for r in records]
+        if not rows:
+            return cls.empty()
+        times = np.array([r["time"] for r in rows], dtype=np.int64)
+        order = np.argsort(times, kind="stable")
+        return cls(times[order], *(
+            np.array([r[name] for r in rows], dtype=np.int64 if name == "volume" else np.float64)[order]
+            for name in COLUMNS[1:]
+        ))
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in COLUMNS)
+
+    def _take(self, index: Any) -> "CandleSeries":
+        return CandleSeries(*(getattr(self, name)[index] for name in COLUMNS))
+
+    def slice(self, from_ms: Optional[int] = None, to_ms: Optional[int] = None) -> "CandleSeries":
+        """Candles with from_ms <= time <= to_ms (views)"""
+        lo = 0 if from_ms is None else int(np.searchsorted(self.time, from_ms, side="left"))
+        hi = len(self.time) if to_ms is None else int(np.searchsorted(self.time, to_ms, side="right"))
+        return self._take(slice(lo, hi))
+
+    def tail(self, n: int) -> "CandleSeries":
+        """Last n candles (views)"""
+        return self._take(slice(max(0, len(self.time) - n), None)) if n > 0 else self._take(slice(0, 0))
+
+    def merge(self, other: "CandleSeries") -> "CandleSeries":
+        """Union of both series; on equal times the candle from `other` wins"""
+        if not len(self):
+            return other
+        if not len(other):
+            return self
+        times = np.concatenate([self.time, other.time])
+        order = np.argsort(times, kind="stable")
+        times = times[order]
+        # Stable sort keeps `other` after `self` for equal times: keep the last
+        keep = np.append(times[1:] != times[:-1], True)
+        index = order[keep]
+        return CandleSeries(times[keep], *(
+            np.concatenate([getattr(self, name), getattr(other, name)])[index] for name in COLUMNS[1:]
+        ))
+
+    def to_columns(self) -> Dict[str, List[Any]]:
+        """Columnar payload {t, o, h, l, c, v} of Python lists (one tolist() per column)"""
+        return {key: getattr(self, name).tolist() for key, name in zip("tohlcv", COLUMNS)}
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Candle dicts (time, open, high, low, close, volume) with Python scalars"""
+        columns = [getattr(self, name).tolist() for name in COLUMNS]
+        return [dict(zip(COLUMNS, row)) for row in zip(*columns)]
+
+
+def _merge_spans(spans: List[Span]) -> List[Span]:
+    """Union of inclusive millisecond spans, sorted; touching spans are joined"""
+    merged: List[List[int]] = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def _subtract_spans(start: int, end: int, covered: List[Span]) -> List[Span]:
+    """Parts of [start, end] not inside any covered span"""
+    missing = []
+    cursor = start
+    for c_start, c_end in covered:
+        if c_end < cursor:
+            continue
+        if c_start > end:
+            break
+        if c_start > cursor:
+            missing.append((cursor, min(end, c_start - 1)))
+        cursor = max(cursor, c_end + 1)
+        if cursor > end:
+            break
+    if cursor <= end:
+        missing.append((cursor, end))
+    return missing
+
+
+class CandleCache:
+    """
+    Thread-safe LRU of candle series bounded by column bytes
+
+    Args:
+        max_bytes: Budget for all cached columns (default CANDLE_CACHE_MAX_MB)
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes or settings.CANDLE_CACHE_MAX_MB * 1024 * 1024
+        self._entries: "OrderedDict[Hashable, Tuple[CandleSeries, List[Span]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def missing(self, key: Hashable, from_ms: int, to_ms: int) -> List[Span]:
+        """Spans of [from_ms, to_ms] the cache cannot answer yet"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return _subtract_spans(from_ms, to_ms, entry[1] if entry else [])
+
+    def get(self, key: Hashable, from_ms: Optional[int] = None,
+            to_ms: Optional[int] = None) -> Optional[CandleSeries]:
+        """
+        Candles of [from_ms, to_ms] as views, or None unless the whole range is covered
+
+        With from_ms / to_ms None, whatever is cached for the key is sliced.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            series, spans = entry
+            if from_ms is not None and to_ms is not None and _subtract_spans(from_ms, to_ms, spans):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return series.slice(from_ms, to_ms)
+
+    def put(self, key: Hashable, series: CandleSeries, from_ms: int, to_ms: int) -> CandleSeries:
+        """
+        Merge fetched candles into the key's series and mark [from_ms, to_ms] covered
+
+        Returns:
+            The merged series
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[0].nbytes
+                merged = entry[0].merge(series)
+                spans = _merge_spans(entry[1] + [(from_ms, to_ms)])
+            else:
+                merged, spans = series, [(from_ms, to_ms)]
+
+            size = merged.nbytes
+            if size > self.max_bytes:
+                logger.warning(f"Candle series {key} ({size} bytes) exceeds the cache budget; not cached")
+                return merged
+
+            self._entries[key] = (merged, spans)
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+            return merged
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "series": len(self._entries),
+                "candles": sum(len(series) for series, _ in self._entries.values()),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,373 @@
+"""
+Candle Store
+Local columnar OHLCV store with incremental gap-fill
+
+History is kept on disk per symbol / resolution / month as NumPy .npz
+files (int64 epoch seconds plus float OHLC and int volume columns), with a
+coverage manifest of the IST trading days already fetched completely.
+fetch_ohlc() serves a "last N days" request from those files and asks the
+broker only for the days that are missing - normally just today's tail -
+so repeat history loads are a few file reads instead of a full download.
+
+    df = candle_store.fetch_ohlc(self.fyers.history, "NSE:SBIN-EQ", "15", 30)
+
+Days are only marked complete once their session is over; today's candles
+(including the still-forming one) are refetched on every call and replace
+the stored ones.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.indicator_cache import IST_OFFSET, SESSION_CLOSE, resolution_seconds
+from app.services.pivot_store import IST, trading_day
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+HistoryCall = Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+_EPOCH_DAY = date(1970, 1, 1)
+
+# Fyers history limits per request (calendar days)
+INTRADAY_MAX_DAYS = 100
+DAILY_MAX_DAYS = 366
+
+
+def day_start(day: date) -> int:
+    """Epoch seconds of 00:00 IST on day"""
+    return (day - _EPOCH_DAY).days * 86400 - IST_OFFSET
+
+
+def candles_to_frame(times: np.ndarray, columns: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """Stored columns -> OHLC DataFrame with IST Timestamps (as the fetch_ohlc methods return)"""
+    stamps = pd.to_datetime(times, unit='s', utc=True).tz_convert(IST)
+    return pd.DataFrame({
+        'Timestamp': stamps,
+        'Open': columns['o'],
+        'High': columns['h'],
+        'Low': columns['l'],
+        'Close': columns['c'],
+        'Volume': columns['v'],
+    })
+
+
+def normalise_candles(rows: np.ndarray) -> np.ndarray:
+    """Candle rows sorted by time; of duplicate timestamps the last row is kept"""
+    rows = rows[np.argsort(rows[:, 0], kind="stable")]
+    if len(rows) > 1:
+        rows = rows[np.append(rows[1:, 0] != rows[:-1, 0], True)]
+    return rows
+
+
+def _merge_ranges(ranges: List[Tuple[date, date]]) -> List[Tuple[date, date]]:
+    """Union of inclusive day ranges, sorted; adjacent ranges are joined"""
+    merged: List[List[date]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def chunk_ranges(start: date, end: date, resolution: str) -> List[Tuple[date, date]]:
+    """Split days [start, end] into ranges a single history request may cover"""
+    step = INTRADAY_MAX_DAYS if resolution_seconds(str(resolution)) else DAILY_MAX_DAYS
+    chunks = []
+    while start <= end:
+        chunk_end = min(end, start + timedelta(days=step - 1))
+        chunks.append((start, chunk_end))
+        start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def _subtract_ranges(start: date, end: date, covered: List[Tuple[date, date]]) -> List[Tuple[date, date]]:
+    """Days of [start, end] not inside any covered range"""
+    missing = []
+    cursor = start
+    for c_start, c_end in covered:
+        if c_end < cursor:
+            continue
+        if c_start > end:
+            break
+        if c_start > cursor:
+            missing.append((cursor, min(end, c_start - timedelta(days=1))))
+        cursor = max(cursor, c_end + timedelta(days=1))
+        if cursor > end:
+            break
+    if cursor <= end:
+        missing.append((cursor, end))
+    return missing
+
+
+class CandleStore:
+    """
+    On-disk candle series with a coverage manifest per (symbol, resolution)
+
+    Layout: <directory>/<symbol>/<resolution>/<YYYY-MM>.npz + coverage.json
+
+    Args:
+        directory: Store root (default CANDLE_STORE_DIR)
+        enabled: False passes every request straight to the broker
+    """
+
+    def __init__(self, directory: Optional[str] = None, enabled: Optional[bool] = None):
+        self.directory = directory or settings.CANDLE_STORE_DIR
+        self.enabled = settings.CANDLE_STORE_ENABLED if enabled is None else enabled
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self._stats = {"requests": 0, "broker_calls": 0, "days_from_disk": 0, "days_fetched": 0}
+
+    # ------------------------------------------------------------------
+    # Paths / manifest
+    # ------------------------------------------------------------------
+
+    def series_dir(self, symbol: str, resolution: str) -> str:
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", symbol)
+        return os.path.join(self.directory, safe, re.sub(r"[^A-Za-z0-9]", "_", str(resolution)))
+
+    def _lock(self, symbol: str, resolution: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault((symbol, str(resolution)), threading.Lock())
+
+    def _load_coverage(self, folder: str) -> List[Tuple[date, date]]:
+        path = os.path.join(folder, "coverage.json")
+        try:
+            if os.path.exists(path):
+                with open(path, 'r') as f:
+                    return [(date.fromisoformat(a), date.fromisoformat(b)) for a, b in json.load(f)["days"]]
+        except Exception as e:
+            logger.warning(f"Could not read candle coverage {path}: {e}")
+        return []
+
+    def _save_coverage(self, folder: str, covered: List[Tuple[date, date]]) -> None:
+        path = os.path.join(folder, "coverage.json")
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({"days": [[a.isoformat(), b.isoformat()] for a, b in covered]}, f)
+        os.replace(tmp, path)
+
+    # ------------------------------------------------------------------
+    # Month files
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _month_key(times: np.ndarray) -> np.ndarray:
+        """'YYYY-MM' (IST) for every epoch second"""
+        return (times + IST_OFFSET).astype("datetime64[s]").astype("datetime64[M]").astype(str)
+
+    @staticmethod
+    def _months(start: date, end: date) -> List[str]:
+        months = np.arange(np.datetime64(start, "M"), np.datetime64(end, "M") + 1)
+        return months.astype(str).tolist()
+
+    def _read_month(self, folder: str, month: str) -> Optional[Dict[str, np.ndarray]]:
+        path = os.path.join(folder, f"{month}.npz")
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return {name: data[name] for name in ("t", "o", "h", "l", "c", "v")}
+
+    def _write_month(self, folder: str, month: str, columns: Dict[str, np.ndarray]) -> None:
+        path = os.path.join(folder, f"{month}.npz")
+        tmp = os.path.join(folder, f"{month}.tmp.npz")
+        np.savez(tmp, **columns)
+        os.replace(tmp, path)
+
+    def read(self, symbol: str, resolution: str, start: date, end: date) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Stored candles with IST dates in [start, end] (no broker calls)"""
+        folder = self.series_dir(symbol, resolution)
+        parts = [part for part in (self._read_month(folder, m) for m in self._months(start, end)) if part]
+        if not parts:
+            empty = {name: np.empty(0) for name in ("o", "h", "l", "c")}
+            return np.empty(0, dtype=np.int64), {**empty, "v": np.empty(0, dtype=np.int64)}
+
+        times = np.concatenate([p["t"] for p in parts])
+        lo = int(np.searchsorted(times, day_start(start), side="left"))
+        hi = int(np.searchsorted(times, day_start(end + timedelta(days=1)), side="left"))
+        return times[lo:hi], {name: np.concatenate([p[name] for p in parts])[lo:hi] for name in ("o", "h", "l", "c", "v")}
+
+    def write(self, symbol: str, resolution: str, start: date, end: date, candles: List[List[Any]]) -> int:
+        """
+        Replace the stored candles of days [start, end] with `candles`
+
+        Args:
+            candles: Fyers candle rows [epoch, open, high, low, close, volume]
+
+        Returns:
+            Number of candles written
+        """
+        folder = self.series_dir(symbol, resolution)
+        os.makedirs(folder, exist_ok=True)
+
+        lo, hi = day_start(start), day_start(end + timedelta(days=1))
+        rows = np.asarray(candles, dtype=np.float64).reshape(-1, 6)
+        inside = (rows[:, 0] >= lo) & (rows[:, 0] < hi)
+        rows = normalise_candles(rows[inside])
+        times = rows[:, 0].astype(np.int64)
+
+        new_months = self._month_key(times)
+        for month in self._months(start, end):
+            existing = self._read_month(folder, month)
+            pick = new_months == month
+            if existing is None and not pick.any():
+                continue
+
+            parts_t = [times[pick]]
+            parts = {"o": [rows[pick, 1]], "h": [rows[pick, 2]], "l": [rows[pick, 3]],
+                     "c": [rows[pick, 4]], "v": [rows[pick, 5].astype(np.int64)]}
+            if existing is not None:
+                outside = (existing["t"] < lo) | (existing["t"] >= hi)
+                parts_t.insert(0, existing["t"][outside])
+                for name in parts:
+                    parts[name].insert(0, existing[name][outside])
+
+            merged_t = np.concatenate(parts_t)
+            order = np.argsort(merged_t, kind="stable")
+            columns = {"t": merged_t[order]}
+            columns.update({name: np.concatenate(values)[order] for name, values in parts.items()})
+            self._write_month(folder, month, columns)
+        return len(times)
+
+    # ------------------------------------------------------------------
+    # Broker gap-fill
+    # ------------------------------------------------------------------
+
+    def request_candles(self, history: HistoryCall, symbol: str, resolution: str,
+                 start: date, end: date) -> Optional[List[List[Any]]]:
+        """One broker history call; None on failure, [] when there were no candles"""
+        self._stats["broker_calls"] += 1
+        response = history({
+            "symbol": symbol,
+            "resolution": resolution,
+            "date_format": "1",
+            "range_from": start.strftime("%Y-%m-%d"),
+            "range_to": end.strftime("%Y-%m-%d"),
+            "cont_flag": "1"
+        })
+        if response and 'candles' in response:
+            return response['candles'] or []
+        if response and response.get('s') == 'no_data':
+            return []
+        logger.warning(f"History request failed for {symbol} {resolution} {start}..{end}: {response}")
+        return None
+
+    @staticmethod
+    def _complete_until(now: Optional[datetime] = None) -> date:
+        """Last IST day whose session is over (its candles will not change)"""
+        now = (now or datetime.now(IST)).astimezone(IST)
+        today = now.date()
+        closed = now.hour * 3600 + now.minute * 60 + now.second >= SESSION_CLOSE
+        return today if closed else today - timedelta(days=1)
+
+    def fetch_range(self, history: HistoryCall, symbol: str, resolution: str,
+                    start: date, end: date) -> Optional[pd.DataFrame]:
+        """
+        Candles of IST days [start, end], fetching only the missing days
+
+        Returns:
+            OHLC DataFrame (Timestamp in IST), or None when nothing is stored
+            and the broker call failed
+        """
+        resolution = str(resolution)
+        self._stats["requests"] += 1
+
+        if not self.enabled:
+            candles = self.request_candles(history, symbol, resolution, start, end)
+            if candles is None:
+                return None
+            rows = np.asarray(candles, dtype=np.float64).reshape(-1, 6)
+            return candles_to_frame(rows[:, 0].astype(np.int64), {
+                "o": rows[:, 1], "h": rows[:, 2], "l": rows[:, 3], "c": rows[:, 4],
+                "v": rows[:, 5].astype(np.int64)})
+
+        with self._lock(symbol, resolution):
+            folder = self.series_dir(symbol, resolution)
+            covered = self._load_coverage(folder)
+            missing = _subtract_ranges(start, end, covered)
+            complete_until = self._complete_until()
+            failed = False
+
+            for gap_start, gap_end in missing:
+                for chunk_start, chunk_end in chunk_ranges(gap_start, gap_end, resolution):
+                    candles = self.request_candles(history, symbol, resolution, chunk_start, chunk_end)
+                    if candles is None:
+                        failed = True
+                        continue
+                    self.write(symbol, resolution, chunk_start, chunk_end, candles)
+                    self._stats["days_fetched"] += (chunk_end - chunk_start).days + 1
+                    if chunk_start <= complete_until:
+                        covered = _merge_ranges(covered + [(chunk_start, min(chunk_end, complete_until))])
+            if missing:
+                os.makedirs(folder, exist_ok=True)
+                self._save_coverage(folder, covered)
+
+            self._stats["days_from_disk"] += (end - start).days + 1 - sum((b - a).days + 1 for a, b in missing)
+            times, columns = self.read(symbol, resolution, start, end)
+
+        if len(times) == 0 and failed:
+            return None
+        return candles_to_frame(times, columns)
+
+    def missing(self, symbol: str, resolution: str, start: date, end: date) -> List[Tuple[date, date]]:
+        """Day ranges of [start, end] not yet stored completely"""
+        if not self.enabled:
+            return [(start, end)]
+        return _subtract_ranges(start, end, self._load_coverage(self.series_dir(symbol, str(resolution))))
+
+    def ingest(self, symbol: str, resolution: str, spans: List[Tuple[date, date]], candles: Any) -> int:
+        """
+        Store candles fetched elsewhere (bulk downloads) and mark their days covered
+
+        Args:
+            spans: Day ranges the candles were requested for; stored candles
+                   of these days are replaced
+            candles: Candle rows [epoch, open, high, low, close, volume]
+
+        Returns:
+            Number of candles written
+        """
+        if not self.enabled or not spans:
+            return 0
+        resolution = str(resolution)
+        rows = np.asarray(candles, dtype=np.float64).reshape(-1, 6)
+        complete_until = self._complete_until()
+        written = 0
+
+        with self._lock(symbol, resolution):
+            folder = self.series_dir(symbol, resolution)
+            covered = self._load_coverage(folder)
+            for span_start, span_end in _merge_ranges(spans):
+                written += self.write(symbol, resolution, span_start, span_end, rows)
+                self._stats["days_fetched"] += (span_end - span_start).days + 1
+                if span_start <= complete_until:
+                    covered = _merge_ranges(covered + [(span_start, min(span_end, complete_until))])
+            self._save_coverage(folder, covered)
+        return written
+
+    def fetch_ohlc(self, history: HistoryCall, symbol: str, resolution: str, duration: int) -> Optional[pd.DataFrame]:
+        """
+        Last `duration` days up to today, as the services' fetch_ohlc returns them
+
+        Args:
+            history: Broker history call (FyersModel.history)
+            duration: Calendar days before today to include
+        """
+        today = trading_day()
+        return self.fetch_range(history, symbol, resolution, today - timedelta(days=duration), today)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "directory": self.directory, **self._stats}
+
+
+# Global store
+candle_store = CandleStore()
@@ -0,0 +1,419 @@
+"""
+Compute Backend
+Pluggable implementations of the path-dependent indicator kernels
+
+Supertrend band ratchets, trend flips, Wilder smoothing and breakout windows
+are sequential recursions. Every kernel has a pure NumPy implementation
+(indicator_kernels) and, when numba is installed, a JIT-compiled loop
+version. The backend is chosen once at startup from settings.COMPUTE_BACKEND:
+
+    numpy  - always available (default)
+    numba  - JIT loops; falls back to numpy if numba is missing
+    auto   - numba when installed, else numpy
+
+Before a non-NumPy backend is used it is checked against the NumPy one on
+synthetic data (settings.COMPUTE_BACKEND_VERIFY); on any mismatch the
+NumPy backend stays active. Callers use the module-level functions, so
+switching backends needs no code changes:
+
+    >>> from app.services import compute_backend as compute
+    >>> final_upper, final_lower = compute.supertrend_bands(close, upper, lower, start=8)
+    >>> compute.active().name
+    'numpy'
+"""
+
+import logging
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+from app.services import indicator_kernels as kernels
+from config import settings
+
+# Try to import numba
+try:
+    import numba
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("numpy", "numba", "auto")
+
+
+# ============================================================================
+# NumPy backend
+# ============================================================================
+
+class NumpyBackend:
+    """Reference implementations (indicator_kernels)"""
+
+    name = "numpy"
+
+    linear_recurrence = staticmethod(kernels.linear_recurrence)
+    supertrend_bands = staticmethod(kernels.supertrend_bands)
+    supertrend_direction = staticmethod(kernels.supertrend_direction)
+    supertrend_bands_grid = staticmethod(kernels.supertrend_bands_grid)
+    supertrend_direction_grid = staticmethod(kernels.supertrend_direction_grid)
+    breakout_grid = staticmethod(kernels.breakout_grid)
+    breakout_mask = staticmethod(kernels.breakout_mask)
+
+    def wilder_sum(self, values: np.ndarray, period: int) -> np.ndarray:
+        return kernels.wilder_sum(values, period, recurrence=self.linear_recurrence)
+
+    def wilder_average(self, values: np.ndarray, period: int, start: int) -> np.ndarray:
+        return kernels.wilder_average(values, period, start, recurrence=self.linear_recurrence)
+
+
+# ============================================================================
+# Numba backend (loop kernels, compiled with numba.njit)
+# ============================================================================
+
+def _recurrence_loop(x, decay, gain, start, seed):
+    n = x.shape[0]
+    out = np.full(n, np.nan)
+    if start < 0 or start >= n:
+        return out
+
+    y = seed
+    out[start] = y
+    for i in range(start + 1, n):
+        y = decay * y + gain * x[i]
+        out[i] = y
+    return out
+
+
+def _bands_loop(close, fu, fl, starts):
+    # fu / fl are (n, k) copies of the basic bands, ratcheted in place
+    n, k = fu.shape
+    for j in range(k):
+        for i in range(max(starts[j], 1), n):
+            prev_close = close[i - 1]
+            if prev_close <= fu[i - 1, j] and fu[i - 1, j] < fu[i, j]:
+                fu[i, j] = fu[i - 1, j]
+            if prev_close >= fl[i - 1, j] and fl[i - 1, j] > fl[i, j]:
+                fl[i, j] = fl[i - 1, j]
+
+
+def _direction_loop(close, fu, fl, starts, seed_on_cross):
+    n, k = fu.shape
+    strend = np.full((n, k), np.nan)
+    trend = np.zeros((n, k), dtype=np.int64)
+
+    for j in range(k):
+        start = max(starts[j], 1) if seed_on_cross else starts[j]
+        if start >= n:
+            continue
+
+        begin = n
+        if seed_on_cross:
+            for i in range(start, n):
+                if close[i - 1] <= fu[i - 1, j] and close[i] > fu[i, j]:
+                    strend[i, j] = fl[i, j]
+                    trend[i, j] = 1
+                    begin = i + 1
+                    break
+                if close[i - 1] >= fl[i - 1, j] and close[i] < fl[i, j]:
+                    strend[i, j] = fu[i, j]
+                    trend[i, j] = -1
+                    begin = i + 1
+                    break
+        else:
+            if close[start] < fu[start, j]:
+                strend[start, j] = fu[start, j]
+                trend[start, j] = -1
+            else:
+                strend[start, j] = fl[start, j]
+                trend[start, j] = 1
+            begin = start + 1
+
+        for i in range(begin, n):
+            prev = strend[i - 1, j]
+            if prev == fu[i - 1, j]:
+                if close[i] <= fu[i, j]:
+                    strend[i, j] = fu[i, j]
+                    trend[i, j] = -1
+                else:
+                    strend[i, j] = fl[i, j]
+                    trend[i, j] = 1
+            elif prev == fl[i - 1, j]:
+                if close[i] >= fl[i, j]:
+                    strend[i, j] = fl[i, j]
+                    trend[i, j] = 1
+                else:
+                    strend[i, j] = fu[i, j]
+                    trend[i, j] = -1
+
+    return strend, trend
+
+
+def _breakout_loop(high, low, lookbacks):
+    n = high.shape[0]
+    m = lookbacks.shape[0]
+    up = np.zeros((n, m), dtype=np.bool_)
+    down = np.zeros((n, m), dtype=np.bool_)
+
+    # Monotonic deques of indices (decreasing highs / increasing lows), NaNs never enter
+    highs = np.empty(n, dtype=np.int64)
+    lows = np.empty(n, dtype=np.int64)
+
+    for j in range(m):
+        lookback = lookbacks[j]
+        if lookback < 1:
+            continue
+        h_head = h_tail = l_head = l_tail = 0
+
+        for i in range(n):
+            while h_head < h_tail and highs[h_head] < i - lookback:
+                h_head += 1
+            while l_head < l_tail and lows[l_head] < i - lookback:
+                l_head += 1
+
+            if i >= lookback:
+                up[i, j] = h_head < h_tail and high[i] > high[highs[h_head]]
+                down[i, j] = l_head < l_tail and low[i] < low[lows[l_head]]
+
+            if high[i] == high[i]:
+                while h_head < h_tail and high[highs[h_tail - 1]] <= high[i]:
+                    h_tail -= 1
+                highs[h_tail] = i
+                h_tail += 1
+            if low[i] == low[i]:
+                while l_head < l_tail and low[lows[l_tail - 1]] >= low[i]:
+                    l_tail -= 1
+                lows[l_tail] = i
+                l_tail += 1
+
+    return up, down
+
+
+class NumbaBackend(NumpyBackend):
+    """JIT-compiled loop implementations (requires numba)"""
+
+    name = "numba"
+
+    def __init__(self):
+        if not NUMBA_AVAILABLE:
+            raise RuntimeError("numba is not installed")
+
+        jit = numba.njit(cache=True, nogil=True)
+        self._recurrence = jit(_recurrence_loop)
+        self._bands = jit(_bands_loop)
+        self._direction = jit(_direction_loop)
+        self._breakout = jit(_breakout_loop)
+
+    def linear_recurrence(self, values: np.ndarray, decay: float, gain: float,
+                          start: int, seed: float) -> np.ndarray:
+        return self._recurrence(kernels.as_float_array(values), float(decay), float(gain),
+                                int(start), float(seed))
+
+    def supertrend_bands_grid(self, close: np.ndarray, basic_upper: np.ndarray, basic_lower: np.ndarray,
+                              start) -> Tuple[np.ndarray, np.ndarray]:
+        fu = np.array(basic_upper, dtype=np.float64, order='C')
+        fl = np.array(basic_lower, dtype=np.float64, order='C')
+        starts = np.ascontiguousarray(np.broadcast_to(np.asarray(start, dtype=np.int64), fu.shape[1:]))
+        self._bands(kernels.as_float_array(close), fu, fl, starts)
+        return fu, fl
+
+    def supertrend_direction_grid(self, close: np.ndarray, final_upper: np.ndarray, final_lower: np.ndarray,
+                                  start, seed_on_cross: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        fu = np.ascontiguousarray(final_upper, dtype=np.float64)
+        starts = np.ascontiguousarray(np.broadcast_to(np.asarray(start, dtype=np.int64), fu.shape[1:]))
+        return self._direction(kernels.as_float_array(close), fu,
+                               np.ascontiguousarray(final_lower, dtype=np.float64), starts, bool(seed_on_cross))
+
+    def supertrend_bands(self, close: np.ndarray, basic_upper: np.ndarray, basic_lower: np.ndarray,
+                         start: int) -> Tuple[np.ndarray, np.ndarray]:
+        fu, fl = self.supertrend_bands_grid(close, kernels.as_float_array(basic_upper)[:, None],
+                                            kernels.as_float_array(basic_lower)[:, None], start)
+        return fu[:, 0], fl[:, 0]
+
+    def supertrend_direction(self, close: np.ndarray, final_upper: np.ndarray, final_lower: np.ndarray,
+                             start: int, seed_on_cross: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        strend, trend = self.supertrend_direction_grid(close, kernels.as_float_array(final_upper)[:, None],
+                                                       kernels.as_float_array(final_lower)[:, None],
+                                                       start, seed_on_cross)
+        return strend[:, 0], trend[:, 0]
+
+    def breakout_grid(self, high: np.ndarray, low: np.ndarray, lookbacks) -> Tuple[np.ndarray, np.ndarray]:
+        return self._breakout(kernels.as_float_array(high), kernels.as_float_array(low),
+                              np.asarray(lookbacks, dtype=np.int64).reshape(-1))
+
+    def breakout_mask(self, high: np.ndarray, low: np.ndarray, lookback: int) -> np.ndarray:
+        up, down = self.breakout_grid(high, low, [lookback])
+        return up[:, 0] | down[:, 0]
+
+
+# ============================================================================
+# Parity check and selection
+# ============================================================================
+
+def _parity_cases(size: int, seed: int) -> List[Tuple[str, Callable]]:
+    """(name, call(backend)) pairs over synthetic OHLC data with NaN warm-up"""
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, size))
+    high = close + rng.random(size)
+    low = close - rng.random(size)
+    high[3] = np.nan
+
+    tr = np.abs(rng.normal(1, 0.3, size))
+    tr[0] = np.nan
+    atr = kernels.ewm_mean(tr, 1.0 / 8, 7)
+    hl2 = (high + low) / 2
+    upper = hl2[:, None] + atr[:, None] * np.array([1.0, 2.0, 3.0])
+    lower = hl2[:, None] - atr[:, None] * np.array([1.0, 2.0, 3.0])
+    starts = np.array([7, 8, 12])
+
+    return [
+        ("linear_recurrence", lambda b: b.linear_recurrence(tr, 0.9, 0.1, 5, 1.5)),
+        ("wilder_sum", lambda b: b.wilder_sum(tr, 14)),
+        ("wilder_average", lambda b: b.wilder_average(tr, 14, 14)),
+        ("supertrend_bands", lambda b: b.supertrend_bands(close, upper[:, 2], lower[:, 2], 8)),
+        ("supertrend_direction", lambda b: b.supertrend_direction(close, upper[:, 0], lower[:, 0], 7)),
+        ("supertrend_direction_cross", lambda b: b.supertrend_direction(close, upper[:, 1], lower[:, 1], 7,
+                                                                         seed_on_cross=True)),
+        ("supertrend_bands_grid", lambda b: b.supertrend_bands_grid(close, upper, lower, starts)),
+        ("supertrend_direction_grid", lambda b: b.supertrend_direction_grid(close, upper, lower, starts,
+                                                                            seed_on_cross=True)),
+        ("breakout_mask", lambda b: b.breakout_mask(high, low, 5)),
+        ("breakout_grid", lambda b: b.breakout_grid(high, low, [1, 5, 20, 55])),
+    ]
+
+
+def _same(expected, actual) -> bool:
+    if isinstance(expected, tuple):
+        return len(expected) == len(actual) and all(_same(e, a) for e, a in zip(expected, actual))
+    expected, actual = np.asarray(expected), np.asarray(actual)
+    if expected.shape != actual.shape:
+        return False
+    if expected.dtype.kind == 'f':
+        return bool(np.allclose(expected, actual, rtol=1e-12, atol=0.0, equal_nan=True))
+    return bool(np.array_equal(expected, actual))
+
+
+def verify_parity(candidate, reference=None, size: int = 2000, seed: int = 7) -> List[str]:
+    """
+    Compare every kernel of a backend with the reference (NumPy) backend
+
+    Args:
+        candidate: Backend to check
+        reference: Reference backend (default: NumpyBackend())
+        size: Length of the synthetic series
+        seed: Random seed
+
+    Returns:
+        Names of the kernels whose output differs (empty list = parity)
+    """
+    reference = reference or NumpyBackend()
+    failures = []
+    for name, call in _parity_cases(size, seed):
+        try:
+            if not _same(call(reference), call(candidate)):
+                failures.append(name)
+        except Exception as e:
+            logger.error(f"Compute backend '{candidate.name}' failed on {name}: {e}")
+            failures.append(name)
+    return failures
+
+
+def create_backend(name: str):
+    """Instantiate a backend by name ('numpy', 'numba' or 'auto'), without checks"""
+    name = (name or "numpy").strip().lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown compute backend '{name}'. Available: {', '.join(BACKENDS)}")
+
+    if name == "numba" or (name == "auto" and NUMBA_AVAILABLE):
+        return NumbaBackend()
+    return NumpyBackend()
+
+
+def select_backend(name: str, verify: bool = True):
+    """
+    Create the requested backend, falling back to NumPy when it is not
+    installed, fails to build or (with verify) disagrees with NumPy
+    """
+    try:
+        backend = create_backend(name)
+    except (RuntimeError, ValueError) as e:
+        logger.warning(f"Compute backend '{name}' unavailable ({e}); using numpy")
+        return NumpyBackend()
+
+    if backend.name != "numpy" and verify:
+        failures = verify_parity(backend)
+        if failures:
+            logger.error(f"Compute backend '{backend.name}' differs from numpy on "
+                         f"{', '.join(failures)}; using numpy")
+            return NumpyBackend()
+
+    logger.info(f"Compute backend: {backend.name}")
+    return backend
+
+
+_active = select_backend(settings.COMPUTE_BACKEND, settings.COMPUTE_BACKEND_VERIFY)
+
+
+def active():
+    """Backend currently used by the module-level kernel functions"""
+    return _active
+
+
+def use_backend(name: str, verify: bool = True):
+    """Switch backend at runtime (same fallbacks as at startup); returns the active backend"""
+    global _active
+    _active = select_backend(name, verify)
+    return _active
+
+
+# ============================================================================
+# Kernel entry points (dispatch to the active backend)
+# ============================================================================
+
+def linear_recurrence(values: np.ndarray, decay: float, gain: float,
+                      start: int, seed: float) -> np.ndarray:
+    """See indicator_kernels.linear_recurrence()"""
+    return _active.linear_recurrence(values, decay, gain, start, seed)
+
+
+def wilder_sum(values: np.ndarray, period: int) -> np.ndarray:
+    """See indicator_kernels.wilder_sum()"""
+    return _active.wilder_sum(values, period)
+
+
+def wilder_average(values: np.ndarray, period: int, start: int) -> np.ndarray:
+    """See indicator_kernels.wilder_average()"""
+    return _active.wilder_average(values, period, start)
+
+
+def supertrend_bands(close: np.ndarray, basic_upper: np.ndarray, basic_lower: np.ndarray,
+                     start: int) -> Tuple[np.ndarray, np.ndarray]:
+    """See indicator_kernels.supertrend_bands()"""
+    return _active.supertrend_bands(close, basic_upper, basic_lower, start)
+
+
+def supertrend_direction(close: np.ndarray, final_upper: np.ndarray, final_lower: np.ndarray,
+                         start: int, seed_on_cross: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """See indicator_kernels.supertrend_direction()"""
+    return _active.supertrend_direction(close, final_upper, final_lower, start, seed_on_cross)
+
+
+def supertrend_bands_grid(close: np.ndarray, basic_upper: np.ndarray, basic_lower: np.ndarray,
+                          start) -> Tuple[np.ndarray, np.ndarray]:
+    """See indicator_kernels.supertrend_bands_grid()"""
+    return _active.supertrend_bands_grid(close, basic_upper, basic_lower, start)
+
+
+def supertrend_direction_grid(close: np.ndarray, final_upper: np.ndarray, final_lower: np.ndarray,
+                              start, seed_on_cross: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """See indicator_kernels.supertrend_direction_grid()"""
+    return _active.supertrend_direction_grid(close, final_upper, final_lower, start, seed_on_cross)
+
+
+def breakout_grid(high: np.ndarray, low: np.ndarray, lookbacks) -> Tuple[np.ndarray, np.ndarray]:
+    """See indicator_kernels.breakout_grid()"""
+    return _active.breakout_grid(high, low, lookbacks)
+
+
+def breakout_mask(high: np.ndarray, low: np.ndarray, lookback: int) -> np.ndarray:
+    """See indicator_kernels.breakout_mask()"""
+    return _active.breakout_mask(high, low, lookback)
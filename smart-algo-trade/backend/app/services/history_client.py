@@ -0,0 +1,217 @@
+"""
+History Client
+Process-wide Fyers history client with request coalescing
+
+The indicator, pattern, trading and portfolio services all load candles
+through this one client instead of building their own FyersModel:
+
+- One requests.Session (keep-alive, pooled connections) carries every
+  history call, instead of a new TLS connection per request.
+- Identical requests in flight at the same time are coalesced
+  (singleflight): the first caller does the work, the others wait for its
+  result. When the dashboard opens and 5-10 panels ask for the same
+  symbol / resolution / range, the broker sees one call.
+- Candles come from the candle store, so only missing days hit the broker.
+
+Coalesced callers share one DataFrame. Each caller gets a shallow copy
+(adding or replacing columns stays private); the candle arrays underneath
+are shared, so they are marked non-writeable before the frame is handed
+out. On pandas 3 (copy-on-write) an in-place write on the copy simply
+copies the column first; on pandas 2 it raises instead of silently
+changing every other caller's candles.
+
+    df = history_client.fetch_ohlc("NSE:SBIN-EQ", "15", 30)
+"""
+
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.services.candle_store import candle_store
+from app.services.pivot_store import trading_day
+from config import settings
+
+# Try to import Fyers API
+try:
+    from fyers_apiv3 import fyersModel
+    FYERS_AVAILABLE = True
+except ImportError:
+    FYERS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+HISTORY_URL = "https://api-t1.fyers.in/data/history"
+
+
+def _freeze(df: pd.DataFrame) -> pd.DataFrame:
+    """Mark the arrays backing every column non-writeable (in place)"""
+    for name in df.columns:
+        values = df[name].array
+        # Datetime columns: asi8 is an int64 view of the backing array
+        array = values.asi8 if hasattr(values, "asi8") else np.asarray(values)
+        while isinstance(array.base, np.ndarray):
+            array = array.base
+        array.flags.writeable = False
+    return df
+
+
+class _Call:
+    """One in-flight request and the callers waiting for it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class HistoryClient:
+    """
+    Shared Fyers client for history requests
+
+    Args:
+        timeout: HTTP timeout per history request (seconds)
+        pool_size: Keep-alive connections kept open to the data API
+    """
+
+    def __init__(self, timeout: Optional[float] = None, pool_size: Optional[int] = None):
+        self.fyers = None
+        self.client_id = None
+        self.access_token = None
+        self.initialized = False
+        self.timeout = timeout or settings.HISTORY_HTTP_TIMEOUT
+        pool_size = pool_size or max(settings.SCAN_MAX_WORKERS, settings.HISTORY_DOWNLOAD_WORKERS)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+
+        self._inflight: Dict[Hashable, _Call] = {}
+        self._inflight_lock = threading.Lock()
+        self._stats = {"requests": 0, "coalesced": 0, "broker_calls": 0, "errors": 0}
+        self._init_fyers()
+
+    def _init_fyers(self):
+        """Initialize the Fyers client from client_id.txt / access_token.txt"""
+        if not FYERS_AVAILABLE:
+            logger.warning("Fyers API not available.")
+            return
+
+        try:
+            client_id_path = Path("client_id.txt")
+            access_token_path = Path("access_token.txt")
+
+            if client_id_path.exists() and access_token_path.exists():
+                self.client_id = client_id_path.read_text().strip()
+                self.access_token = access_token_path.read_text().strip()
+
+                self.fyers = fyersModel.FyersModel(
+                    client_id=self.client_id,
+                    is_async=False,
+                    token=self.access_token,
+                    log_path=""
+                )
+                self.initialized = True
+                logger.info("Shared Fyers history client initialized")
+            else:
+                logger.warning("Fyers credentials not found.")
+
+        except Exception as e:
+            logger.error(f"Failed to initialize Fyers client: {e}")
+
+    # ------------------------------------------------------------------
+    # Singleflight
+    # ------------------------------------------------------------------
+
+    def _singleflight(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn once for all concurrent callers with the same key"""
+        with self._inflight_lock:
+            self._stats["requests"] += 1
+            call = self._inflight.get(key)
+            if call is None:
+                call = self._inflight[key] = _Call()
+                leader = True
+            else:
+                self._stats["coalesced"] += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+            call.done.set()
+        return call.result
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+
+    def _get(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """One history GET over the shared session (same shape as FyersModel.history)"""
+        self._stats["broker_calls"] += 1
+        try:
+            response = self.session.get(
+                HISTORY_URL,
+                params=data,
+                headers={
+                    "Authorization": f"{self.client_id}:{self.access_token}",
+                    "Content-Type": "application/json",
+                    "version": "3"
+                },
+                timeout=self.timeout,
+            )
+            try:
+                return response.json()
+            except ValueError:
+                return {"s": "error", "code": response.status_code, "message": response.text[:200]}
+        except requests.RequestException as e:
+            self._stats["errors"] += 1
+            logger.error(f"History request failed for {data.get('symbol')}: {e}")
+            return {"s": "error", "code": -99, "message": str(e)}
+
+    def history(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Drop-in for FyersModel.history(data) with keep-alive and coalescing"""
+        if not self.initialized:
+            return None
+        key = ("history",) + tuple(sorted((k, str(v)) for k, v in data.items()))
+        return self._singleflight(key, lambda: self._get(data))
+
+    def fetch_ohlc(self, ticker: str, interval: str, duration: int) -> Optional[pd.DataFrame]:
+        """
+        Last `duration` days of candles (Timestamp in IST), via the candle store
+
+        Returns:
+            A shallow copy of the shared (read-only) DataFrame, or None when unavailable
+        """
+        if not self.initialized:
+            return None
+        key = ("ohlc", ticker, str(interval), int(duration), trading_day())
+        df = self._singleflight(key, lambda: self._load_ohlc(ticker, str(interval), duration))
+        return None if df is None else df.copy(deep=False)
+
+    def _load_ohlc(self, ticker: str, interval: str, duration: int) -> Optional[pd.DataFrame]:
+        df = candle_store.fetch_ohlc(self.history, ticker, interval, duration)
+        return None if df is None else _freeze(df)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._inflight_lock:
+            return {"initialized": self.initialized, "in_flight": len(self._inflight), **self._stats}
+
+
+# Global client shared by every service
+history_client = HistoryClient()
@@ -0,0 +1,206 @@
+"""
+History Downloader
+Parallel chunked full-history backfill into the candle store
+
+A backfill (e.g. ten years of 1-minute NIFTY) is planned up front: the
+days the candle store does not hold yet are split into ranges a single
+Fyers history request may cover, and the chunks are fetched concurrently
+under a shared rate limit, each with its own retries. The raw candle rows
+are collected per chunk and assembled once at the end - one concatenate,
+one sort - then written into the candle store, so later fetch_ohlc() calls
+for the same series are served from disk.
+
+    df = history_downloader.download(fyers.history, "NSE:NIFTY50-INDEX", "1", date(2015, 1, 1))
+
+Long backfills can run as background jobs (start()) whose progress is
+polled with job().
+"""
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.candle_store import (
+    CandleStore, HistoryCall, candle_store, candles_to_frame, chunk_ranges, normalise_candles
+)
+from app.services.pivot_store import trading_day
+from app.services.watchlist_scanner import RateLimiter
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+class HistoryDownloader:
+    """
+    Concurrent chunked history downloads
+
+    Args:
+        store: Candle store the downloads are written into
+        max_workers: Concurrent history requests
+        rate_limit: Max history requests per second across all downloads
+        retries: Extra attempts per failed chunk
+        retry_delay: Seconds before the first retry (doubled on each retry)
+    """
+
+    def __init__(self, store: Optional[CandleStore] = None, max_workers: Optional[int] = None,
+                 rate_limit: Optional[float] = None, retries: Optional[int] = None,
+                 retry_delay: float = 1.0):
+        self.store = store or candle_store
+        self.max_workers = max(1, max_workers or settings.HISTORY_DOWNLOAD_WORKERS)
+        self.rate_limiter = RateLimiter(rate_limit if rate_limit is not None else settings.HISTORY_DOWNLOAD_RATE_LIMIT)
+        self.retries = settings.HISTORY_DOWNLOAD_RETRIES if retries is None else max(0, retries)
+        self.retry_delay = retry_delay
+
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._jobs_lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Download
+    # ------------------------------------------------------------------
+
+    def plan(self, symbol: str, resolution: str, start: date, end: date,
+             refresh: bool = False) -> List[Tuple[date, date]]:
+        """Chunk ranges still to fetch for days [start, end]"""
+        gaps = [(start, end)] if refresh else self.store.missing(symbol, resolution, start, end)
+        return [chunk for gap_start, gap_end in gaps for chunk in chunk_ranges(gap_start, gap_end, resolution)]
+
+    def _fetch_chunk(self, history: HistoryCall, symbol: str, resolution: str,
+                     chunk: Tuple[date, date]) -> Optional[np.ndarray]:
+        """Candle rows of one chunk, retried with backoff; None when every attempt failed"""
+        for attempt in range(self.retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                candles = self.store.request_candles(history, symbol, resolution, chunk[0], chunk[1])
+            except Exception as e:
+                logger.warning(f"History chunk {symbol} {chunk[0]}..{chunk[1]} failed: {e}")
+                candles = None
+            if candles is not None:
+                return np.asarray(candles, dtype=np.float64).reshape(-1, 6)
+            if attempt < self.retries:
+                time.sleep(self.retry_delay * (2 ** attempt))
+        return None
+
+    def download(self, history: HistoryCall, symbol: str, resolution: str, start: date,
+                 end: Optional[date] = None, refresh: bool = False,
+                 progress: Optional[ProgressCallback] = None) -> Optional[pd.DataFrame]:
+        """
+        Fetch days [start, end] (default: up to today) and store them
+
+        Args:
+            history: Broker history call (FyersModel.history)
+            refresh: Refetch days the store already holds
+            progress: Called with the download status after every chunk
+
+        Returns:
+            OHLC DataFrame (Timestamp in IST) of the whole range, or None
+            when there are no candles at all
+        """
+        resolution = str(resolution)
+        end = end or trading_day()
+        chunks = self.plan(symbol, resolution, start, end, refresh)
+        status = {
+            "symbol": symbol,
+            "resolution": resolution,
+            "range_from": start.isoformat(),
+            "range_to": end.isoformat(),
+            "chunks": len(chunks),
+            "chunks_done": 0,
+            "chunks_failed": [],
+            "candles": 0,
+            "started_at": datetime.now().isoformat(),
+        }
+        if progress:
+            progress(dict(status))
+
+        results: Dict[int, np.ndarray] = {}
+        if chunks:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as pool:
+                futures = {pool.submit(self._fetch_chunk, history, symbol, resolution, chunk): i
+                           for i, chunk in enumerate(chunks)}
+                for future in as_completed(futures):
+                    i = futures[future]
+                    rows = future.result()
+                    if rows is None:
+                        status["chunks_failed"].append([chunks[i][0].isoformat(), chunks[i][1].isoformat()])
+                    else:
+                        results[i] = rows
+                        status["candles"] += len(rows)
+                    status["chunks_done"] += 1
+                    if progress:
+                        progress(dict(status))
+
+        # Assemble once: chunks in order, one sort / dedupe
+        done = sorted(results)
+        rows = np.concatenate([results[i] for i in done]) if done else np.empty((0, 6))
+
+        if self.store.enabled:
+            self.store.ingest(symbol, resolution, [chunks[i] for i in done], rows)
+            times, columns = self.store.read(symbol, resolution, start, end)
+        else:
+            rows = normalise_candles(rows)
+            times = rows[:, 0].astype(np.int64)
+            columns = {"o": rows[:, 1], "h": rows[:, 2], "l": rows[:, 3], "c": rows[:, 4],
+                       "v": rows[:, 5].astype(np.int64)}
+
+        if status["chunks_failed"]:
+            logger.warning(f"Backfill {symbol} {resolution}: {len(status['chunks_failed'])} of {len(chunks)} chunks failed")
+        logger.info(f"Backfill {symbol} {resolution} {start}..{end}: fetched {len(done)} chunks, "
+                    f"{len(times)} candles in range")
+        if len(times) == 0:
+            return None
+        return candles_to_frame(times, columns)
+
+    # ------------------------------------------------------------------
+    # Background jobs
+    # ------------------------------------------------------------------
+
+    def start(self, history: HistoryCall, symbol: str, resolution: str, start: date,
+              end: Optional[date] = None, refresh: bool = False) -> Dict[str, Any]:
+        """Run download() in a daemon thread; returns the job status"""
+        job_id = uuid.uuid4().hex[:12]
+        job = {"job_id": job_id, "state": "running", "symbol": symbol, "resolution": str(resolution)}
+        with self._jobs_lock:
+            self._jobs[job_id] = job
+
+        def update(status: Dict[str, Any]) -> None:
+            with self._jobs_lock:
+                job.update(status)
+
+        def run():
+            try:
+                df = self.download(history, symbol, resolution, start, end, refresh, progress=update)
+                with self._jobs_lock:
+                    job["state"] = "partial" if job.get("chunks_failed") else "completed"
+                    job["rows"] = 0 if df is None else len(df)
+            except Exception as e:
+                logger.error(f"Backfill job {job_id} failed: {e}")
+                with self._jobs_lock:
+                    job["state"] = "error"
+                    job["error"] = str(e)
+            with self._jobs_lock:
+                job["finished_at"] = datetime.now().isoformat()
+
+        threading.Thread(target=run, name=f"history-backfill-{job_id}", daemon=True).start()
+        return self.job(job_id)
+
+    def job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._jobs_lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        with self._jobs_lock:
+            return [dict(job) for job in self._jobs.values()]
+
+
+# Global downloader (shared rate limit for all backfills)
+history_downloader = HistoryDownloader()
@@ -0,0 +1,246 @@
+"""
+Indicator Cache
+Bar-aware LRU cache for indicator endpoint responses
+
+Repeat requests for the same (symbol, resolution, duration, indicator,
+params) within one candle are answered from memory. The key includes the
+start time of the last CLOSED candle, computed from the clock and the NSE
+session (09:15 - 15:30 IST, candles anchored at 09:15), so entries stop
+matching - and are dropped - as soon as a new bar closes.
+
+The cache is bounded by entry count and by an estimate of the response
+size, evicts least recently used entries first and keeps hit / miss /
+eviction / invalidation counters for the stats endpoint.
+"""
+
+import functools
+import json
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from pydantic import BaseModel
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+IST_OFFSET = 19800              # +05:30 in seconds
+SESSION_OPEN = 9 * 3600 + 15 * 60
+SESSION_CLOSE = 15 * 3600 + 30 * 60
+DAY = 86400
+
+
+# ============================================================================
+# Candle clock
+# ============================================================================
+
+def resolution_seconds(resolution: str) -> Optional[int]:
+    """Candle length in seconds for intraday resolutions ("1", "5", "60" ...), None for D/W/M"""
+    try:
+        return int(str(resolution).strip()) * 60
+    except ValueError:
+        return None
+
+
+def _last_session_close(ist_day: int, ist_seconds: int) -> int:
+    """IST-shifted epoch of the most recent session close at or before the given time"""
+    day = ist_day
+    if not (_is_weekday(day) and ist_seconds >= SESSION_CLOSE):
+        day -= DAY
+        while not _is_weekday(day):
+            day -= DAY
+    return day + SESSION_CLOSE
+
+
+def _is_weekday(ist_day: int) -> bool:
+    # Epoch day 0 (1970-01-01) was a Thursday
+    return ((ist_day // DAY) + 3) % 7 < 5
+
+
+def last_closed_candle(resolution: str, now: Optional[float] = None) -> int:
+    """
+    Epoch seconds identifying the last closed candle for a resolution
+
+    Intraday: start of the last closed candle of the running session
+    (candles anchored at 09:15 IST). Outside market hours, and for daily /
+    weekly / monthly resolutions, the close of the most recent session -
+    so the value only changes when a new candle can have closed.
+    Exchange holidays are not known here; they only cost cache misses.
+
+    Args:
+        resolution: Fyers resolution ("1", "5", "15", "60", "D", ...)
+        now: Epoch seconds (default: current time)
+
+    Returns:
+        Epoch seconds (UTC)
+    """
+    ist_now = int(time.time() if now is None else now) + IST_OFFSET
+    ist_day = ist_now - ist_now % DAY
+    ist_seconds = ist_now - ist_day
+
+    length = resolution_seconds(resolution)
+    in_session = _is_weekday(ist_day) and SESSION_OPEN <= ist_seconds < SESSION_CLOSE
+
+    if length and in_session:
+        forming_start = SESSION_OPEN + ((ist_seconds - SESSION_OPEN) // length) * length
+        if forming_start > SESSION_OPEN:
+            return ist_day + forming_start - length - IST_OFFSET
+        # First candle of the day still forming: last closed one is yesterday's
+
+    return _last_session_close(ist_day, ist_seconds) - IST_OFFSET
+
+
+# ============================================================================
+# LRU cache
+# ============================================================================
+
+def approximate_size(obj: Any) -> int:
+    """Rough deep size in bytes of a JSON-like response (dict/list/scalars)"""
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(approximate_size(k) + approximate_size(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(approximate_size(v) for v in obj)
+    return sys.getsizeof(obj)
+
+
+class IndicatorCache:
+    """
+    Thread-safe LRU cache bounded by entries and approximate bytes
+
+    Keys are tuples whose first two items are (symbol, resolution) and whose
+    last item is the last-closed-candle marker; when a newer marker is seen
+    for a symbol/resolution, its older entries are invalidated.
+    """
+
+    def __init__(self, max_entries: int = 512, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._latest_candle: Dict[Tuple[str, str], int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        with self._lock:
+            self._observe_candle(key)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Tuple, value: Any) -> None:
+        size = approximate_size(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._observe_candle(key)
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+
+            self._entries[key] = (value, size)
+            self._bytes += size
+
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def _observe_candle(self, key: Tuple) -> None:
+        """Drop a symbol/resolution's entries once a newer candle has closed (lock held)"""
+        series, candle = (key[0], key[1]), key[-1]
+        latest = self._latest_candle.get(series)
+        if latest is not None and candle <= latest:
+            return
+
+        self._latest_candle[series] = candle
+        if latest is None:
+            return
+
+        stale = [k for k in self._entries if (k[0], k[1]) == series and k[-1] < candle]
+        for k in stale:
+            self._bytes -= self._entries.pop(k)[1]
+        self.invalidations += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._latest_candle.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+
+def cached_indicator(cache: IndicatorCache, indicator: str) -> Callable:
+    """
+    Cache decorator for async indicator endpoints
+
+    The key is built from the endpoint arguments (pydantic request bodies
+    are flattened): symbol, resolution, duration, the indicator name, the
+    remaining parameters and last_closed_candle(resolution). Only
+    "status": "success" responses are stored. The wrapped function keeps
+    its signature, so FastAPI still sees the original parameters.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            params: Dict[str, Any] = {}
+            for value in list(args) + list(kwargs.values()):
+                if isinstance(value, BaseModel):
+                    params.update(value.model_dump())
+            params.update({k: v for k, v in kwargs.items() if not isinstance(v, BaseModel)})
+
+            symbol = str(params.pop("symbol", ""))
+            resolution = str(params.pop("resolution", ""))
+            duration = params.pop("duration", None)
+            key = (
+                symbol,
+                resolution,
+                duration,
+                indicator,
+                json.dumps(params, sort_keys=True, default=str),
+                last_closed_candle(resolution)
+            )
+
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+            response = await func(*args, **kwargs)
+            if isinstance(response, dict) and response.get("status") == "success":
+                cache.put(key, response)
+            return response
+
+        return wrapper
+    return decorator
+
+
+# Global cache instance
+indicator_cache = IndicatorCache(
+    max_entries=settings.INDICATOR_CACHE_MAX_ENTRIES,
+    max_bytes=settings.INDICATOR_CACHE_MAX_MB * 1024 * 1024
+)
@@ -0,0 +1,504 @@
+"""
+Indicator Kernels
+Array-level building blocks for the technical indicator services
+
+The kernels work on contiguous float64 NumPy arrays and never touch pandas
+indexing, so the services can run their path-dependent recursions
+(Wilder smoothing, Supertrend bands, trend flips) without per-row df.loc
+reads and writes or Python list appends.
+"""
+
+import logging
+from typing import Callable, Sequence, Tuple
+
+import numpy as np
+from scipy.signal import lfilter
+
+logger = logging.getLogger(__name__)
+
+
+def as_float_array(values) -> np.ndarray:
+    """Return values as a contiguous float64 array (no copy when already one)"""
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+# ============================================================================
+# Exponential moving average
+# ============================================================================
+
+
+def ewm_mean(values: np.ndarray, alpha: float, min_periods: int = 0) -> np.ndarray:
+    """
+    pandas ewm(alpha=alpha, adjust=True, min_periods=min_periods).mean() on an array
+
+    The adjusted EWM is num[t] / den[t] with
+        num[t] = x[t] + (1 - alpha) * num[t-1]
+        den[t] = 1    + (1 - alpha) * den[t-1]
+    - two linear recurrences, each run as one lfilter call. NaN inputs add
+    nothing but still decay the weights (ignore_na=False), leading NaNs are
+    skipped, and min_periods counts valid observations, as in pandas.
+
+    Args:
+        values: Input series
+        alpha: Smoothing factor (span: 2/(span+1), com: 1/(1+com))
+        min_periods: Valid observations required before output starts
+
+    Returns:
+        EWM array with the same length as values
+    """
+    x = as_float_array(values)
+    out = np.full(len(x), np.nan, dtype=np.float64)
+
+    valid = ~np.isnan(x)
+    if not valid.any():
+        return out
+
+    first = int(np.argmax(valid))
+    valid = valid[first:]
+    decay = 1.0 - alpha
+
+    num = lfilter([1.0], [1.0, -decay], np.where(valid, x[first:], 0.0))
+    den = lfilter([1.0], [1.0, -decay], valid.astype(np.float64))
+
+    result = num / den
+    result[np.cumsum(valid) < max(min_periods, 1)] = np.nan
+    out[first:] = result
+    return out
+
+
+# ============================================================================
+# Weighted moving average
+# ============================================================================
+
+
+def weighted_moving_average(values: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """
+    Weighted moving average as one convolution
+
+        WMA[i] = values[i] * w[0] + values[i-1] * w[1] + ... + values[i-p+1] * w[p-1]
+
+    weights[0] applies to the most recent value, which is exactly the ordering
+    np.convolve uses, so the weights are passed through unreversed. The first
+    p-1 outputs (insufficient data) are NaN.
+
+    Args:
+        values: Input series
+        weights: Weights, most recent first (not normalised here)
+
+    Returns:
+        WMA array with the same length as values
+    """
+    x = as_float_array(values)
+    w = as_float_array(weights)
+    period = len(w)
+    out = np.full(len(x), np.nan, dtype=np.float64)
+
+    if period == 0 or len(x) < period:
+        return out
+
+    out[period - 1:] = np.convolve(x, w, mode='valid')
+    return out
+
+
+# ============================================================================
+# Wilder / RMA smoothing
+# ============================================================================
+
+
+def linear_recurrence(values: np.ndarray, decay: float, gain: float,
+                      start: int, seed: float) -> np.ndarray:
+    """
+    First-order recursive filter over a whole array
+
+        y[start] = seed
+        y[i] = decay * y[i-1] + gain * x[i]     for i > start
+        y[i] = NaN                              for i < start
+
+    Runs as a single linear IIR filter (scipy.signal.lfilter) with the seed
+    supplied as the initial filter state, so there is no per-row Python work.
+    A NaN input after start propagates to every later output, exactly as the
+    equivalent Python loop would.
+
+    Args:
+        values: Input series x
+        decay: Feedback coefficient applied to the previous output
+        gain: Coefficient applied to the current input
+        start: Index of the seed value
+        seed: Output value at start
+
+    Returns:
+        Filtered array with the same length as values
+    """
+    x = as_float_array(values)
+    out = np.full(len(x), np.nan, dtype=np.float64)
+
+    if start < 0 or start >= len(x):
+        return out
+
+    out[start] = seed
+    if start + 1 < len(x):
+        out[start + 1:], _ = lfilter([gain], [1.0, -decay], x[start + 1:], zi=[decay * seed])
+
+    return out
+
+
+def wilder_sum(values: np.ndarray, period: int,
+               recurrence: Callable = linear_recurrence) -> np.ndarray:
+    """
+    Wilder's running sum (the TRn / DMn smoothing used by ADX)
+
+        y[period] = sum(x[0:period+1])          (NaNs skipped, as pandas .sum())
+        y[i] = y[i-1] - y[i-1] / period + x[i]
+
+    Args:
+        values: Input series
+        period: Smoothing period
+        recurrence: linear_recurrence() implementation (see compute_backend)
+
+    Returns:
+        Smoothed array, NaN before index period
+    """
+    x = as_float_array(values)
+    if period >= len(x):
+        return np.full(len(x), np.nan, dtype=np.float64)
+
+    seed = float(np.nansum(x[:period + 1]))
+    return recurrence(x, decay=1.0 - 1.0 / period, gain=1.0, start=period, seed=seed)
+
+
+def wilder_average(values: np.ndarray, period: int, start: int,
+                   recurrence: Callable = linear_recurrence) -> np.ndarray:
+    """
+    Wilder's moving average (RMA / SMMA)
+
+        y[start] = mean(x[start-period+1:start+1])     (NaNs skipped, as pandas .mean())
+        y[i] = ((period - 1) * y[i-1] + x[i]) / period
+
+    Args:
+        values: Input series
+        period: Smoothing period
+        start: Index of the first (seed) average
+        recurrence: linear_recurrence() implementation (see compute_backend)
+
+    Returns:
+        Smoothed array, NaN before start
+    """
+    x = as_float_array(values)
+    if start >= len(x) or start < 0:
+        return np.full(len(x), np.nan, dtype=np.float64)
+
+    window = x[max(start - period + 1, 0):start + 1]
+    window = window[~np.isnan(window)]
+    seed = float(window.mean()) if len(window) else np.nan
+
+    return recurrence(x, decay=(period - 1) / period, gain=1.0 / period, start=start, seed=seed)
+
+
+# ============================================================================
+# Supertrend
+# ============================================================================
+
+
+def supertrend_bands(close: np.ndarray, basic_upper: np.ndarray, basic_lower: np.ndarray,
+                     start: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ratchet the basic Supertrend bands into the final bands
+
+    For every index i >= start:
+        FinalUpper[i] = min(BasicUpper[i], FinalUpper[i-1]) if Close[i-1] <= FinalUpper[i-1] else BasicUpper[i]
+        FinalLower[i] = max(BasicLower[i], FinalLower[i-1]) if Close[i-1] >= FinalLower[i-1] else BasicLower[i]
+
+    Indexes before start keep the basic band values.
+
+    Args:
+        close: Close prices
+        basic_upper: HL2 + multiplier * ATR
+        basic_lower: HL2 - multiplier * ATR
+        start: First index the ratchet is applied to (must be >= 1)
+
+    Returns:
+        Tuple of (final_upper, final_lower) arrays
+    """
+    # The recursion is inherently sequential, so it runs over plain Python
+    # floats - far cheaper per element than NumPy scalar indexing.
+    c = as_float_array(close).tolist()
+    fu = as_float_array(basic_upper).tolist()
+    fl = as_float_array(basic_lower).tolist()
+
+    for i in range(max(start, 1), len(c)):
+        prev_close = c[i - 1]
+
+        if prev_close <= fu[i - 1]:
+            fu[i] = min(fu[i], fu[i - 1])
+
+        if prev_close >= fl[i - 1]:
+            fl[i] = max(fl[i], fl[i - 1])
+
+    return np.array(fu, dtype=np.float64), np.array(fl, dtype=np.float64)
+
+
+def supertrend_direction(close: np.ndarray, final_upper: np.ndarray, final_lower: np.ndarray,
+                         start: int, seed_on_cross: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Run the Supertrend trend-flip recursion over the final bands
+
+    The line starts at index start: on the upper band when Close < FinalUpper,
+    otherwise on the lower band. With seed_on_cross=True the line instead
+    starts at the first candle that crosses a band (the original automated
+    trading behaviour). After seeding:
+        - On the upper band: stay while Close <= FinalUpper, else flip to FinalLower
+        - On the lower band: stay while Close >= FinalLower, else flip to FinalUpper
+
+    Args:
+        close: Close prices
+        final_upper: Final upper band from supertrend_bands()
+        final_lower: Final lower band from supertrend_bands()
+        start: Index the line is seeded at (or searched from, with seed_on_cross)
+        seed_on_cross: Seed on the first band crossing instead of at start
+
+    Returns:
+        Tuple of (supertrend, trend) arrays. Trend is 1 (uptrend), -1 (downtrend)
+        or 0 where the line is not defined.
+    """
+    c = as_float_array(close).tolist()
+    fu = as_float_array(final_upper).tolist()
+    fl = as_float_array(final_lower).tolist()
+    n = len(c)
+
+    strend = [np.nan] * n
+    trend = [0] * n
+
+    if start >= n:
+        return np.array(strend, dtype=np.float64), np.array(trend, dtype=np.int64)
+
+    if seed_on_cross:
+        begin = n
+        for i in range(max(start, 1), n):
+            if c[i - 1] <= fu[i - 1] and c[i] > fu[i]:
+                strend[i], trend[i] = fl[i], 1
+                begin = i + 1
+                break
+            if c[i - 1] >= fl[i - 1] and c[i] < fl[i]:
+                strend[i], trend[i] = fu[i], -1
+                begin = i + 1
+                break
+    else:
+        if c[start] < fu[start]:
+            strend[start], trend[start] = fu[start], -1
+        else:
+            strend[start], trend[start] = fl[start], 1
+        begin = start + 1
+
+    for i in range(begin, n):
+        prev = strend[i - 1]
+
+        if prev == fu[i - 1]:
+            # Was on upper band (downtrend)
+            if c[i] <= fu[i]:
+                strend[i], trend[i] = fu[i], -1
+            else:
+                strend[i], trend[i] = fl[i], 1
+        elif prev == fl[i - 1]:
+            # Was on lower band (uptrend)
+            if c[i] >= fl[i]:
+                strend[i], trend[i] = fl[i], 1
+            else:
+                strend[i], trend[i] = fu[i], -1
+
+    return np.array(strend, dtype=np.float64), np.array(trend, dtype=np.int64)
+
+
+def supertrend_bands_grid(close: np.ndarray, basic_upper: np.ndarray, basic_lower: np.ndarray,
+                          start) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    supertrend_bands() for many parameter sets at once
+
+    Args:
+        close: Close prices, shape (n,)
+        basic_upper: Basic upper bands, shape (n, k) - one column per parameter set
+        basic_lower: Basic lower bands, shape (n, k)
+        start: First index the ratchet is applied to - an int, or one per column
+
+    Returns:
+        Tuple of (final_upper, final_lower), each shaped (n, k). The time
+        recursion runs once; every step updates all k columns together.
+    """
+    c = as_float_array(close)
+    fu = np.array(basic_upper, dtype=np.float64, order='C')
+    fl = np.array(basic_lower, dtype=np.float64, order='C')
+    starts = np.maximum(np.broadcast_to(np.asarray(start), fu.shape[1:]), 1)
+
+    first = int(starts.min()) if starts.size else len(c)
+    uniform = bool((starts == first).all())
+
+    for i in range(first, len(c)):
+        prev_close = c[i - 1]
+        ratchet_upper = prev_close <= fu[i - 1]
+        ratchet_lower = prev_close >= fl[i - 1]
+        if not uniform:
+            active = i >= starts
+            ratchet_upper &= active
+            ratchet_lower &= active
+        fu[i] = np.where(ratchet_upper, np.minimum(fu[i], fu[i - 1]), fu[i])
+        fl[i] = np.where(ratchet_lower, np.maximum(fl[i], fl[i - 1]), fl[i])
+
+    return fu, fl
+
+
+def supertrend_direction_grid(close: np.ndarray, final_upper: np.ndarray, final_lower: np.ndarray,
+                              start, seed_on_cross: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    supertrend_direction() for many parameter sets at once
+
+    Args:
+        close: Close prices, shape (n,)
+        final_upper: Final upper bands, shape (n, k)
+        final_lower: Final lower bands, shape (n, k)
+        start: Seed index (or search start, with seed_on_cross) - an int, or one per column
+        seed_on_cross: Seed each column on its first band crossing
+
+    Returns:
+        Tuple of (supertrend, trend), each shaped (n, k)
+    """
+    c = as_float_array(close)
+    fu = np.asarray(final_upper, dtype=np.float64)
+    fl = np.asarray(final_lower, dtype=np.float64)
+    n, k = fu.shape
+
+    strend = np.full((n, k), np.nan, dtype=np.float64)
+    trend = np.zeros((n, k), dtype=np.int64)
+
+    starts = np.broadcast_to(np.asarray(start), (k,))
+    if seed_on_cross:
+        starts = np.maximum(starts, 1)
+    if k == 0 or starts.min() >= n:
+        return strend, trend
+
+    seeded = np.zeros(k, dtype=bool)
+
+    for i in range(int(starts.min()), n):
+        prev = strend[i - 1] if i > 0 else strend[0]
+        upper_i, lower_i, close_i = fu[i], fl[i], c[i]
+
+        # Transitions for columns seeded on an earlier candle
+        on_upper = prev == fu[i - 1]
+        on_lower = ~on_upper & (prev == fl[i - 1])
+        stay_upper = close_i <= upper_i
+        stay_lower = close_i >= lower_i
+        line = np.where(on_upper, np.where(stay_upper, upper_i, lower_i),
+                        np.where(on_lower, np.where(stay_lower, lower_i, upper_i), np.nan))
+        direction = np.where(on_upper, np.where(stay_upper, -1, 1),
+                             np.where(on_lower, np.where(stay_lower, 1, -1), 0))
+
+        if not seeded.all():
+            candidates = ~seeded & (i >= starts)
+            if seed_on_cross:
+                seed_up = candidates & (c[i - 1] <= fu[i - 1]) & (close_i > upper_i)
+                seed_down = candidates & ~seed_up & (c[i - 1] >= fl[i - 1]) & (close_i < lower_i)
+            else:
+                seed_down = candidates & (close_i < upper_i)
+                seed_up = candidates & ~seed_down
+            line = np.where(seed_up, lower_i, np.where(seed_down, upper_i, np.where(seeded, line, np.nan)))
+            direction = np.where(seed_up, 1, np.where(seed_down, -1, np.where(seeded, direction, 0)))
+            seeded |= seed_up | seed_down
+
+        strend[i] = line
+        trend[i] = direction
+
+    return strend, trend
+
+
+# ============================================================================
+# Breakout windows
+# ============================================================================
+
+
+def rolling_max(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing max over the last `window` values at every index, O(n)
+
+    van Herk / Gil-Werman: the series is cut into blocks of `window`;
+    within each block a running max from the left and from the right are
+    taken, and every window (which spans at most two blocks) is the max of
+    one suffix and one prefix - two vectorised accumulates regardless of
+    the window length. NaNs are skipped (as pandas .max()); an all-NaN
+    window, and the first window - 1 positions, are NaN.
+    """
+    v = as_float_array(values)
+    n = len(v)
+    out = np.full(n, np.nan)
+
+    if window < 1 or n < window:
+        return out
+    if window == 1:
+        return v.copy()
+
+    blocks = -(-n // window)
+    padded = np.full(blocks * window, np.nan)
+    padded[:n] = v
+    padded = padded.reshape(blocks, window)
+
+    prefix = np.fmax.accumulate(padded, axis=1).ravel()
+    suffix = np.fmax.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    out[window - 1:] = np.fmax(suffix[:n - window + 1], prefix[window - 1:n])
+    return out
+
+
+def rolling_min(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing min over the last `window` values (see rolling_max)"""
+    return -rolling_max(-as_float_array(values), window)
+
+
+def breakout_grid(high: np.ndarray, low: np.ndarray, lookbacks: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Upside / downside breakouts for several lookbacks in one call, O(n) each
+
+        up[i, j]   = High[i] > max(High[i-k:i])     k = lookbacks[j]
+        down[i, j] = Low[i]  < min(Low[i-k:i])
+
+    The first k candles are never breakouts; NaNs inside a window are
+    skipped (as pandas .max() / .min()).
+
+    Returns:
+        (up, down) boolean arrays shaped (n, len(lookbacks))
+    """
+    h = as_float_array(high)
+    l = as_float_array(low)
+    n = len(h)
+    up = np.zeros((n, len(lookbacks)), dtype=bool)
+    down = np.zeros((n, len(lookbacks)), dtype=bool)
+
+    for j, lookback in enumerate(lookbacks):
+        lookback = int(lookback)
+        if lookback < 1 or n <= lookback:
+            continue
+        # Window ending at i - 1 = the lookback candles before i
+        prev_high = rolling_max(h[:-1], lookback)[lookback - 1:]
+        prev_low = rolling_min(l[:-1], lookback)[lookback - 1:]
+        with np.errstate(invalid="ignore"):
+            up[lookback:, j] = h[lookback:] > prev_high
+            down[lookback:, j] = l[lookback:] < prev_low
+
+    return up, down
+
+
+def breakout_mask(high: np.ndarray, low: np.ndarray, lookback: int) -> np.ndarray:
+    """
+    Flag candles that break the range of the previous lookback candles
+
+        Breakout[i] = High[i] > max(High[i-lookback:i]) or Low[i] < min(Low[i-lookback:i])
+
+    The first lookback candles are never breakouts; NaNs inside a window are
+    skipped (as pandas .max() / .min()). O(n) via breakout_grid().
+
+    Args:
+        high: High prices
+        low: Low prices
+        lookback: Number of previous candles forming the range
+
+    Returns:
+        Boolean array
+    """
+    up, down = breakout_grid(high, low, [lookback])
+    return up[:, 0] | down[:, 0]
@@ -0,0 +1,530 @@
+"""
+Indicators
+Shared indicator library - the single implementation of every formula
+
+Every function takes plain column arrays (NumPy arrays, lists or pandas
+Series) and returns only the requested output arrays - no DataFrame copy and
+no scratch columns (High-Low, TRn, DIdiff, HL2 ...) left behind. The
+indicators API (including its DataFrame-returning calculate_* methods and
+batches), the automated trading service and the price-action service all
+call these functions, so a value is the same whichever endpoint reports it.
+Recursive parts run on the configured compute backend (compute_backend).
+
+Single-output indicators return one float64 array. Multi-output indicators
+take an `outputs` sequence and return {name: array} for just those outputs;
+work only needed for other outputs is skipped.
+
+Example:
+    >>> from app.services import indicators as ind
+    >>> rsi = ind.rsi(df['Close'], period=14)
+    >>> st = ind.supertrend(df['High'], df['Low'], df['Close'], outputs=("trend",))
+    >>> st["trend"][-1]
+    1
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.services import compute_backend as compute
+from app.services import indicator_kernels as kernels
+
+logger = logging.getLogger(__name__)
+
+
+def _array(values) -> np.ndarray:
+    return kernels.as_float_array(values)
+
+
+def _rolling(values: np.ndarray, period: int) -> pd.core.window.Rolling:
+    """pandas rolling window over an array without copying it into a frame"""
+    return pd.Series(values, copy=False).rolling(window=period)
+
+
+def _check_outputs(outputs: Iterable[str], available: Sequence[str]) -> List[str]:
+    outputs = list(outputs)
+    unknown = [name for name in outputs if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown output(s) {unknown}. Available: {', '.join(available)}")
+    return outputs
+
+
+# ============================================================================
+# Building blocks
+# ============================================================================
+
+def true_range(high, low, close, skipna: bool = False) -> np.ndarray:
+    """
+    True Range = max(High - Low, |High - Previous Close|, |Low - Previous Close|)
+
+    Args:
+        skipna: False -> NaN on the first bar (ATR / ADX convention)
+                True  -> High - Low on the first bar (Supertrend convention)
+    """
+    high, low, close = _array(high), _array(low), _array(close)
+
+    prev_close = np.empty_like(close)
+    prev_close[:1] = np.nan
+    prev_close[1:] = close[:-1]
+
+    hl = high - low
+    if skipna:
+        tr = np.fmax(np.fmax(hl, np.abs(high - prev_close)), np.abs(low - prev_close))
+    else:
+        tr = np.maximum(np.maximum(np.abs(hl), np.abs(high - prev_close)), np.abs(low - prev_close))
+    return tr
+
+
+def close_delta(close) -> np.ndarray:
+    """Bar-to-bar close change; the first bar counts as 0 (as delta.where(...))"""
+    close = _array(close)
+    delta = np.empty_like(close)
+    delta[:1] = 0.0
+    delta[1:] = np.diff(close)
+    return delta
+
+
+def _gains_losses(delta: np.ndarray):
+    """Up / down moves of close_delta()"""
+    return np.maximum(delta, 0.0), np.maximum(-delta, 0.0)
+
+
+# ============================================================================
+# Moving averages
+# ============================================================================
+
+def sma(values, period: int = 20) -> np.ndarray:
+    """Simple moving average (rolling mean, NaN warm-up)"""
+    return _rolling(_array(values), period).mean().to_numpy()
+
+
+def ema(values, period: int = 14, min_periods: int = 0) -> np.ndarray:
+    """Exponential moving average, ewm(span=period, min_periods=min_periods)"""
+    return kernels.ewm_mean(_array(values), 2.0 / (period + 1), min_periods)
+
+
+def wma(values, period: int = 4, weights: Optional[List[float]] = None) -> np.ndarray:
+    """
+    Weighted moving average
+
+    Args:
+        weights: Most recent first; linear [period, ..., 1] when None.
+                 Normalised when they do not sum to ~1.0
+    """
+    if period < 1:
+        raise ValueError(f"Period ({period}) must be >= 1")
+
+    if weights is None:
+        weights = np.arange(period, 0, -1, dtype=np.float64)
+        weights /= weights.sum()
+    else:
+        if len(weights) != period:
+            raise ValueError(f"Weights length ({len(weights)}) must equal period ({period})")
+        weight_sum = sum(weights)
+        if abs(weight_sum - 1.0) > 0.001:
+            weights = [w / weight_sum for w in weights]
+
+    return kernels.weighted_moving_average(_array(values), weights)
+
+
+# ============================================================================
+# Volatility
+# ============================================================================
+
+def atr(high, low, close, period: int = 14, wilder: bool = False,
+        tr: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Average True Range
+
+    Args:
+        wilder: False -> TR.ewm(com=period, min_periods=period) (calculate_atr)
+                True  -> Wilder's RMA seeded at bar `period` (calculate_atr_wilder)
+        tr: Precomputed true_range(high, low, close), to share it between indicators
+    """
+    tr = true_range(high, low, close) if tr is None else _array(tr)
+    if wilder:
+        return compute.wilder_average(tr, period, start=period)
+    return kernels.ewm_mean(tr, 1.0 / (1 + period), period)
+
+
+BOLLINGER_OUTPUTS = ("ma", "upper", "lower", "width")
+
+
+def bollinger_bands(close, period: int = 20, std_dev: float = 2.0,
+                    outputs: Sequence[str] = BOLLINGER_OUTPUTS,
+                    ma: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Bollinger Bands (rolling mean +- std_dev * rolling sample std)
+
+    Unlike calculate_bollinger_bands() the warm-up rows are kept (NaN), so the
+    arrays stay aligned with the input.
+
+    Args:
+        ma: Precomputed sma(close, period), to share it with an SMA of the same period
+    """
+    outputs = _check_outputs(outputs, BOLLINGER_OUTPUTS)
+    rolling = _rolling(_array(close), period)
+
+    ma = rolling.mean().to_numpy() if ma is None else _array(ma)
+    result = {"ma": ma}
+    if set(outputs) - {"ma"}:
+        band = rolling.std().to_numpy() * std_dev
+        result["upper"] = ma + band
+        result["lower"] = ma - band
+        result["width"] = result["upper"] - result["lower"]
+
+    return {name: result[name] for name in outputs}
+
+
+# ============================================================================
+# Momentum
+# ============================================================================
+
+def rsi(close, period: int = 14, wilder: bool = False,
+        delta: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Relative Strength Index
+
+    Args:
+        wilder: False -> rolling means of gains/losses (calculate_rsi)
+                True  -> Wilder's RMA of gains/losses (calculate_rsi_wilder)
+        delta: Precomputed close_delta(close), to share it between RSI variants
+    """
+    gain, loss = _gains_losses(close_delta(close) if delta is None else _array(delta))
+
+    if wilder:
+        avg_gain = compute.wilder_average(gain, period, start=period)
+        avg_loss = compute.wilder_average(loss, period, start=period)
+    else:
+        avg_gain = _rolling(gain, period).mean().to_numpy()
+        avg_loss = _rolling(loss, period).mean().to_numpy()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+MACD_OUTPUTS = ("macd", "signal", "histogram", "fast_ma", "slow_ma")
+
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9,
+         outputs: Sequence[str] = ("macd", "signal", "histogram"),
+         fast_ma: Optional[np.ndarray] = None, slow_ma: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    MACD line, signal line and histogram (ewm spans, min_periods = span)
+
+    Args:
+        fast_ma / slow_ma: Precomputed ema(close, fast, min_periods=fast) /
+                           ema(close, slow, min_periods=slow)
+    """
+    outputs = _check_outputs(outputs, MACD_OUTPUTS)
+    close = _array(close)
+
+    fast_ma = ema(close, fast, min_periods=fast) if fast_ma is None else _array(fast_ma)
+    slow_ma = ema(close, slow, min_periods=slow) if slow_ma is None else _array(slow_ma)
+    macd_line = fast_ma - slow_ma
+    result = {"macd": macd_line, "fast_ma": fast_ma, "slow_ma": slow_ma}
+    if set(outputs) - {"macd"}:
+        result["signal"] = ema(macd_line, signal, min_periods=signal)
+        result["histogram"] = macd_line - result["signal"]
+
+    return {name: result[name] for name in outputs}
+
+
+STOCHASTIC_OUTPUTS = ("k", "d")
+
+
+def stochastic(high, low, close, period: int = 14,
+               outputs: Sequence[str] = STOCHASTIC_OUTPUTS) -> Dict[str, np.ndarray]:
+    """Stochastic K% and D% (3-bar SMA of K%)"""
+    outputs = _check_outputs(outputs, STOCHASTIC_OUTPUTS)
+
+    highest_high = _rolling(_array(high), period).max().to_numpy()
+    lowest_low = _rolling(_array(low), period).min().to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k = (_array(close) - lowest_low) * 100 / (highest_high - lowest_low)
+
+    result = {"k": k}
+    if "d" in outputs:
+        result["d"] = _rolling(k, 3).mean().to_numpy()
+
+    return {name: result[name] for name in outputs}
+
+
+# ============================================================================
+# Trend
+# ============================================================================
+
+ADX_OUTPUTS = ("adx", "di_plus", "di_minus")
+
+
+def adx(high, low, close, period: int = 14, outputs: Sequence[str] = ADX_OUTPUTS,
+        tr: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    ADX with DI+ / DI- (Wilder's running sums, ADX seeded at bar 2*period-1)
+
+    Args:
+        tr: Precomputed true_range(high, low, close)
+    """
+    outputs = _check_outputs(outputs, ADX_OUTPUTS)
+    high, low = _array(high), _array(low)
+    tr = true_range(high, low, close) if tr is None else _array(tr)
+
+    up = np.empty_like(high)
+    down = np.empty_like(low)
+    up[:1] = down[:1] = 0.0
+    up[1:] = np.diff(high)
+    down[1:] = -np.diff(low)
+    dm_plus = np.where((up > down) & (up > 0), up, 0.0)
+    dm_minus = np.where((down > up) & (down > 0), down, 0.0)
+
+    trn = compute.wilder_sum(tr, period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        di_plus = 100 * (compute.wilder_sum(dm_plus, period) / trn)
+        di_minus = 100 * (compute.wilder_sum(dm_minus, period) / trn)
+
+    result = {"di_plus": di_plus, "di_minus": di_minus}
+    if "adx" in outputs:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dx = 100 * (np.abs(di_plus - di_minus) / (di_plus + di_minus))
+        result["adx"] = compute.wilder_average(dx, period, start=2 * period - 1)
+
+    return {name: result[name] for name in outputs}
+
+
+SUPERTREND_OUTPUTS = ("supertrend", "trend", "final_upper", "final_lower", "atr", "basic_upper", "basic_lower")
+
+
+def supertrend(high, low, close, period: int = 7, multiplier: float = 3.0,
+               outputs: Sequence[str] = ("supertrend", "trend"),
+               tr: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Supertrend line and direction (1 = uptrend, -1 = downtrend, 0 = undefined)
+
+    ATR = TR.ewm(com=period, min_periods=period) with TR[0] = High - Low;
+    bands ratchet from bar period+1, the line is seeded at bar period.
+
+    Args:
+        tr: Precomputed true_range(high, low, close, skipna=True)
+    """
+    outputs = _check_outputs(outputs, SUPERTREND_OUTPUTS)
+    high, low, close = _array(high), _array(low), _array(close)
+    tr = true_range(high, low, close, skipna=True) if tr is None else _array(tr)
+
+    atr_values = kernels.ewm_mean(tr, 1.0 / (1 + period), period)
+    hl2 = (high + low) / 2
+    basic_upper = hl2 + multiplier * atr_values
+    basic_lower = hl2 - multiplier * atr_values
+    final_upper, final_lower = compute.supertrend_bands(close, basic_upper, basic_lower, start=period + 1)
+
+    result = {"final_upper": final_upper, "final_lower": final_lower, "atr": atr_values,
+              "basic_upper": basic_upper, "basic_lower": basic_lower}
+    if {"supertrend", "trend"} & set(outputs):
+        result["supertrend"], result["trend"] = compute.supertrend_direction(
+            close, final_upper, final_lower, start=period
+        )
+
+    return {name: result[name] for name in outputs}
+
+
+def supertrend_grid(high, low, close, periods: Sequence[int],
+                    multipliers: Sequence[float]) -> Dict[str, np.ndarray]:
+    """
+    supertrend() for every (period, multiplier) pair in one pass
+
+    True Range is computed once and ATR once per period; the band ratchet and
+    trend recursion run a single time over a (candles x grid) array.
+
+    Returns:
+        {"supertrend", "trend"}, each shaped (n, len(periods), len(multipliers));
+        [:, r, c] equals supertrend(..., periods[r], multipliers[c])
+    """
+    high, low, close = _array(high), _array(low), _array(close)
+    mults = np.asarray(multipliers, dtype=np.float64)
+    n, shape = len(close), (len(close), len(periods), len(mults))
+
+    if n == 0 or not len(periods) or not len(mults):
+        return {"supertrend": np.full(shape, np.nan), "trend": np.zeros(shape, dtype=np.int64)}
+
+    tr = true_range(high, low, close, skipna=True)
+    atr_values = np.column_stack([kernels.ewm_mean(tr, 1.0 / (1 + period), period) for period in periods])
+
+    # Columns ordered period-major: column r * len(mults) + c -> (periods[r], mults[c])
+    hl2 = ((high + low) / 2)[:, None]
+    band = (atr_values[:, :, None] * mults[None, None, :]).reshape(n, -1)
+    starts = np.repeat(np.asarray(periods, dtype=np.int64), len(mults))
+    final_upper, final_lower = compute.supertrend_bands_grid(close, hl2 + band, hl2 - band, start=starts + 1)
+    line, trend = compute.supertrend_direction_grid(close, final_upper, final_lower, start=starts)
+
+    return {"supertrend": line.reshape(shape), "trend": trend.reshape(shape)}
+
+
+# ============================================================================
+# Pivot levels
+# ============================================================================
+
+PIVOT_COLUMNS = ("high", "low", "close", "pivot", "r1", "r2", "r3", "s1", "s2", "s3")
+
+
+def pivot_table(high, low, close) -> np.ndarray:
+    """
+    Classic floor pivots for many sessions (or symbols) at once
+
+    Inputs and every level are rounded to 2 decimals:
+        pivot = (H + L + C) / 3
+        r1 = 2P - L,  r2 = P + (H - L),  r3 = H + 2(P - L)
+        s1 = 2P - H,  s2 = P - (H - L),  s3 = L - 2(H - P)
+
+    Args:
+        high, low, close: Equal-length arrays, one entry per session
+
+    Returns:
+        (n, 10) float array, columns in PIVOT_COLUMNS order
+    """
+    high = np.round(_array(high), 2)
+    low = np.round(_array(low), 2)
+    close = np.round(_array(close), 2)
+    pivot = np.round((high + low + close) / 3, 2)
+    span = high - low
+    return np.column_stack([
+        high, low, close, pivot,
+        np.round(2 * pivot - low, 2),
+        np.round(pivot + span, 2),
+        np.round(high + 2 * (pivot - low), 2),
+        np.round(2 * pivot - high, 2),
+        np.round(pivot - span, 2),
+        np.round(low - 2 * (high - pivot), 2),
+    ])
+
+
+def pivot_levels(high: float, low: float, close: float) -> Dict[str, float]:
+    """
+    Floor pivots from one session's High / Low / Close (see pivot_table)
+
+    Returns:
+        {"high", "low", "close", "pivot", "r1", "r2", "r3", "s1", "s2", "s3"}
+    """
+    row = pivot_table([high], [low], [close])[0]
+    return dict(zip(PIVOT_COLUMNS, row.tolist()))
+
+
+# ============================================================================
+# Trend detection (per-bar labels)
+# ============================================================================
+
+UPTREND, NO_TREND, DOWNTREND = 1, 0, -1
+TREND_LABELS = np.array(["Downtrend", None, "Uptrend"], dtype=object)
+
+
+def _lag(mask: np.ndarray, k: int) -> np.ndarray:
+    """Boolean mask shifted k bars forward; the first k bars are False"""
+    out = np.zeros_like(mask)
+    out[k:] = mask[:len(mask) - k]
+    return out
+
+
+def _candle_masks(open_, high, low, close) -> Dict[str, np.ndarray]:
+    """Per-bar candle colour and high/low progression versus the previous bar"""
+    open_, high, low, close = _array(open_), _array(high), _array(low), _array(close)
+    prev_high = np.concatenate(([np.nan], high[:-1]))
+    prev_low = np.concatenate(([np.nan], low[:-1]))
+    return {
+        "bull": close > open_,
+        "bear": close < open_,
+        "higher_high": high > prev_high,
+        "lower_high": high < prev_high,
+        "higher_low": low > prev_low,
+        "lower_low": low < prev_low,
+    }
+
+
+def _trend_codes(up: np.ndarray, down: np.ndarray) -> np.ndarray:
+    return np.where(up, UPTREND, np.where(down, DOWNTREND, NO_TREND)).astype(np.int8)
+
+
+def _three_candle(m: Dict[str, np.ndarray]):
+    """Up / down masks of the 3-candle pattern ending at each bar"""
+    up = (m["bull"] & _lag(m["bull"], 1) & _lag(m["bull"], 2) &
+          m["higher_high"] & _lag(m["higher_high"], 1) &
+          m["higher_low"] & _lag(m["higher_low"], 1))
+    down = (m["bear"] & _lag(m["bear"], 1) & _lag(m["bear"], 2) &
+            m["lower_high"] & _lag(m["lower_high"], 1) &
+            m["lower_low"] & _lag(m["lower_low"], 1))
+    return up, down
+
+
+def trend_simple(open_, high, low, close) -> np.ndarray:
+    """
+    3-candle trend at every bar (detect_trend_simple)
+
+    Uptrend: 3 green candles with ascending highs and lows; Downtrend: the
+    mirror image. The first 2 bars are always 0.
+
+    Returns:
+        int8 array: 1 = Uptrend, -1 = Downtrend, 0 = none
+    """
+    return _trend_codes(*_three_candle(_candle_masks(open_, high, low, close)))
+
+
+def trend_advanced(open_, high, low, close) -> np.ndarray:
+    """
+    5-candle trend at every bar (detect_trend_advanced)
+
+    The 3-candle pattern plus 2 prior candles of the opposite colour with
+    the opposite high/low progression. The first 4 bars are always 0.
+
+    Returns:
+        int8 array: 1 = Uptrend, -1 = Downtrend, 0 = none
+    """
+    m = _candle_masks(open_, high, low, close)
+    up, down = _three_candle(m)
+
+    up &= (_lag(m["bear"], 3) & _lag(m["bear"], 4) &
+           _lag(m["lower_high"], 2) & _lag(m["lower_high"], 3) &
+           _lag(m["lower_low"], 2) & _lag(m["lower_low"], 3))
+    down &= (_lag(m["bull"], 3) & _lag(m["bull"], 4) &
+             _lag(m["higher_high"], 2) & _lag(m["higher_high"], 3) &
+             _lag(m["higher_low"], 2) & _lag(m["higher_low"], 3))
+
+    return _trend_codes(up, down)
+
+
+def trend_rolling(open_, high, low, close, period: int = 7, threshold: float = 0.7) -> np.ndarray:
+    """
+    Rolling high/low progression trend at every bar (detect_trend_rolling)
+
+    Uptrend: at least `threshold` of the last `period` bars have Low >= the
+    previous Low and the bar is green; Downtrend: High <= previous High and
+    red. Bars before the first full window are 0.
+
+    Returns:
+        int8 array: 1 = Uptrend, -1 = Downtrend, 0 = none
+    """
+    if period < 1:
+        raise ValueError(f"Period ({period}) must be >= 1")
+
+    open_, high, low, close = _array(open_), _array(high), _array(low), _array(close)
+    n = len(close)
+    codes = np.zeros(n, dtype=np.int8)
+    if n < period:
+        return codes
+
+    prev_high = np.concatenate(([np.nan], high[:-1]))
+    prev_low = np.concatenate(([np.nan], low[:-1]))
+
+    def window_share(mask: np.ndarray) -> np.ndarray:
+        total = np.cumsum(mask, dtype=np.int64)
+        counts = total[period - 1:].copy()
+        counts[1:] -= total[:-period]
+        return counts / period
+
+    up = (window_share(low >= prev_low) >= threshold) & (close[period - 1:] > open_[period - 1:])
+    down = (window_share(high <= prev_high) >= threshold) & (close[period - 1:] < open_[period - 1:])
+    codes[period - 1:] = _trend_codes(up, down)
+    return codes
+
+
+def trend_labels(codes: np.ndarray) -> np.ndarray:
+    """Trend codes -> object array of 'Uptrend' / 'Downtrend' / None"""
+    return TREND_LABELS[np.asarray(codes, dtype=np.int64) + 1]
@@ -0,0 +1,432 @@
+"""
+Pattern Index
+Persistent columnar index of candlestick pattern occurrences
+
+Every closed candle that shows at least one pattern is stored once as a
+row of four NumPy columns - symbol id, timeframe id, candle start (epoch
+seconds) and the pattern_scanner bitmask - so questions like "all hammers
+on these symbols in the last 30 days" or "how often did a bullish
+engulfing show up on 15-minute candles" are boolean filters over a few
+arrays instead of a re-fetch and rescan.
+
+Each (symbol, timeframe) partition keeps a watermark (last indexed candle),
+the number of candles scanned and the OHLC of its last few candles;
+update() only scans the candles after the watermark, with those stored
+candles in front as context for the rules that look back (engulfing,
+inside bar, breakout) - so indexing in pieces gives the same rows as one
+scan over the whole history, as long as each frame reaches back to the
+watermark. A frame that starts after the watermark leaves a hole: it is
+recorded in the partition's gaps, the stored candles (from before the
+hole) are dropped as context and indexing resumes as a new span. Callers
+that fetch for the index size the fetch with fetch_days(). The table is
+saved with np.savez as one file.
+
+    pattern_index.update("NSE:SBIN-EQ", "15", df)       # new closed candles only
+    pattern_index.query(patterns=["Hammer"], symbols=nifty, since=days_ago(30))
+    pattern_index.statistics(timeframe="15")
+"""
+
+import logging
+import os
+import threading
+import math
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services import pattern_scanner
+from app.services.indicator_cache import last_closed_candle
+from app.services.pivot_store import IST
+from app.services.swing_levels import epoch_seconds
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = (("symbol", np.int32), ("timeframe", np.int16), ("time", np.int64), ("mask", np.uint16))
+
+
+def pattern_bits(names: Optional[Iterable[str]]) -> int:
+    """
+    Bitmask for pattern names (case-insensitive, "Engulfing" = both sides)
+
+    None / empty -> every pattern
+    """
+    if not names:
+        return (1 << len(pattern_scanner.PATTERN_NAMES)) - 1
+
+    lookup = {name.lower(): bit for name, bit in pattern_scanner.PATTERN_BITS.items()}
+    lookup["engulfing"] = pattern_scanner.ENGULFING
+    bits = 0
+    for name in names:
+        key = name.strip().lower()
+        if key not in lookup:
+            raise ValueError(f"Unknown pattern '{name}'. "
+                             f"Available: {', '.join(pattern_scanner.PATTERN_NAMES)}, Engulfing")
+        bits |= lookup[key]
+    return bits
+
+
+class PatternIndex:
+    """
+    Occurrence table + per-partition watermarks, persisted as .npz
+
+    Args:
+        path: Index file (default PATTERN_INDEX_PATH)
+        autosave_seconds: Minimum spacing of automatic saves after updates
+        breakout_lookback: Breakout rule lookback (also the rescan context)
+    """
+
+    def __init__(self, path: Optional[str] = None, autosave_seconds: float = 60.0,
+                 breakout_lookback: int = 5):
+        self.path = path or settings.PATTERN_INDEX_PATH
+        self.autosave_seconds = autosave_seconds
+        self.breakout_lookback = breakout_lookback
+
+        self._symbols: List[str] = []
+        self._symbol_ids: Dict[str, int] = {}
+        self._timeframes: List[str] = []
+        self._timeframe_ids: Dict[str, int] = {}
+        # (symbol_id, timeframe_id) -> [first_time, last_time, bars]
+        self._partitions: Dict[Tuple[int, int], List[int]] = {}
+        # (symbol_id, timeframe_id) -> OHLC of the last breakout_lookback candles, (k, 4)
+        self._tails: Dict[Tuple[int, int], np.ndarray] = {}
+        # (symbol_id, timeframe_id) -> [(last indexed candle, next indexed candle)] around holes
+        self._gaps: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        # Consolidated columns + appended chunks not yet concatenated
+        self._columns = {name: np.empty(0, dtype=dtype) for name, dtype in _COLUMNS}
+        self._pending: List[Dict[str, np.ndarray]] = []
+
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._saved_at = 0.0
+        self._loaded = False
+
+    # ------------------------------------------------------------------
+    # Dictionaries / storage
+    # ------------------------------------------------------------------
+
+    def _symbol_id(self, symbol: str) -> int:
+        if symbol not in self._symbol_ids:
+            self._symbol_ids[symbol] = len(self._symbols)
+            self._symbols.append(symbol)
+        return self._symbol_ids[symbol]
+
+    def _timeframe_id(self, timeframe: str) -> int:
+        if timeframe not in self._timeframe_ids:
+            self._timeframe_ids[timeframe] = len(self._timeframes)
+            self._timeframes.append(timeframe)
+        return self._timeframe_ids[timeframe]
+
+    def _table(self) -> Dict[str, np.ndarray]:
+        """Consolidated columns (concatenates pending chunks once)"""
+        if self._pending:
+            self._columns = {name: np.concatenate([self._columns[name]] + [c[name] for c in self._pending])
+                             for name, _ in _COLUMNS}
+            self._pending = []
+        return self._columns
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                self._symbols = data["symbols"].tolist()
+                self._timeframes = data["timeframes"].tolist()
+                self._columns = {name: data[name].astype(dtype, copy=False) for name, dtype in _COLUMNS}
+                partitions = data["partitions"]
+                tails, tail_lengths = data["tails"], data["tail_lengths"]
+                gaps = data["gaps"] if "gaps" in data.files else np.empty((0, 4), dtype=np.int64)
+            self._symbol_ids = {s: i for i, s in enumerate(self._symbols)}
+            self._timeframe_ids = {t: i for i, t in enumerate(self._timeframes)}
+            self._partitions = {(int(p[0]), int(p[1])): [int(p[2]), int(p[3]), int(p[4])] for p in partitions}
+            self._tails = {(int(p[0]), int(p[1])): tails[i, :tail_lengths[i]].copy()
+                           for i, p in enumerate(partitions)}
+            self._gaps = {}
+            for s, t, before, after in gaps.tolist():
+                self._gaps.setdefault((s, t), []).append((before, after))
+            logger.info(f"Pattern index loaded: {len(self._columns['time'])} occurrences, "
+                        f"{len(self._partitions)} partitions")
+        except Exception as e:
+            logger.warning(f"Could not load pattern index {self.path}: {e}")
+
+    def save(self) -> None:
+        """Write the index (atomic replace)"""
+        with self._lock:
+            self._ensure_loaded()
+            table = self._table()
+            keys = list(self._partitions)
+            partitions = np.array([[s, t, *self._partitions[(s, t)]] for s, t in keys],
+                                  dtype=np.int64).reshape(-1, 5)
+            width = max([self.breakout_lookback] + [len(self._tails.get(key, ())) for key in keys])
+            tails = np.full((len(keys), width, 4), np.nan)
+            tail_lengths = np.zeros(len(keys), dtype=np.int64)
+            gaps = np.array([[s, t, before, after] for (s, t), holes in self._gaps.items()
+                             for before, after in holes], dtype=np.int64).reshape(-1, 4)
+            for i, key in enumerate(keys):
+                tail = self._tails.get(key)
+                if tail is not None and len(tail):
+                    tails[i, :len(tail)] = tail
+                    tail_lengths[i] = len(tail)
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                tmp = f"{self.path}.tmp.npz"
+                np.savez(tmp, symbols=np.array(self._symbols, dtype=str),
+                         timeframes=np.array(self._timeframes, dtype=str),
+                         partitions=partitions, tails=tails, tail_lengths=tail_lengths, gaps=gaps, **table)
+                os.replace(tmp, self.path)
+                self._dirty = False
+                self._saved_at = time.monotonic()
+            except Exception as e:
+                logger.error(f"Error saving pattern index {self.path}: {e}")
+
+    def flush(self) -> None:
+        """Save if there are unsaved updates"""
+        with self._lock:
+            if self._dirty:
+                self.save()
+
+    def _maybe_save(self) -> None:
+        if self._dirty and time.monotonic() - self._saved_at >= self.autosave_seconds:
+            self.save()
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def watermark(self, symbol: str, timeframe: str) -> Optional[int]:
+        """Start (epoch seconds) of the last indexed candle"""
+        with self._lock:
+            self._ensure_loaded()
+            key = (self._symbol_ids.get(symbol), self._timeframe_ids.get(str(timeframe)))
+            partition = self._partitions.get(key)
+            return partition[1] if partition else None
+
+    def fetch_days(self, symbol: str, timeframe: str, duration: int) -> int:
+        """Days to fetch so the frame reaches back to the watermark (at least duration)"""
+        watermark = self.watermark(symbol, timeframe)
+        if watermark is None:
+            return duration
+        return max(duration, math.ceil((time.time() - watermark) / 86400) + 1)
+
+    def gaps(self, symbol: str, timeframe: str) -> List[Tuple[int, int]]:
+        """Holes of a partition as (last candle before, first candle after), epoch seconds"""
+        with self._lock:
+            self._ensure_loaded()
+            key = (self._symbol_ids.get(symbol), self._timeframe_ids.get(str(timeframe)))
+            return list(self._gaps.get(key, []))
+
+    def update(self, symbol: str, timeframe: str, df: pd.DataFrame, closed_only: bool = True,
+               save: bool = True) -> int:
+        """
+        Index the closed candles of df that are newer than the watermark
+
+        When df starts after the watermark, the candles in between cannot be
+        indexed any more: the hole is recorded (gaps()) and the new candles
+        are scanned without the stored context from before it.
+
+        Args:
+            df: OHLC DataFrame with Timestamp/Open/High/Low/Close, oldest first
+            closed_only: Skip the still-forming candle
+            save: Autosave (rate-limited by autosave_seconds)
+
+        Returns:
+            Number of newly scanned candles
+        """
+        if df is None or len(df) == 0:
+            return 0
+        timeframe = str(timeframe)
+
+        times = epoch_seconds(df["Timestamp"])
+        end = len(times)
+        if closed_only:
+            end = int(np.searchsorted(times, last_closed_candle(timeframe), side="right"))
+
+        with self._lock:
+            self._ensure_loaded()
+            key = (self._symbol_id(symbol), self._timeframe_id(timeframe))
+            partition = self._partitions.get(key)
+            start = 0 if partition is None else int(np.searchsorted(times[:end], partition[1], side="right"))
+            if start >= end:
+                return 0
+
+            # The partition's stored last candles are context only
+            # (previous candle / breakout range)
+            new = np.column_stack([df[col].to_numpy(dtype=float)[start:end]
+                                   for col in ("Open", "High", "Low", "Close")])
+            tail = self._tails.get(key, np.empty((0, 4)))
+            if partition is not None and start == 0:
+                # df does not reach back to the watermark: candles may be missing
+                logger.warning(f"Pattern index {symbol} {timeframe}: no candles between "
+                               f"{partition[1]} and {int(times[0])}; recording a gap")
+                self._gaps.setdefault(key, []).append((int(partition[1]), int(times[0])))
+                tail = np.empty((0, 4))
+            ohlc = np.vstack([tail, new])
+            mask = pattern_scanner.scan_patterns(*ohlc.T, breakout_lookback=self.breakout_lookback)[len(tail):]
+            self._tails[key] = ohlc[-self.breakout_lookback:].copy()
+            new_times = times[start:end]
+
+            hits = np.flatnonzero(mask)
+            if len(hits):
+                self._pending.append({
+                    "symbol": np.full(len(hits), key[0], dtype=np.int32),
+                    "timeframe": np.full(len(hits), key[1], dtype=np.int16),
+                    "time": new_times[hits].astype(np.int64),
+                    "mask": mask[hits].astype(np.uint16),
+                })
+
+            if partition is None:
+                self._partitions[key] = [int(new_times[0]), int(new_times[-1]), len(new_times)]
+            else:
+                partition[1] = int(new_times[-1])
+                partition[2] += len(new_times)
+            self._dirty = True
+            if save:
+                self._maybe_save()
+            return len(new_times)
+
+    def update_many(self, frames: Dict[str, pd.DataFrame], timeframe: str, closed_only: bool = True) -> int:
+        """update() for several symbols, one autosave at the end"""
+        scanned = sum(self.update(symbol, timeframe, df, closed_only, save=False) for symbol, df in frames.items())
+        with self._lock:
+            self._maybe_save()
+        return scanned
+
+    def remove(self, symbol: str, timeframe: Optional[str] = None) -> int:
+        """Drop a symbol's occurrences and watermarks (one timeframe or all)"""
+        with self._lock:
+            self._ensure_loaded()
+            if symbol not in self._symbol_ids:
+                return 0
+            sid = self._symbol_ids[symbol]
+            table = self._table()
+            drop = table["symbol"] == sid
+            if timeframe is not None:
+                drop &= table["timeframe"] == self._timeframe_ids.get(str(timeframe), -1)
+            self._columns = {name: values[~drop] for name, values in table.items()}
+            for key in [k for k in self._partitions if k[0] == sid and
+                        (timeframe is None or self._timeframes[k[1]] == str(timeframe))]:
+                del self._partitions[key]
+                self._tails.pop(key, None)
+                self._gaps.pop(key, None)
+            self._dirty = True
+            return int(drop.sum())
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _select(self, patterns: Optional[Iterable[str]], symbols: Optional[Iterable[str]],
+                timeframe: Optional[str], since: Optional[int], until: Optional[int]) -> Tuple[Dict[str, np.ndarray], np.ndarray, int]:
+        """Consolidated table, boolean row filter and the requested pattern bits"""
+        bits = pattern_bits(patterns)
+        table = self._table()
+        keep = (table["mask"] & np.uint16(bits)) != 0
+
+        if symbols is not None:
+            ids = [self._symbol_ids[s] for s in symbols if s in self._symbol_ids]
+            keep &= np.isin(table["symbol"], np.array(ids, dtype=np.int32))
+        if timeframe is not None:
+            keep &= table["timeframe"] == self._timeframe_ids.get(str(timeframe), -1)
+        if since is not None:
+            keep &= table["time"] >= since
+        if until is not None:
+            keep &= table["time"] <= until
+        return table, keep, bits
+
+    def query(self, patterns: Optional[Iterable[str]] = None, symbols: Optional[Iterable[str]] = None,
+              timeframe: Optional[str] = None, since: Optional[int] = None, until: Optional[int] = None,
+              limit: Optional[int] = 500) -> Dict[str, Any]:
+        """
+        Indexed occurrences, newest first
+
+        Args:
+            patterns: Pattern names (any of them matches); None = all
+            symbols: Restrict to these symbols; None = all
+            timeframe: Restrict to one timeframe
+            since / until: Candle start bounds (epoch seconds, inclusive)
+            limit: Max rows returned (total is always reported)
+
+        Returns:
+            {"total", "occurrences": [{"symbol", "timeframe", "timestamp", "patterns"}]}
+        """
+        with self._lock:
+            self._ensure_loaded()
+            table, keep, bits = self._select(patterns, symbols, timeframe, since, until)
+            rows = np.flatnonzero(keep)
+            rows = rows[np.argsort(-table["time"][rows], kind="stable")]
+            total = len(rows)
+            if limit is not None:
+                rows = rows[:limit]
+
+            stamps = pd.Series(pd.to_datetime(table["time"][rows], unit="s", utc=True)).dt.tz_convert(IST)
+            occurrences = [
+                {
+                    "symbol": self._symbols[s],
+                    "timeframe": self._timeframes[t],
+                    "timestamp": ts,
+                    "patterns": pattern_scanner.pattern_names(m & bits),
+                }
+                for s, t, ts, m in zip(table["symbol"][rows].tolist(), table["timeframe"][rows].tolist(),
+                                       pattern_scanner.isoformat_timestamps(stamps), table["mask"][rows].tolist())
+            ]
+        return {"total": total, "occurrences": occurrences}
+
+    def statistics(self, patterns: Optional[Iterable[str]] = None, symbols: Optional[Iterable[str]] = None,
+                   timeframe: Optional[str] = None, since: Optional[int] = None,
+                   until: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Occurrence counts per pattern and per symbol, from the index alone
+
+        Returns:
+            {"pattern_counts": {...}, "by_symbol": {symbol: {pattern: n}},
+             "bars_indexed": candles scanned in the selected partitions}
+        """
+        with self._lock:
+            self._ensure_loaded()
+            table, keep, bits = self._select(patterns, symbols, timeframe, since, until)
+            masks = table["mask"][keep] & np.uint16(bits)
+            symbol_ids = table["symbol"][keep]
+
+            by_symbol = {}
+            for sid in np.unique(symbol_ids).tolist():
+                counts = pattern_scanner.pattern_counts(masks[symbol_ids == sid])
+                by_symbol[self._symbols[sid]] = {name: n for name, n in counts.items() if n}
+
+            wanted = None if symbols is None else {self._symbol_ids[s] for s in symbols if s in self._symbol_ids}
+            tf = None if timeframe is None else self._timeframe_ids.get(str(timeframe), -1)
+            bars = sum(values[2] for (s, t), values in self._partitions.items()
+                       if (wanted is None or s in wanted) and (tf is None or t == tf))
+
+            counts = pattern_scanner.pattern_counts(masks)
+            return {
+                "pattern_counts": {name: n for name, n in counts.items() if n},
+                "by_symbol": by_symbol,
+                "occurrence_candles": int(len(masks)),
+                "bars_indexed": int(bars),
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._ensure_loaded()
+            table = self._table()
+            return {
+                "occurrences": int(len(table["time"])),
+                "symbols": len(self._symbols),
+                "timeframes": list(self._timeframes),
+                "partitions": len(self._partitions),
+                "bars_indexed": int(sum(values[2] for values in self._partitions.values())),
+                "gaps": int(sum(len(holes) for holes in self._gaps.values())),
+                "bytes": int(sum(values.nbytes for values in table.values())),
+                "path": self.path,
+            }
+
+
+# Global index
+pattern_index = PatternIndex()
@@ -0,0 +1,255 @@
+"""
+Pattern Scanner
+All candlestick patterns in one vectorised pass
+
+Evaluates every PriceActionService pattern rule on the OHLC arrays at
+once and packs the results into one uint16 bitmask per candle (bit i set
+= PATTERN_NAMES[i] present). Callers that need the per-candle pattern
+list only touch the candles whose mask is nonzero; counts come from the
+bits directly.
+
+    mask = scan_patterns(open_, high, low, close)
+    counts = pattern_counts(mask)                       # {"Doji": 12, ...}
+    for i in np.flatnonzero(mask):
+        names = pattern_names(mask[i])                  # ["Doji", "InsideBar"]
+
+The rules are the ones documented on the PriceActionService.detect_*
+methods (same thresholds, same strict / non-strict comparisons); NaN
+inputs never match.
+
+Every function also accepts 2D (symbols x bars) arrays, one series per
+row, left-padded with NaN where a symbol has fewer bars - a whole universe
+is scanned in one call and each row matches the 1D scan of that symbol.
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services import compute_backend as compute
+from app.services import indicator_kernels as kernels
+
+logger = logging.getLogger(__name__)
+
+PATTERN_NAMES = (
+    "Doji",
+    "Hammer",
+    "BullishEngulfing",
+    "BearishEngulfing",
+    "BullishMarubozu",
+    "BearishMarubozu",
+    "ShootingStar",
+    "InsideBar",
+    "Breakout",
+)
+PATTERN_BITS: Dict[str, int] = {name: 1 << i for i, name in enumerate(PATTERN_NAMES)}
+ENGULFING = PATTERN_BITS["BullishEngulfing"] | PATTERN_BITS["BearishEngulfing"]
+
+# Pattern-name list for every possible mask value (9 bits -> 512 entries)
+_NAMES_BY_MASK: List[List[str]] = [
+    [name for name, bit in PATTERN_BITS.items() if value & bit]
+    for value in range(1 << len(PATTERN_NAMES))
+]
+
+
+def _previous(values: np.ndarray) -> np.ndarray:
+    """values shifted one candle forward (along the bar axis); NaN for the first candle"""
+    out = np.empty_like(values)
+    out[..., :1] = np.nan
+    out[..., 1:] = values[..., :-1]
+    return out
+
+
+def _breakout_matrix(high: np.ndarray, low: np.ndarray, lookback: int) -> np.ndarray:
+    """
+    breakout_mask for every row of a (symbols x bars) matrix in one call
+
+    Rows are laid end to end with `lookback` NaN columns between them, so
+    no window reaches into the previous row, and the whole matrix goes
+    through one 1D breakout_mask. Each row's first `lookback` real bars
+    (after its NaN padding) are then cleared, as for a 1D series.
+    """
+    rows, bars = high.shape
+    if rows == 0 or bars == 0:
+        return np.zeros(high.shape, dtype=bool)
+
+    pad = np.full((rows, lookback), np.nan)
+    flat_high = np.hstack([pad, high]).ravel()
+    flat_low = np.hstack([pad, low]).ravel()
+    mask = compute.breakout_mask(flat_high, flat_low, lookback).reshape(rows, lookback + bars)[:, lookback:]
+
+    # Index of each row's first real bar: left padding is all-NaN OHLC
+    valid = ~(np.isnan(high) & np.isnan(low))
+    start = np.where(valid.any(axis=1), valid.argmax(axis=1), bars)
+    mask &= np.arange(bars) >= (start + lookback)[:, None]
+    return mask
+
+
+def _arrays(*columns) -> List[np.ndarray]:
+    return [kernels.as_float_array(column) for column in columns]
+
+
+# ============================================================================
+# Single-pattern rules (boolean array per candle)
+# ============================================================================
+
+def doji(open_, high, low, close, threshold: float = 0.1) -> np.ndarray:
+    """|Open - Close| <= threshold * (High - Low)"""
+    o, h, l, c = _arrays(open_, high, low, close)
+    with np.errstate(invalid="ignore"):
+        return np.abs(o - c) <= threshold * (h - l)
+
+
+def hammer(open_, high, low, close) -> np.ndarray:
+    """Lower wick at least twice the upper wick (red or green body)"""
+    o, h, l, c = _arrays(open_, high, low, close)
+    with np.errstate(invalid="ignore"):
+        return ((o - c > 0) & (o - l >= 2 * (h - c))) | ((c - o > 0) & (c - l >= 2 * (h - o)))
+
+
+def shooting_star(open_, high, low, close) -> np.ndarray:
+    """Upper wick at least twice the lower wick (red or green body)"""
+    o, h, l, c = _arrays(open_, high, low, close)
+    with np.errstate(invalid="ignore"):
+        return ((o - c > 0) & (h - o >= 2 * (c - l))) | ((c - o > 0) & (h - c >= 2 * (o - l)))
+
+
+def bullish_engulfing(open_, close) -> np.ndarray:
+    """Bearish candle followed by a bullish body covering it"""
+    o, c = _arrays(open_, close)
+    po, pc = _previous(o), _previous(c)
+    with np.errstate(invalid="ignore"):
+        return (po > pc) & (c > o) & (o <= pc) & (c >= po)
+
+
+def bearish_engulfing(open_, close) -> np.ndarray:
+    """Bullish candle followed by a bearish body covering it"""
+    o, c = _arrays(open_, close)
+    po, pc = _previous(o), _previous(c)
+    with np.errstate(invalid="ignore"):
+        return (po < pc) & (o > c) & (o >= pc) & (c <= po)
+
+
+def bullish_marubozu(open_, high, low, close, buffer: float = 0.25) -> np.ndarray:
+    """Green candle with both wicks within buffer"""
+    o, h, l, c = _arrays(open_, high, low, close)
+    with np.errstate(invalid="ignore"):
+        return (c > o) & (np.abs(h - c) <= buffer) & (np.abs(l - o) <= buffer)
+
+
+def bearish_marubozu(open_, high, low, close, buffer: float = 0.25) -> np.ndarray:
+    """Red candle with both wicks within buffer"""
+    o, h, l, c = _arrays(open_, high, low, close)
+    with np.errstate(invalid="ignore"):
+        return (o > c) & (np.abs(h - o) <= buffer) & (np.abs(l - c) <= buffer)
+
+
+def inside_bar(high, low) -> np.ndarray:
+    """High below and Low above the previous candle's"""
+    h, l = _arrays(high, low)
+    with np.errstate(invalid="ignore"):
+        return (h < _previous(h)) & (l > _previous(l))
+
+
+# ============================================================================
+# Fused scan
+# ============================================================================
+
+def pattern_flags(open_, high, low, close, doji_threshold: float = 0.1,
+                  marubozu_buffer: float = 0.25, breakout_lookback: int = 5) -> Dict[str, np.ndarray]:
+    """
+    Boolean array per pattern (PATTERN_NAMES order)
+
+    Args:
+        open_, high, low, close: Equal-shape OHLC arrays (bars, or symbols x bars)
+        doji_threshold: Doji when |Open - Close| <= threshold * (High - Low)
+        marubozu_buffer: Max wick size for marubozu candles
+        breakout_lookback: Candles a breakout high/low must exceed
+    """
+    o, h, l, c = _arrays(open_, high, low, close)
+    if h.ndim == 2:
+        breakout = _breakout_matrix(h, l, breakout_lookback)
+    else:
+        breakout = compute.breakout_mask(h, l, breakout_lookback)
+    return {
+        "Doji": doji(o, h, l, c, doji_threshold),
+        "Hammer": hammer(o, h, l, c),
+        "BullishEngulfing": bullish_engulfing(o, c),
+        "BearishEngulfing": bearish_engulfing(o, c),
+        "BullishMarubozu": bullish_marubozu(o, h, l, c, marubozu_buffer),
+        "BearishMarubozu": bearish_marubozu(o, h, l, c, marubozu_buffer),
+        "ShootingStar": shooting_star(o, h, l, c),
+        "InsideBar": inside_bar(h, l),
+        "Breakout": breakout,
+    }
+
+
+def scan_patterns(open_, high, low, close, doji_threshold: float = 0.1,
+                  marubozu_buffer: float = 0.25, breakout_lookback: int = 5) -> np.ndarray:
+    """
+    Per-candle pattern bitmask
+
+    Returns:
+        uint16 array shaped like the inputs (bars, or symbols x bars), bit
+        PATTERN_BITS[name] set where the pattern occurs
+    """
+    flags = pattern_flags(open_, high, low, close, doji_threshold, marubozu_buffer, breakout_lookback)
+    mask = np.zeros(flags["Doji"].shape, dtype=np.uint16)
+    for name, bit in PATTERN_BITS.items():
+        mask[flags[name]] |= np.uint16(bit)
+    return mask
+
+
+def has_pattern(mask: np.ndarray, bits: int) -> np.ndarray:
+    """Boolean array: any of `bits` set"""
+    return (mask & np.uint16(bits)) != 0
+
+
+def pattern_counts(mask: np.ndarray) -> Dict[str, int]:
+    """Candles per pattern, plus the combined "Engulfing" count"""
+    counts = {}
+    for name, bit in PATTERN_BITS.items():
+        counts[name] = int(np.count_nonzero(mask & np.uint16(bit)))
+        if name == "BearishEngulfing":
+            counts["Engulfing"] = int(np.count_nonzero(mask & np.uint16(ENGULFING)))
+    return counts
+
+
+def pattern_names(value: int) -> List[str]:
+    """Pattern names of one candle's mask, in PATTERN_NAMES order"""
+    return list(_NAMES_BY_MASK[int(value)])
+
+
+def isoformat_timestamps(stamps: pd.Series) -> List[Optional[str]]:
+    """
+    Timestamp.isoformat() for a whole column at once (NaT -> None)
+
+    Formats naive wall-clock times with NumPy and appends each row's UTC
+    offset ("+05:30"), instead of one Timestamp object per row. Columns
+    with sub-second values fall back to per-row isoformat.
+    """
+    stamps = pd.Series(stamps)
+    if len(stamps) == 0:
+        return []
+
+    tz = stamps.dt.tz
+    local = (stamps.dt.tz_localize(None) if tz is not None else stamps).to_numpy(dtype="datetime64[us]")
+    missing = np.isnat(local)
+    if (local[~missing].astype(np.int64) % 1_000_000).any():
+        return [ts.isoformat() if pd.notna(ts) else None for ts in stamps]
+
+    text = np.datetime_as_string(local.astype("datetime64[s]"), unit="s")
+    if tz is not None:
+        utc = stamps.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy(dtype="datetime64[s]")
+        offsets = np.where(missing, 0, (local.astype("datetime64[s]") - utc).astype(np.int64))
+        unique, inverse = np.unique(offsets, return_inverse=True)
+        suffixes = np.array([f"{'+' if o >= 0 else '-'}{abs(o) // 3600:02d}:{abs(o) % 3600 // 60:02d}"
+                             for o in unique.tolist()])
+        text = np.char.add(text, suffixes[inverse])
+
+    result = text.tolist()
+    for i in np.flatnonzero(missing).tolist():
+        result[i] = None
+    return result
@@ -0,0 +1,362 @@
+"""
+Pattern Screener
+Today's candlestick patterns across a whole symbol universe
+
+Loads OHLC for every symbol of the universe (bounded thread pool, shared
+history rate limiter), stacks the last `bars` candles of each into
+(symbols x bars) matrices - right-aligned on the latest candle, NaN on the
+left where a symbol has less history - and runs the pattern_scanner rules
+over the whole matrix in one call. Large universes are split into row
+blocks scanned on a process pool. The result is a ranked table of the
+symbols whose latest candle shows a pattern - only symbols whose latest
+candle belongs to the current session count; a symbol whose data stops
+earlier (suspension, failed tail fetch) is reported as stale instead.
+
+    screener = PatternScreener(price_action_service.fetch_ohlc, rate_limiter)
+    table = screener.run(symbols, resolution="5", duration=5)
+    screener.start(symbols, resolution="5", duration=5, interval=300)   # periodic job
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services import pattern_scanner
+from app.services.indicator_cache import last_closed_candle
+from app.services.pivot_store import IST
+from app.services.swing_levels import epoch_seconds
+from app.services.watchlist_scanner import to_json_scalar
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+IST_OFFSET_SECONDS = 19800
+NAT = np.iinfo(np.int64).min
+
+
+def _scan_block(open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                params: Dict[str, Any]) -> np.ndarray:
+    """Pattern mask of one row block (process pool entry point)"""
+    return pattern_scanner.scan_patterns(open_, high, low, close, **params)
+
+
+def stack_ohlc(frames: Dict[str, pd.DataFrame], bars: int) -> Dict[str, Any]:
+    """
+    Last `bars` candles of every frame as (symbols x bars) matrices
+
+    Rows are right-aligned on each symbol's latest candle; missing history
+    on the left is NaN (timestamps NAT).
+
+    Returns:
+        {"symbols": [...], "open", "high", "low", "close": float matrices,
+         "time": int64 epoch-second matrix}
+    """
+    symbols = list(frames)
+    width = min(bars, max((len(df) for df in frames.values()), default=0))
+    shape = (len(symbols), width)
+    out = {name: np.full(shape, np.nan) for name in ("open", "high", "low", "close")}
+    stamps = np.full(shape, NAT, dtype=np.int64)
+
+    for row, symbol in enumerate(symbols):
+        df = frames[symbol]
+        n = min(width, len(df))
+        if n == 0:
+            continue
+        # Slice the column arrays rather than df.tail() (no frame copy)
+        for name in ("open", "high", "low", "close"):
+            out[name][row, width - n:] = df[name.capitalize()].to_numpy(dtype=float)[-n:]
+        stamps[row, width - n:] = epoch_seconds(df["Timestamp"])[-n:]
+
+    return {"symbols": symbols, "time": stamps, **out}
+
+
+def session_days(stamps: np.ndarray) -> np.ndarray:
+    """IST calendar day number of epoch-second stamps (-1 for NAT)"""
+    return np.where(stamps == NAT, -1, (stamps + IST_OFFSET_SECONDS) // 86400)
+
+
+class PatternScreener:
+    """
+    Universe-wide pattern screen with an optional periodic job
+
+    Args:
+        fetch_ohlc: fetch_ohlc(symbol, resolution, duration) -> DataFrame or None
+        rate_limiter: Optional shared limiter with acquire() (history API quota)
+        max_workers: Concurrent history fetches
+        processes: Process pool size for large matrices (0 = CPU count)
+        process_min_cells: symbols x bars above which the scan is split across processes
+        index: Optional PatternIndex updated with every loaded universe
+    """
+
+    def __init__(self, fetch_ohlc: Callable[[str, str, int], Optional[pd.DataFrame]],
+                 rate_limiter=None, max_workers: Optional[int] = None,
+                 processes: Optional[int] = None, process_min_cells: Optional[int] = None,
+                 index=None):
+        self.fetch_ohlc = fetch_ohlc
+        self.index = index
+        self.rate_limiter = rate_limiter
+        self.max_workers = max_workers or settings.SCAN_MAX_WORKERS
+        self.processes = (processes if processes is not None else settings.SCREENER_PROCESSES) or os.cpu_count() or 1
+        self.process_min_cells = (process_min_cells if process_min_cells is not None
+                                  else settings.SCREENER_PROCESS_MIN_CELLS)
+
+        self.latest: Optional[Dict[str, Any]] = None   # last result of the periodic job
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._job: Optional[threading.Thread] = None
+        self._job_config: Optional[Dict[str, Any]] = None
+        self._stop = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _load_one(self, symbol: str, resolution: str, duration: int) -> Optional[pd.DataFrame]:
+        try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            df = self.fetch_ohlc(symbol, resolution, duration)
+            return df if df is not None and len(df) > 0 else None
+        except Exception as e:
+            logger.error(f"Screener fetch failed for {symbol}: {e}")
+            return None
+
+    def load(self, symbols: List[str], resolution: str, duration: int,
+             closed_only: bool = True) -> Tuple[Dict[str, pd.DataFrame], List[str]]:
+        """
+        OHLC frames for the universe (in symbol order) and the symbols that failed
+
+        With closed_only the still-forming candle is dropped, so a pattern
+        does not flicker in and out of the table while its candle forms.
+        """
+        frames: Dict[str, pd.DataFrame] = {}
+        failed: List[str] = []
+        if not symbols:
+            return frames, failed
+
+        cutoff = last_closed_candle(resolution) if closed_only else None
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(symbols)),
+                                thread_name_prefix="pattern-screener") as pool:
+            results = pool.map(lambda s: self._load_one(s, resolution, duration), symbols)
+            for symbol, df in zip(symbols, results):
+                if df is not None and cutoff is not None:
+                    df = df[epoch_seconds(df["Timestamp"]) <= cutoff]
+                if df is None or len(df) == 0:
+                    failed.append(symbol)
+                else:
+                    frames[symbol] = df
+        return frames, failed
+
+    # ------------------------------------------------------------------
+    # Scanning
+    # ------------------------------------------------------------------
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        # Spawned workers: forking a threaded server process is unsafe
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.processes,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def scan_matrix(self, open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                    **params) -> np.ndarray:
+        """
+        Pattern mask of a (symbols x bars) matrix
+
+        Scanned in-process in one call; above process_min_cells the rows
+        are split into one block per worker process.
+        """
+        rows = high.shape[0]
+        if self.processes < 2 or rows < 2 or high.size < self.process_min_cells:
+            return _scan_block(open_, high, low, close, params)
+
+        bounds = np.linspace(0, rows, min(self.processes, rows) + 1).astype(int)
+        pool = self._process_pool()
+        futures = [pool.submit(_scan_block, open_[a:b], high[a:b], low[a:b], close[a:b], params)
+                   for a, b in zip(bounds[:-1], bounds[1:])]
+        return np.vstack([future.result() for future in futures])
+
+    @staticmethod
+    def current(stacked: Dict[str, Any], as_of: int) -> np.ndarray:
+        """Rows whose latest candle falls on the session of `as_of` (or later)"""
+        stamps = stacked["time"]
+        if stamps.shape[1] == 0:
+            return np.zeros(len(stamps), dtype=bool)
+        return session_days(stamps[:, -1]) >= session_days(np.int64(as_of))
+
+    @staticmethod
+    def rank(stacked: Dict[str, Any], mask: np.ndarray, as_of: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Ranked rows for the symbols with a pattern on their latest candle
+
+        Only symbols whose latest candle is in the session of `as_of`
+        (epoch seconds, normally last_closed_candle(resolution); default:
+        the newest candle of the universe) are ranked. Ordered by number of
+        patterns on the latest candle, then by pattern candles in that
+        session (IST), then by symbol.
+        """
+        if mask.size == 0:
+            return []
+
+        stamps = stacked["time"]
+        if as_of is None:
+            as_of = int(stamps[:, -1].max())
+        session = session_days(np.int64(as_of))
+        latest = np.where(PatternScreener.current(stacked, as_of), mask[:, -1], 0).astype(np.uint16)
+        today = session_days(stamps) == session
+        today_mask = np.where(today, mask, 0).astype(np.uint16)
+
+        close = stacked["close"]
+        prev_close = close[:, -2] if close.shape[1] > 1 else np.full(len(close), np.nan)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            change_pct = (close[:, -1] - prev_close) / prev_close * 100
+
+        active = np.count_nonzero(
+            latest[:, None] & np.array(list(pattern_scanner.PATTERN_BITS.values()), dtype=np.uint16), axis=1
+        )
+        today_hits = np.count_nonzero(today_mask, axis=1)
+
+        candidates = np.flatnonzero(latest)
+        symbols = stacked["symbols"]
+        order = sorted(candidates.tolist(), key=lambda i: (-active[i], -today_hits[i], symbols[i]))
+
+        rows = []
+        for rank, i in enumerate(order, start=1):
+            counts = pattern_scanner.pattern_counts(today_mask[i])
+            rows.append({
+                "rank": rank,
+                "symbol": symbols[i],
+                "timestamp": datetime.fromtimestamp(int(stamps[i, -1]), IST).isoformat(),
+                "close": to_json_scalar(close[i, -1]),
+                "change_pct": to_json_scalar(np.round(change_pct[i], 2)),
+                "patterns": pattern_scanner.pattern_names(latest[i]),
+                "pattern_count": int(active[i]),
+                "today_pattern_candles": int(today_hits[i]),
+                "today_counts": {name: n for name, n in counts.items() if n},
+            })
+        return rows
+
+    def run(self, symbols: List[str], resolution: str = "5", duration: int = 5, bars: int = 200,
+            closed_only: bool = True, **params) -> Dict[str, Any]:
+        """
+        Load, stack, scan and rank the universe (blocking)
+
+        Returns:
+            {"generated_at", "resolution", "universe", "screened", "failed",
+             "stale" (latest candle before the current session), "matched",
+             "timings_ms", "results": [ranked rows]}
+        """
+        symbols = list(dict.fromkeys(s.strip() for s in symbols if s and s.strip()))
+        with self._run_lock:
+            started = time.perf_counter()
+            frames, failed = self.load(symbols, resolution, duration, closed_only)
+            loaded = time.perf_counter()
+            if self.index is not None:
+                try:
+                    self.index.update_many(frames, resolution)
+                except Exception as e:
+                    logger.error(f"Pattern index update failed: {e}")
+
+            stacked = stack_ohlc(frames, bars)
+            mask = self.scan_matrix(stacked["open"], stacked["high"], stacked["low"], stacked["close"], **params)
+            as_of = last_closed_candle(resolution)
+            results = self.rank(stacked, mask, as_of)
+            stale = [symbol for symbol, ok in zip(stacked["symbols"], self.current(stacked, as_of)) if not ok]
+            finished = time.perf_counter()
+
+            result = {
+                "generated_at": datetime.now().isoformat(),
+                "resolution": resolution,
+                "duration": duration,
+                "bars": int(mask.shape[1]) if mask.ndim == 2 else 0,
+                "universe": len(symbols),
+                "screened": len(frames),
+                "failed": failed,
+                "stale": stale,
+                "matched": len(results),
+                "timings_ms": {
+                    "load": round((loaded - started) * 1000, 1),
+                    "scan": round((finished - loaded) * 1000, 1),
+                },
+                "results": results,
+            }
+
+        logger.info(f"Pattern screen: {len(results)}/{len(frames)} symbols with patterns "
+                    f"(load {result['timings_ms']['load']} ms, scan {result['timings_ms']['scan']} ms)")
+        return result
+
+    # ------------------------------------------------------------------
+    # Periodic job
+    # ------------------------------------------------------------------
+
+    def start(self, symbols: List[str], resolution: str = "5", duration: int = 5,
+              interval: Optional[float] = None, bars: int = 200) -> Dict[str, Any]:
+        """(Re)start the periodic screen in a daemon thread; the first run starts immediately"""
+        self.stop()
+        interval = interval or settings.SCREENER_INTERVAL_SECONDS
+        config = {"symbols": list(symbols), "resolution": resolution, "duration": duration,
+                  "interval": interval, "bars": bars}
+        self._stop = threading.Event()
+        stop = self._stop
+
+        def loop():
+            while not stop.is_set():
+                try:
+                    result = self.run(config["symbols"], resolution, duration, bars)
+                    if not stop.is_set():
+                        self.latest = result
+                except Exception as e:
+                    logger.error(f"Pattern screen failed: {e}")
+                stop.wait(interval)
+
+        self._job_config = config
+        self._job = threading.Thread(target=loop, name="pattern-screener-job", daemon=True)
+        self._job.start()
+        return self.status()
+
+    def stop(self) -> None:
+        """Stop the periodic job (a run in progress finishes, its result is dropped)"""
+        self._stop.set()
+        self._job = None
+        self._job_config = None
+        self.latest = None
+
+    @property
+    def running(self) -> bool:
+        job = self._job
+        return job is not None and job.is_alive()
+
+    @property
+    def job_symbols(self) -> List[str]:
+        """Universe of the periodic job (empty when it is not running)"""
+        config = self._job_config
+        return list(config["symbols"]) if config else []
+
+    def status(self) -> Dict[str, Any]:
+        config = self._job_config
+        latest = self.latest
+        return {
+            "running": self.running,
+            "universe": len(config["symbols"]) if config else 0,
+            "resolution": config["resolution"] if config else None,
+            "interval": config["interval"] if config else None,
+            "last_run": latest["generated_at"] if latest else None,
+            "processes": self.processes,
+        }
+
+    def shutdown(self) -> None:
+        self.stop()
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
@@ -0,0 +1,201 @@
+"""
+Pattern Stream
+Candlestick patterns detected on live bar close
+
+Subscribes to the live bar aggregator (OHLCCollectionService) and keeps
+only the last few closed bars per symbol/timeframe in a small ring - just
+enough for the widest rule (breakout lookback + the bar itself). When a bar
+closes the pattern_scanner rules are evaluated on the ring and, if any
+pattern fires on the new bar, a pattern event is handed to the registered
+listeners (the /ws/market-data broadcaster). No history is fetched, so the
+cost per closed bar is one scan over a handful of rows.
+
+    pattern_stream.add_listener(publish_pattern_event)
+    ohlc_service.add_bar_listener(pattern_stream.on_bar)
+
+Results for a bar equal scan_patterns() over the full bar series at that
+bar, once the ring has filled (the rules never look further back).
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services import pattern_scanner
+from app.services.streaming_indicators import Bar, to_bar
+
+logger = logging.getLogger(__name__)
+
+PatternListener = Callable[[Dict[str, Any]], None]
+
+
+class StreamingPatternDetector:
+    """
+    Per-symbol ring of closed bars, scanned for patterns on every close
+
+    Args:
+        doji_threshold: Doji when |Open - Close| <= threshold * (High - Low)
+        marubozu_buffer: Max wick size for marubozu candles
+        breakout_lookback: Candles a breakout high/low must exceed
+        history: Recent pattern events kept for polling clients
+    """
+
+    def __init__(self, doji_threshold: float = 0.1, marubozu_buffer: float = 0.25,
+                 breakout_lookback: int = 5, history: int = 200):
+        if breakout_lookback < 1:
+            raise ValueError("breakout_lookback must be a positive integer")
+        self.doji_threshold = doji_threshold
+        self.marubozu_buffer = marubozu_buffer
+        self.breakout_lookback = int(breakout_lookback)
+        # Engulfing / inside bar need one previous bar, breakout needs lookback
+        self.capacity = max(2, self.breakout_lookback + 1)
+
+        self._rings: Dict[Tuple[str, str], Deque[Bar]] = {}
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=history)
+        self._listeners: List[PatternListener] = []
+        self._lock = threading.Lock()
+        self.bars_seen = 0
+        self.events_published = 0
+
+    # ------------------------------------------------------------------
+    # Listeners
+    # ------------------------------------------------------------------
+
+    def add_listener(self, listener: PatternListener) -> None:
+        """Call listener(event) for every detected pattern event"""
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def remove_listener(self, listener: PatternListener) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    # ------------------------------------------------------------------
+    # Bars
+    # ------------------------------------------------------------------
+
+    def _ring(self, symbol: str, timeframe: str) -> Deque[Bar]:
+        key = (symbol, str(timeframe))
+        ring = self._rings.get(key)
+        if ring is None:
+            ring = self._rings[key] = deque(maxlen=self.capacity)
+        return ring
+
+    def seed(self, symbol: str, timeframe: str, ohlc_df: pd.DataFrame) -> int:
+        """
+        Prime a symbol's ring from already available bars (no events published)
+
+        Args:
+            ohlc_df: DataFrame with Open/High/Low/Close columns, oldest first
+
+        Returns:
+            Bars held in the ring
+        """
+        tail = ohlc_df.tail(self.capacity)
+        columns = [tail[col].to_numpy(dtype=float) for col in ("Open", "High", "Low", "Close")]
+        with self._lock:
+            ring = self._ring(symbol, timeframe)
+            ring.clear()
+            ring.extend(Bar(o, h, l, c) for o, h, l, c in zip(*columns))
+            return len(ring)
+
+    def _scan(self, ring: Deque[Bar]) -> int:
+        """Pattern mask of the newest bar in the ring"""
+        values = np.array(ring, dtype=float)
+        mask = pattern_scanner.scan_patterns(
+            values[:, 0], values[:, 1], values[:, 2], values[:, 3],
+            self.doji_threshold, self.marubozu_buffer, self.breakout_lookback
+        )
+        return int(mask[-1])
+
+    def on_bar(self, symbol: str, timeframe: Any, bar: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Closed-bar callback for the bar aggregator
+
+        Args:
+            symbol: Trading symbol
+            timeframe: Bar timeframe (minutes / resolution)
+            bar: Closed bar dict with open/high/low/close and an optional
+                 'timestamp' / 'time'
+
+        Returns:
+            The published pattern event, or None when no pattern fired
+        """
+        started = time.perf_counter()
+        timeframe = str(timeframe)
+        closed = to_bar(bar)
+
+        with self._lock:
+            ring = self._ring(symbol, timeframe)
+            ring.append(closed)
+            self.bars_seen += 1
+            value = self._scan(ring)
+            if not value:
+                return None
+
+            event = {
+                "type": "pattern",
+                "symbol": symbol,
+                "timeframe": timeframe,
+                "patterns": pattern_scanner.pattern_names(value),
+                "candle": {
+                    "time": bar.get("timestamp", bar.get("time")),
+                    "open": closed.open,
+                    "high": closed.high,
+                    "low": closed.low,
+                    "close": closed.close,
+                },
+                "detected_at": datetime.now().isoformat(),
+                "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+            }
+            self._events.append(event)
+            self.events_published += 1
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logger.error(f"Pattern listener failed for {symbol}: {e}")
+
+        logger.info(f"Pattern on {symbol} {timeframe}: {', '.join(event['patterns'])}")
+        return event
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def recent(self, symbol: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent pattern events, newest last"""
+        with self._lock:
+            events = [e for e in self._events if symbol is None or e["symbol"] == symbol]
+        return events[-limit:] if limit > 0 else []
+
+    def reset(self, symbol: Optional[str] = None) -> None:
+        """Drop the rings of one symbol (all timeframes) or of every symbol"""
+        with self._lock:
+            for key in list(self._rings):
+                if symbol is None or key[0] == symbol:
+                    del self._rings[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "symbols": len(self._rings),
+                "ring_size": self.capacity,
+                "bars_seen": self.bars_seen,
+                "events_published": self.events_published,
+                "listeners": len(self._listeners),
+            }
+
+
+# Global detector fed by the live bar aggregator
+pattern_stream = StreamingPatternDetector()
@@ -0,0 +1,310 @@
+"""
+Pivot Store
+Daily floor pivots precomputed once per trading day
+
+Pivots only change when the session rolls over, so instead of fetching
+daily history on every request the store computes P / R1-R3 / S1-S3 for
+the whole watchlist in one vectorised pass (indicators.pivot_table over
+all symbols) from each symbol's previous completed daily candle, and keeps
+them until the IST trading day changes. Each symbol's levels are held in a
+sorted array, so the nearest resistance / support to a price is a bisect
+instead of a scan over every level.
+
+A lookup never waits for the whole watchlist: on the first lookup of a new
+day only the requested symbol is fetched inline and the rest of the
+watchlist is recomputed on a background thread. The watchlist is capped
+(PIVOT_WATCHLIST_MAX), least recently used symbols are dropped first.
+"""
+
+import bisect
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pytz
+
+from app.services import indicators as ind
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+IST = pytz.timezone("Asia/Kolkata")
+
+# Level labels in the order they are reported; index into PIVOT_COLUMNS
+LEVEL_LABELS = ("p", "r1", "r2", "r3", "s1", "s2", "s3")
+_LEVEL_COLUMNS = [ind.PIVOT_COLUMNS.index("pivot" if label == "p" else label) for label in LEVEL_LABELS]
+
+
+def trading_day(now: Optional[datetime] = None) -> date:
+    """Current trading day (calendar date in IST)"""
+    now = now or datetime.now(IST)
+    if now.tzinfo is None:
+        now = IST.localize(now)
+    return now.astimezone(IST).date()
+
+
+def previous_session(daily_df: pd.DataFrame, session: date) -> Optional[pd.Series]:
+    """
+    Last completed daily candle before `session`
+
+    With IST timestamps this skips today's still-forming candle whether or
+    not the market has opened; without them it falls back to the
+    second-to-last row.
+    """
+    if daily_df is None or len(daily_df) == 0:
+        return None
+
+    if "Timestamp" in daily_df.columns:
+        stamps = pd.to_datetime(daily_df["Timestamp"])
+        if stamps.dt.tz is not None:
+            stamps = stamps.dt.tz_convert(IST)
+        earlier = np.flatnonzero((stamps.dt.date < session).to_numpy())
+        return daily_df.iloc[earlier[-1]] if len(earlier) else None
+
+    return daily_df.iloc[-2] if len(daily_df) >= 2 else None
+
+
+class SessionPivots:
+    """
+    One symbol's pivots for one trading day
+
+    `levels` maps the classic keys (high, low, close, pivot, r1..s3);
+    `sorted_values` / `sorted_labels` hold the seven levels ascending for
+    bisect lookups.
+    """
+
+    __slots__ = ("symbol", "session", "source_date", "levels", "sorted_values", "sorted_labels")
+
+    def __init__(self, symbol: str, session: date, source_date: Optional[date], row: np.ndarray):
+        self.symbol = symbol
+        self.session = session
+        self.source_date = source_date
+        self.levels = dict(zip(ind.PIVOT_COLUMNS, row.tolist()))
+
+        values = row[_LEVEL_COLUMNS]
+        order = np.argsort(values, kind="stable")
+        self.sorted_values = values[order].tolist()
+        self.sorted_labels = [LEVEL_LABELS[i] for i in order]
+
+    def nearest(self, price: float) -> Dict[str, Any]:
+        """
+        Closest level strictly above (resistance) and below (support) price
+
+        Returns:
+            {"nearest_resistance", "nearest_resistance_label",
+             "nearest_support", "nearest_support_label"} - None when the
+            price is outside the pivot range on that side
+        """
+        values = self.sorted_values
+        above = bisect.bisect_right(values, price)
+        below = bisect.bisect_left(values, price) - 1
+        if below >= 0:
+            # Equal levels: report the first in label order, as for resistance
+            below = bisect.bisect_left(values, values[below])
+
+        return {
+            "nearest_resistance": values[above] if above < len(values) else None,
+            "nearest_resistance_label": self.sorted_labels[above] if above < len(values) else None,
+            "nearest_support": values[below] if below >= 0 else None,
+            "nearest_support_label": self.sorted_labels[below] if below >= 0 else None,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "session": self.session.isoformat(),
+            "source_date": self.source_date.isoformat() if self.source_date else None,
+            **self.levels,
+        }
+
+
+class PivotStore:
+    """
+    Per-trading-day pivot levels for a watchlist
+
+    Args:
+        fetch_ohlc: fetch_ohlc(symbol, resolution, duration) -> DataFrame or None
+        rate_limiter: Optional shared limiter with acquire() (history API quota)
+        daily_duration: Calendar days of daily history fetched per symbol
+        max_workers: Concurrent daily fetches during a refresh
+        max_watchlist: Symbols kept in the watchlist (least recently used dropped)
+    """
+
+    def __init__(self, fetch_ohlc: Callable[[str, str, int], Optional[pd.DataFrame]],
+                 rate_limiter=None, daily_duration: int = 10, max_workers: Optional[int] = None,
+                 max_watchlist: Optional[int] = None):
+        self.fetch_ohlc = fetch_ohlc
+        self.rate_limiter = rate_limiter
+        self.daily_duration = daily_duration
+        self.max_workers = max_workers or settings.SCAN_MAX_WORKERS
+        self.max_watchlist = max_watchlist or settings.PIVOT_WATCHLIST_MAX
+        self._watchlist: "OrderedDict[str, None]" = OrderedDict()
+        self._session: Optional[date] = None
+        self._pivots: Dict[str, SessionPivots] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._background: Optional[threading.Thread] = None
+
+    @property
+    def watchlist(self) -> List[str]:
+        with self._lock:
+            return list(self._watchlist)
+
+    def _track(self, symbols: Iterable[str]) -> None:
+        """Mark symbols as recently used; prune the watchlist to max_watchlist (lock held)"""
+        for symbol in symbols:
+            self._watchlist[symbol] = None
+            self._watchlist.move_to_end(symbol)
+        while len(self._watchlist) > self.max_watchlist:
+            dropped, _ = self._watchlist.popitem(last=False)
+            self._pivots.pop(dropped, None)
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def _fetch_previous(self, symbol: str, session: date, duration: int) -> Optional[Tuple[pd.Series, Optional[date]]]:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        row = previous_session(self.fetch_ohlc(symbol, "D", duration), session)
+        if row is None:
+            return None
+        stamp = row.get("Timestamp")
+        return row, (pd.Timestamp(stamp).date() if stamp is not None else None)
+
+    def build(self, rows: Dict[str, Tuple[pd.Series, Optional[date]]], session: date) -> Dict[str, SessionPivots]:
+        """Pivots for many symbols' previous-session candles in one vectorised pass"""
+        if not rows:
+            return {}
+
+        symbols = list(rows)
+        high = [rows[s][0]["High"] for s in symbols]
+        low = [rows[s][0]["Low"] for s in symbols]
+        close = [rows[s][0]["Close"] for s in symbols]
+        table = ind.pivot_table(high, low, close)
+
+        return {symbol: SessionPivots(symbol, session, rows[symbol][1], table[i])
+                for i, symbol in enumerate(symbols)}
+
+    def refresh(self, symbols: Iterable[str], duration: Optional[int] = None,
+                session: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Fetch previous-session candles and recompute pivots for `symbols`
+
+        The symbols join the store's watchlist (recomputed together when
+        the trading day rolls over). Blocking - one daily history call per
+        symbol on a bounded pool.
+
+        Returns:
+            {"session", "refreshed": [...], "failed": [...]}
+        """
+        symbols = list(dict.fromkeys(s.strip() for s in symbols if s and s.strip()))
+        session = session or trading_day()
+        duration = duration or self.daily_duration
+
+        rows: Dict[str, Tuple[pd.Series, Optional[date]]] = {}
+        failed: List[str] = []
+        if symbols:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(symbols)),
+                                    thread_name_prefix="pivot-store") as pool:
+                results = pool.map(lambda s: self._safe_fetch(s, session, duration), symbols)
+                for symbol, result in zip(symbols, results):
+                    if result is None:
+                        failed.append(symbol)
+                    else:
+                        rows[symbol] = result
+
+        built = self.build(rows, session)
+        with self._lock:
+            if self._session != session:
+                self._pivots = {}
+                self._session = session
+            self._pivots.update(built)
+            self._track(symbols)
+
+        logger.info(f"Pivot store refreshed for {session}: {len(built)} symbols, {len(failed)} failed")
+        return {"session": session.isoformat(), "refreshed": list(built), "failed": failed}
+
+    def _safe_fetch(self, symbol: str, session: date, duration: int):
+        try:
+            return self._fetch_previous(symbol, session, duration)
+        except Exception as e:
+            logger.error(f"Pivot fetch failed for {symbol}: {e}")
+            return None
+
+    def refresh_async(self, symbols: Iterable[str], duration: Optional[int] = None,
+                      session: Optional[date] = None) -> bool:
+        """refresh() on a daemon thread; False when a background refresh is already running"""
+        symbols = list(symbols)
+        with self._lock:
+            if self._background is not None and self._background.is_alive():
+                return False
+            self._background = threading.Thread(target=self._refresh_quietly, args=(symbols, duration, session),
+                                                name="pivot-store-refresh", daemon=True)
+            thread = self._background
+        thread.start()
+        return True
+
+    def _refresh_quietly(self, symbols: List[str], duration: Optional[int], session: Optional[date]) -> None:
+        try:
+            self.refresh(symbols, duration, session)
+        except Exception as e:
+            logger.error(f"Background pivot refresh failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def peek(self, symbol: str, session: Optional[date] = None) -> Optional[SessionPivots]:
+        """Stored pivots for the current trading day, without fetching"""
+        session = session or trading_day()
+        with self._lock:
+            if self._session != session:
+                return None
+            pivots = self._pivots.get(symbol)
+            if pivots is not None and symbol in self._watchlist:
+                self._watchlist.move_to_end(symbol)
+            return pivots
+
+    def get(self, symbol: str, duration: Optional[int] = None) -> Optional[SessionPivots]:
+        """
+        Pivots for the current trading day, computing them on a miss
+
+        Only the requested symbol is fetched inline (it joins the
+        watchlist). On the first lookup after the day rolls over the rest
+        of the watchlist is recomputed on a background thread.
+        """
+        session = trading_day()
+        pivots = self.peek(symbol, session)
+        if pivots is not None:
+            return pivots
+
+        with self._refresh_lock:
+            # Another request may have refreshed while we waited
+            pivots = self.peek(symbol, session)
+            if pivots is not None:
+                return pivots
+
+            with self._lock:
+                stale = self._session != session
+                others = [s for s in self._watchlist if s != symbol]
+            self.refresh([symbol], duration, session)
+
+        if stale and others:
+            self.refresh_async(others, duration, session)
+        return self.peek(symbol, session)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "session": self._session.isoformat() if self._session else None,
+                "symbols": len(self._pivots),
+                "watchlist": len(self._watchlist),
+                "max_watchlist": self.max_watchlist,
+                "refreshing": self._background is not None and self._background.is_alive(),
+            }
@@ -0,0 +1,176 @@
+"""
+Resampler
+OHLCV resampling on epoch arithmetic, aligned to the NSE session
+
+Bucket ids are computed straight from int64 epoch seconds: shift to IST,
+split into day and second-of-day, and floor the second-of-day onto a grid
+anchored at the session open (09:15), so hourly bars run 09:15-10:15 ...
+15:15-15:30 without shifting the index back and forth. Candles must be
+time sorted; each bucket is then a contiguous run and is aggregated with
+np.maximum.reduceat / np.minimum.reduceat / np.add.reduceat plus first /
+last picks - no pandas resample, no empty buckets to drop.
+
+Because every grid is anchored at the same point of the day and each
+level divides the next, a pyramid 1m -> 5m -> 15m -> 1h -> 1D can be built
+level by level from the previous one; build_pyramid() does that once and
+pyramid_cache keeps the result until the next 1-minute candle closes.
+
+    times, columns = resample_arrays(times, columns, 900)
+    pyramid = build_pyramid(times, columns)
+"""
+
+import logging
+import re
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.services.candle_store import candles_to_frame
+from app.services.indicator_cache import DAY, IST_OFFSET, SESSION_OPEN, IndicatorCache
+from app.services.swing_levels import epoch_seconds
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+Columns = Dict[str, np.ndarray]
+
+# Pyramid levels, each built from the one before (seconds per bar)
+PYRAMID_LEVELS = (("5m", 300), ("15m", 900), ("1h", 3600), ("1D", DAY))
+
+# Minute / hour / day units ('M' is left to pandas: month)
+_UNITS = {"": 60, "m": 60, "min": 60, "T": 60, "h": 3600, "H": 3600, "d": DAY, "D": DAY}
+
+
+def timeframe_seconds(timeframe: str) -> Optional[int]:
+    """
+    '15m' / '15T' / '15min' / 'H' / '1h' / 'D' / '1D' / '24h' -> seconds
+
+    None for multi-day frames ('2D', '48h'), W, M and other aliases - those
+    are left to pandas.
+    """
+    match = re.fullmatch(r"(\d*)\s*(min|m|T|h|H|d|D)?", str(timeframe).strip())
+    if not match:
+        return None
+    count = int(match.group(1) or 1)
+    if count <= 0:
+        return None
+    seconds = count * _UNITS[match.group(2) or ""]
+    return seconds if seconds <= DAY else None
+
+
+def parse_session_time(value: str) -> int:
+    """'HH:MM' -> seconds after midnight"""
+    hours, minutes = map(int, value.split(':'))
+    return hours * 3600 + minutes * 60
+
+
+# ============================================================================
+# Arrays
+# ============================================================================
+
+def bucket_starts(times: np.ndarray, seconds: int, anchor: int = SESSION_OPEN) -> np.ndarray:
+    """
+    Epoch second at which each candle's bucket starts
+
+    Intraday grids are anchored at `anchor` seconds after IST midnight;
+    daily buckets (seconds == 1 day) start at IST midnight. Multi-day
+    buckets are not supported.
+    """
+    if seconds > DAY:
+        raise ValueError(f"Bucket of {seconds}s spans more than one day")
+    local = times + IST_OFFSET
+    day = local - local % DAY
+    if seconds == DAY:
+        return day - IST_OFFSET
+    offset = local - day - anchor
+    return day + anchor + offset - offset % seconds - IST_OFFSET
+
+
+def resample_arrays(times: np.ndarray, columns: Columns, seconds: int,
+                    anchor: int = SESSION_OPEN) -> Tuple[np.ndarray, Columns]:
+    """
+    Aggregate sorted candles into `seconds` buckets
+
+    Args:
+        times: int64 epoch seconds, ascending
+        columns: "o", "h", "l", "c", "v" arrays aligned with times
+
+    Returns:
+        (bucket start times, aggregated columns)
+    """
+    if len(times) == 0:
+        return times, {name: values[:0] for name, values in columns.items()}
+
+    buckets = bucket_starts(times, seconds, anchor)
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.append(starts[1:], len(times)) - 1
+    return buckets[starts], {
+        "o": columns["o"][starts],
+        "h": np.maximum.reduceat(columns["h"], starts),
+        "l": np.minimum.reduceat(columns["l"], starts),
+        "c": columns["c"][ends],
+        "v": np.add.reduceat(columns["v"], starts),
+    }
+
+
+def build_pyramid(times: np.ndarray, columns: Columns,
+                  anchor: int = SESSION_OPEN) -> Dict[str, Tuple[np.ndarray, Columns]]:
+    """1m base -> {'1m', '5m', '15m', '1h', '1D'}, each level aggregated from the previous one"""
+    pyramid = {"1m": (times, columns)}
+    for name, seconds in PYRAMID_LEVELS:
+        times, columns = resample_arrays(times, columns, seconds, anchor)
+        pyramid[name] = (times, columns)
+    return pyramid
+
+
+# ============================================================================
+# DataFrames
+# ============================================================================
+
+def frame_arrays(df: pd.DataFrame, session_close: Optional[int] = None) -> Tuple[np.ndarray, Columns]:
+    """
+    OHLCV DataFrame (Timestamp column or index) -> sorted epoch seconds + columns
+
+    Args:
+        session_close: Drop candles after this many seconds past IST midnight
+    """
+    stamps = df['Timestamp'] if 'Timestamp' in df.columns else df.index.to_series()
+    times = epoch_seconds(stamps)
+    columns = {
+        "o": df['Open'].to_numpy(dtype=np.float64),
+        "h": df['High'].to_numpy(dtype=np.float64),
+        "l": df['Low'].to_numpy(dtype=np.float64),
+        "c": df['Close'].to_numpy(dtype=np.float64),
+        "v": df['Volume'].to_numpy(dtype=np.int64),
+    }
+
+    keep = ~(np.isnan(columns["o"]) | np.isnan(columns["c"]))
+    if session_close is not None:
+        keep &= (times + IST_OFFSET) % DAY <= session_close
+    if not keep.all():
+        times = times[keep]
+        columns = {name: values[keep] for name, values in columns.items()}
+
+    if len(times) > 1 and (np.diff(times) < 0).any():
+        order = np.argsort(times, kind="stable")
+        times = times[order]
+        columns = {name: values[order] for name, values in columns.items()}
+    return times, columns
+
+
+def arrays_frame(times: np.ndarray, columns: Columns) -> pd.DataFrame:
+    """Aggregated arrays -> OHLCV DataFrame indexed by IST 'Timestamp'"""
+    return candles_to_frame(times, columns).set_index('Timestamp')
+
+
+def resample_frame(df: pd.DataFrame, seconds: int, anchor: int = SESSION_OPEN,
+                   session_close: Optional[int] = None) -> pd.DataFrame:
+    """DataFrame in, session-aligned OHLCV DataFrame (IST Timestamp index) out"""
+    times, columns = frame_arrays(df, session_close)
+    return arrays_frame(*resample_arrays(times, columns, seconds, anchor))
+
+
+# Built pyramids, valid until the next 1-minute candle closes
+pyramid_cache = IndicatorCache(max_entries=settings.PYRAMID_CACHE_MAX_ENTRIES,
+                               max_bytes=settings.PYRAMID_CACHE_MAX_MB * 1024 * 1024)
@@ -0,0 +1,1019 @@
+"""
+Streaming Indicators
+Stateful, incrementally updated versions of the technical indicators
+
+Each indicator is seeded once from history (the same OHLC DataFrame that
+TechnicalIndicatorsService.fetch_ohlc returns) and then advanced one bar at a
+time, so a live strategy or websocket chart channel does not have to re-run
+calculate_* over thousands of rows on every tick.
+
+    indicator = StreamingRSI(period=14)
+    indicator.seed(df)                       # replay history once
+    indicator.update(closed_bar)             # bar close: commit, O(1)
+    indicator.update_partial(tick)           # forming bar: peek, nothing committed
+
+Values match the batch calculate_* methods in app/api/technical_indicators.py
+bar for bar (same warm-up lengths, same pandas ewm/rolling semantics).
+
+Bars and ticks:
+    - A bar is a dict with open/high/low/close[/volume] keys (lower-case or
+      capitalised, as in the OHLC DataFrames), or a plain number (used as
+      open = high = low = close)
+    - update_partial() merges ticks into the forming bar (running high/low,
+      latest close) until the next update() commits a closed bar
+
+Undefined values (warm-up, division by zero) are returned as None.
+"""
+
+import logging
+import math
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+NaN = float('nan')
+
+
+class Bar(NamedTuple):
+    """Single OHLCV bar used internally by the streaming indicators"""
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float = 0.0
+
+
+def _field(bar: Dict[str, Any], name: str) -> Optional[float]:
+    """Read a bar field by lower-case or capitalised key"""
+    value = bar.get(name)
+    if value is None:
+        value = bar.get(name.capitalize())
+    return None if value is None else float(value)
+
+
+def to_bar(data: Any) -> Bar:
+    """Normalise a bar dict / Bar / price into a Bar"""
+    if isinstance(data, Bar):
+        return data
+
+    if isinstance(data, (int, float)):
+        price = float(data)
+        return Bar(price, price, price, price, 0.0)
+
+    close = _field(data, 'close')
+    if close is None:
+        # Websocket ticks carry the last traded price instead of a close
+        close = _field(data, 'ltp')
+    if close is None:
+        raise ValueError("Bar must contain a 'close' (or 'ltp') value")
+
+    open_ = _field(data, 'open')
+    high = _field(data, 'high')
+    low = _field(data, 'low')
+    volume = _field(data, 'volume')
+
+    return Bar(
+        close if open_ is None else open_,
+        close if high is None else high,
+        close if low is None else low,
+        close,
+        0.0 if volume is None else volume
+    )
+
+
+def _clean(value: float) -> Optional[float]:
+    """NaN/inf -> None for JSON-friendly outputs"""
+    if value is None or math.isnan(value) or math.isinf(value):
+        return None
+    return float(value)
+
+
+def _div(numerator: float, denominator: float) -> float:
+    """Float division with pandas/NumPy semantics (x/0 -> +-inf, 0/0 -> NaN)"""
+    if denominator == 0:
+        if numerator == 0 or math.isnan(numerator):
+            return NaN
+        return math.copysign(math.inf, numerator)
+    return numerator / denominator
+
+
+def _true_range(bar: Bar, prev_close: Optional[float]) -> float:
+    """True Range; NaN for the first bar (matches max(axis=1, skipna=False))"""
+    if prev_close is None:
+        return NaN
+    return max(bar.high - bar.low, abs(bar.high - prev_close), abs(bar.low - prev_close))
+
+
+# ============================================================================
+# STATE HELPERS
+# ============================================================================
+
+class _Ewm:
+    """
+    Running pandas ewm(adjust=True).mean() state
+
+    Keeps the weighted numerator/denominator so each step is O(1).
+    Leading NaNs are skipped and min_periods counts valid observations,
+    exactly as pandas does.
+    """
+
+    __slots__ = ('decay', 'min_periods', 'num', 'den', 'nobs')
+
+    def __init__(self, alpha: float, min_periods: int = 0):
+        self.decay = 1.0 - alpha
+        self.min_periods = max(min_periods, 1)
+        self.num = 0.0
+        self.den = 0.0
+        self.nobs = 0
+
+    def peek(self, x: float) -> Tuple[float, Tuple[float, float, int]]:
+        """Return (value, state) after observing x, without committing"""
+        if math.isnan(x):
+            num, den, nobs = self.num * self.decay, self.den * self.decay, self.nobs
+        else:
+            num, den, nobs = self.num * self.decay + x, self.den * self.decay + 1.0, self.nobs + 1
+
+        value = num / den if nobs >= self.min_periods else NaN
+        return value, (num, den, nobs)
+
+    def commit(self, state: Tuple[float, float, int]) -> None:
+        self.num, self.den, self.nobs = state
+
+
+class _Window:
+    """
+    Fixed-size window with a running sum (rolling(period).sum())
+
+    Tracks the number of non-zero values so an all-zero window sums to
+    exactly 0 (no add/subtract residue), as pandas' rolling sums do.
+    """
+
+    __slots__ = ('period', 'values', 'total', 'nonzero')
+
+    def __init__(self, period: int):
+        self.period = period
+        self.values = deque(maxlen=period)
+        self.total = 0.0
+        self.nonzero = 0
+
+    def peek(self, x: float) -> Tuple[float, int]:
+        """Return (sum, count) of the window with x appended"""
+        nonzero = self.nonzero + (x != 0)
+        if len(self.values) == self.period:
+            oldest = self.values[0]
+            nonzero -= (oldest != 0)
+            total, count = self.total + x - oldest, self.period
+        else:
+            total, count = self.total + x, len(self.values) + 1
+        return (total if nonzero else 0.0), count
+
+    def commit(self, x: float, total: float) -> None:
+        if len(self.values) == self.period:
+            self.nonzero -= (self.values[0] != 0)
+        self.nonzero += (x != 0)
+        self.values.append(x)
+        self.total = total
+
+
+class _Wilder:
+    """
+    Wilder smoothing state (RMA)
+
+    The first value is the mean of the first period observations, then
+    avg = ((period - 1) * prev_avg + x) / period.
+    """
+
+    __slots__ = ('period', 'seed_sum', 'seed_count', 'value')
+
+    def __init__(self, period: int):
+        self.period = period
+        self.seed_sum = 0.0
+        self.seed_count = 0
+        self.value = NaN
+
+    def peek(self, x: float) -> Tuple[float, Tuple[float, int, float]]:
+        if self.seed_count < self.period:
+            seed_sum, seed_count = self.seed_sum + x, self.seed_count + 1
+            value = seed_sum / seed_count if seed_count == self.period else NaN
+            return value, (seed_sum, seed_count, value)
+
+        value = ((self.period - 1) * self.value + x) / self.period
+        return value, (self.seed_sum, self.seed_count, value)
+
+    def commit(self, state: Tuple[float, int, float]) -> None:
+        self.seed_sum, self.seed_count, self.value = state
+
+
+# ============================================================================
+# BASE CLASS
+# ============================================================================
+
+class StreamingIndicator:
+    """
+    Base class for the streaming indicators
+
+    Subclasses implement:
+        _evaluate(bar) -> (raw_value, state)   pure, must not mutate self
+        _commit(bar, state)                    apply the state for a closed bar
+        _format(raw_value)                     public value (float / dict)
+        _reset()                               clear all state
+    """
+
+    name = "indicator"
+
+    def __init__(self):
+        self.bars = 0
+        self.value: Any = None
+        self._forming: Optional[Bar] = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    # ----- public API -----
+
+    def seed(self, ohlc_df: pd.DataFrame) -> Any:
+        """
+        Reset and replay history
+
+        Args:
+            ohlc_df: DataFrame with Open/High/Low/Close[/Volume] columns, oldest first
+
+        Returns:
+            Latest value after the last historical bar
+        """
+        with self._lock:
+            self._reset()
+            self.bars = 0
+            self.value = self._format(None)
+            self._forming = None
+
+            columns = [ohlc_df[col].to_numpy(dtype=float) for col in ('Open', 'High', 'Low', 'Close')]
+            volume = ohlc_df['Volume'].to_numpy(dtype=float) if 'Volume' in ohlc_df else [0.0] * len(ohlc_df)
+
+            for o, h, l, c, v in zip(*columns, volume):
+                self._advance(Bar(o, h, l, c, v))
+
+            logger.debug(f"{self.name} seeded with {self.bars} bars")
+            return self.value
+
+    def update(self, bar: Any) -> Any:
+        """
+        Commit a closed bar and return the new value (O(1))
+
+        Args:
+            bar: Closed bar (dict with open/high/low/close, Bar or price)
+
+        Returns:
+            Indicator value for the closed bar
+        """
+        with self._lock:
+            self._forming = None
+            return self._advance(to_bar(bar))
+
+    def update_partial(self, tick: Any) -> Any:
+        """
+        Value for the still-forming bar, without committing anything
+
+        Ticks are merged into the forming bar (running high/low, latest
+        close); the next update() discards it and commits the closed bar.
+
+        Args:
+            tick: Partial bar dict, tick dict with 'ltp', Bar or price
+
+        Returns:
+            Indicator value as if the forming bar closed now
+        """
+        with self._lock:
+            bar = to_bar(tick)
+            if self._forming is not None:
+                bar = Bar(
+                    self._forming.open,
+                    max(self._forming.high, bar.high),
+                    min(self._forming.low, bar.low),
+                    bar.close,
+                    max(self._forming.volume, bar.volume)
+                )
+            self._forming = bar
+
+            raw, _ = self._evaluate(bar)
+            return self._format(raw)
+
+    @property
+    def ready(self) -> bool:
+        """True once the indicator has produced a defined value"""
+        value = self.value
+        if isinstance(value, dict):
+            return any(v is not None for v in value.values())
+        return value is not None
+
+    # ----- internals -----
+
+    def _advance(self, bar: Bar) -> Any:
+        raw, state = self._evaluate(bar)
+        self._commit(bar, state)
+        self.bars += 1
+        self.value = self._format(raw)
+        return self.value
+
+    def _format(self, raw: Any) -> Any:
+        return _clean(NaN if raw is None else raw)
+
+    def _reset(self) -> None:
+        raise NotImplementedError
+
+    def _evaluate(self, bar: Bar) -> Tuple[Any, Any]:
+        raise NotImplementedError
+
+    def _commit(self, bar: Bar, state: Any) -> None:
+        raise NotImplementedError
+
+
+# ============================================================================
+# MOVING AVERAGES
+# ============================================================================
+
+class StreamingEMA(StreamingIndicator):
+    """EMA - matches df[column].ewm(span=period, min_periods=min_periods).mean()"""
+
+    name = "ema"
+
+    def __init__(self, period: int = 14, column: str = 'close', min_periods: int = 0):
+        self.period = period
+        self.column = column.lower()
+        self.min_periods = min_periods
+        super().__init__()
+
+    def _reset(self) -> None:
+        self._ewm = _Ewm(2.0 / (self.period + 1), self.min_periods)
+
+    def _evaluate(self, bar):
+        return self._ewm.peek(getattr(bar, self.column))
+
+    def _commit(self, bar, state):
+        self._ewm.commit(state)
+
+
+class StreamingSMA(StreamingIndicator):
+    """SMA - matches df[column].rolling(window=period).mean()"""
+
+    name = "sma"
+
+    def __init__(self, period: int = 20, column: str = 'close'):
+        self.period = period
+        self.column = column.lower()
+        super().__init__()
+
+    def _reset(self) -> None:
+        self._window = _Window(self.period)
+
+    def _evaluate(self, bar):
+        x = getattr(bar, self.column)
+        total, count = self._window.peek(x)
+        value = total / self.period if count == self.period else NaN
+        return value, (x, total)
+
+    def _commit(self, bar, state):
+        self._window.commit(*state)
+
+
+class StreamingWMA(StreamingIndicator):
+    """
+    WMA - matches TechnicalIndicatorsService.calculate_wma()
+
+    Linear default weights update in O(1) with the running numerator trick
+    (num_t = num_{t-1} + period * x_t - sum_{t-1}); arbitrary custom weights
+    have no such recurrence and take one pass over the ring buffer (newest
+    first, no copy).
+    """
+
+    name = "wma"
+
+    def __init__(self, period: int = 4, weights: Optional[List[float]] = None, column: str = 'close'):
+        if period < 1:
+            raise ValueError(f"Period ({period}) must be >= 1")
+        if weights is not None:
+            if len(weights) != period:
+                raise ValueError(f"Weights length ({len(weights)}) must equal period ({period})")
+            weight_sum = sum(weights)
+            if abs(weight_sum - 1.0) > 0.001:
+                weights = [w / weight_sum for w in weights]
+
+        self.period = period
+        self.weights = weights
+        self.column = column.lower()
+        super().__init__()
+
+    def _reset(self) -> None:
+        self._window = _Window(self.period)
+        self._numerator = 0.0   # sum((period - j) * x[t-j]) over the window
+
+    def _evaluate(self, bar):
+        x = getattr(bar, self.column)
+        total, count = self._window.peek(x)
+
+        if self.weights is None:
+            # Every value already in the window loses one unit of weight; the
+            # oldest one drops to weight 0 and falls out of the window
+            numerator = self._numerator + self.period * x - self._window.total
+            value = numerator / (self.period * (self.period + 1) / 2) if count == self.period else NaN
+        else:
+            numerator = 0.0
+            value = NaN
+            if count == self.period:
+                # weights[1:] pair with the window newest first; zip stops
+                # before the oldest value, which drops out with this bar
+                value = self.weights[0] * x
+                for w, v in zip(self.weights[1:], reversed(self._window.values)):
+                    value += w * v
+
+        return value, (x, total, numerator)
+
+    def _commit(self, bar, state):
+        x, total, numerator = state
+        self._window.commit(x, total)
+        self._numerator = numerator
+
+
+# ============================================================================
+# VOLATILITY
+# ============================================================================
+
+class StreamingATR(StreamingIndicator):
+    """
+    ATR - matches calculate_atr() (TR.ewm(com=period, min_periods=period)),
+    or calculate_atr_wilder() with wilder=True
+    """
+
+    name = "atr"
+
+    def __init__(self, period: int = 14, wilder: bool = False):
+        self.period = period
+        self.wilder = wilder
+        super().__init__()
+
+    def _reset(self) -> None:
+        self._prev_close: Optional[float] = None
+        if self.wilder:
+            self._avg = _Wilder(self.period)
+        else:
+            self._avg = _Ewm(1.0 / (1 + self.period), self.period)
+
+    def _evaluate(self, bar):
+        tr = _true_range(bar, self._prev_close)
+        if self.wilder and math.isnan(tr):
+            # First bar has no TR; Wilder's seed averages TR[1:period+1]
+            return NaN, None
+        return self._avg.peek(tr)
+
+    def _commit(self, bar, state):
+        if state is not None:
+            self._avg.commit(state)
+        self._prev_close = bar.close
+
+
+class StreamingBollingerBands(StreamingIndicator):
+    """
+    Bollinger Bands - matches calculate_bollinger_bands() (sample std, ddof=1)
+
+    The window mean and variance are maintained with Welford's update /
+    downdate, so each bar is O(1) and numerically stable.
+    """
+
+    name = "bollinger"
+
+    def __init__(self, period: int = 20, std_dev: float = 2.0):
+        self.period = period
+        self.std_dev = std_dev
+        super().__init__()
+
+    def _reset(self) -> None:
+        self._values = deque(maxlen=self.period)
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def _evaluate(self, bar):
+        x = bar.close
+        n = len(self._values)
+
+        if n < self.period:
+            # Welford update (window still filling)
+            count = n + 1
+            delta = x - self._mean
+            mean = self._mean + delta / count
+            m2 = self._m2 + delta * (x - mean)
+        else:
+            # Replace the oldest value: combined update + downdate
+            count = n
+            oldest = self._values[0]
+            mean = self._mean + (x - oldest) / count
+            m2 = self._m2 + (x - oldest) * (x - mean + oldest - self._mean)
+
+        m2 = max(m2, 0.0)
+
+        if count < self.period:
+            return None, (x, mean, m2)
+
+        std = math.sqrt(m2 / (count - 1)) if count > 1 else NaN
+        upper = mean + std * self.std_dev
+        lower = mean - std * self.std_dev
+        return (mean, upper, lower, upper - lower), (x, mean, m2)
+
+    def _commit(self, bar, state):
+        x, self._mean, self._m2 = state
+        self._values.append(x)
+
+    def _format(self, raw):
+        if raw is None:
+            return {"ma": None, "upper": None, "lower": None, "width": None}
+        mean, upper, lower, width = raw
+        return {"ma": _clean(mean), "upper": _clean(upper), "lower": _clean(lower), "width": _clean(width)}
+
+
+# ============================================================================
+# MOMENTUM
+# ============================================================================
+
+class StreamingRSI(StreamingIndicator):
+    """
+    RSI - matches calculate_rsi() (rolling means of gains/losses),
+    or calculate_rsi_wilder() with wilder=True
+    """
+
+    name = "rsi"
+
+    def __init__(self, period: int = 14, wilder: bool = False):
+        self.period = period
+        self.wilder = wilder
+        super().__init__()
+
+    def _reset(self) -> None:
+        self._prev_close: Optional[float] = None
+        if self.wilder:
+            self._gain, self._loss = _Wilder(self.period), _Wilder(self.period)
+        else:
+            self._gain, self._loss = _Window(self.period), _Window(self.period)
+
+    def _evaluate(self, bar):
+        if self._prev_close is None:
+            gain = loss = 0.0
+        else:
+            delta = bar.close - self._prev_close
+            gain, loss = max(delta, 0.0), max(-delta, 0.0)
+
+        if self.wilder:
+            if self._prev_close is None:
+                # Wilder's seed averages the moves of bars 1..period
+                return NaN, None
+            avg_gain, gain_state = self._gain.peek(gain)
+            avg_loss, loss_state = self._loss.peek(loss)
+        else:
+            gain_total, count = self._gain.peek(gain)
+            loss_total, _ = self._loss.peek(loss)
+            ready = count == self.period
+            avg_gain = gain_total / self.period if ready else NaN
+            avg_loss = loss_total / self.period if ready else NaN
+            gain_state, loss_state = (gain, gain_total), (loss, loss_total)
+
+        rs = _div(avg_gain, avg_loss)
+        value = 100 - 100 / (1 + rs) if not math.isnan(rs) else NaN
+        return value, (gain_state, loss_state)
+
+    def _commit(self, bar, state):
+        if state is not None:
+            gain_state, loss_state = state
+            if self.wilder:
+                self._gain.commit(gain_state)
+                self._loss.commit(loss_state)
+            else:
+                self._gain.commit(*gain_state)
+                self._loss.commit(*loss_state)
+        self._prev_close = bar.close
+
+
+class StreamingMACD(StreamingIndicator):
+    """MACD - matches calculate_macd() (ewm spans with min_periods = span)"""
+
+    name = "macd"
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = fast
+        self.slow = slow
+        self.signal = signal
+        super().__init__()
+
+    def _reset(self) -> None:
+        self._fast = _Ewm(2.0 / (self.fast + 1), self.fast)
+        self._slow = _Ewm(2.0 / (self.slow + 1), self.slow)
+        self._signal = _Ewm(2.0 / (self.signal + 1), self.signal)
+
+    def _evaluate(self, bar):
+        fast, fast_state = self._fast.peek(bar.close)
+        slow, slow_state = self._slow.peek(bar.close)
+        macd = fast - slow
+        signal, signal_state = self._signal.peek(macd)
+        return (macd, signal, macd - signal), (fast_state, slow_state, signal_state)
+
+    def _commit(self, bar, state):
+        fast_state, slow_state, signal_state = state
+        self._fast.commit(fast_state)
+        self._slow.commit(slow_state)
+        self._signal.commit(signal_state)
+
+    def _format(self, raw):
+        if raw is None:
+            return {"macd": None, "signal": None, "histogram": None}
+        macd, signal, histogram = raw
+        return {"macd": _clean(macd), "signal": _clean(signal), "histogram": _clean(histogram)}
+
+
+class StreamingStochastic(StreamingIndicator):
+    """
+    Stochastic K/D - matches calculate_stochastic()
+
+    Highest high / lowest low come from monotonic deques of (index, value),
+    so each bar is amortised O(1) instead of a max/min over the window.
+    """
+
+    name = "stochastic"
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        super().__init__()
+
+    def _reset(self) -> None:
+        self._highs = deque()          # decreasing highs
+        self._lows = deque()           # increasing lows
+        self._k = deque([NaN, NaN], maxlen=2)
+
+    def _window_extreme(self, extremes: deque, value: float, pick: Callable) -> float:
+        """Extreme over the window ending at the new bar, without mutating"""
+        first_valid = self.bars - self.period + 1
+        # Only the front entry can have left the window; the next one is inside
+        if extremes and extremes[0][0] >= first_valid:
+            return pick(extremes[0][1], value)
+        if len(extremes) > 1:
+            return pick(extremes[1][1], value)
+        return value
+
+    def _evaluate(self, bar):
+        if self.bars + 1 < self.period:
+            k = NaN
+        else:
+            highest_high = self._window_extreme(self._highs, bar.high, max)
+            lowest_low = self._window_extreme(self._lows, bar.low, min)
+            k = _div((bar.close - lowest_low) * 100, highest_high - lowest_low)
+
+        d = (self._k[0] + self._k[1] + k) / 3
+        return (k, d), k
+
+    def _commit(self, bar, state):
+        index = self.bars
+        first_valid = index - self.period + 1
+
+        while self._highs and self._highs[-1][1] <= bar.high:
+            self._highs.pop()
+        self._highs.append((index, bar.high))
+        while self._highs[0][0] < first_valid:
+            self._highs.popleft()
+
+        while self._lows and self._lows[-1][1] >= bar.low:
+            self._lows.pop()
+        self._lows.append((index, bar.low))
+        while self._lows[0][0] < first_valid:
+            self._lows.popleft()
+
+        self._k.append(state)
+
+    def _format(self, raw):
+        if raw is None:
+            return {"k": None, "d": None}
+        k, d = raw
+        return {"k": _clean(k), "d": _clean(d)}
+
+
+class StreamingBreakout(StreamingIndicator):
+    """
+    Range breakouts over several lookbacks - matches detect_breakout()
+
+    For each lookback k: up when High breaks the highest High of the
+    previous k bars, down when Low breaks the lowest Low. One monotonic
+    deque of (index, value) per lookback and side keeps every bar
+    amortised O(1) per lookback; NaN highs / lows never enter a deque
+    (pandas max/min skip them).
+
+    Value: {"breakout": any side of any lookback, "up_<k>": bool, "down_<k>": bool, ...}
+    """
+
+    name = "breakout"
+
+    def __init__(self, lookbacks: Any = (5, 20, 55)):
+        if isinstance(lookbacks, (int, float)):
+            lookbacks = (lookbacks,)
+        self.lookbacks = tuple(int(k) for k in lookbacks)
+        if not self.lookbacks or min(self.lookbacks) < 1:
+            raise ValueError("lookbacks must be positive integers")
+        super().__init__()
+
+    def _reset(self) -> None:
+        self._highs = {k: deque() for k in self.lookbacks}   # decreasing highs
+        self._lows = {k: deque() for k in self.lookbacks}    # increasing lows
+
+    def _evaluate(self, bar):
+        flags = {}
+        for k in self.lookbacks:
+            # Deques only hold the last k bars (trimmed on commit)
+            highs, lows = self._highs[k], self._lows[k]
+            ready = self.bars >= k
+            flags[k] = (bool(ready and highs and bar.high > highs[0][1]),
+                        bool(ready and lows and bar.low < lows[0][1]))
+        return flags, None
+
+    def _commit(self, bar, state):
+        index = self.bars
+
+        for k in self.lookbacks:
+            first_valid = index + 1 - k
+            highs, lows = self._highs[k], self._lows[k]
+
+            if bar.high == bar.high:
+                while highs and highs[-1][1] <= bar.high:
+                    highs.pop()
+                highs.append((index, bar.high))
+            while highs and highs[0][0] < first_valid:
+                highs.popleft()
+
+            if bar.low == bar.low:
+                while lows and lows[-1][1] >= bar.low:
+                    lows.pop()
+                lows.append((index, bar.low))
+            while lows and lows[0][0] < first_valid:
+                lows.popleft()
+
+    def _format(self, raw):
+        if raw is None:
+            return None
+        value = {"breakout": any(up or down for up, down in raw.values())}
+        for k, (up, down) in raw.items():
+            value[f"up_{k}"] = up
+            value[f"down_{k}"] = down
+        return value
+
+
+# ============================================================================
+# TREND
+# ============================================================================
+
+class StreamingADX(StreamingIndicator):
+    """
+    ADX / DI+ / DI- - matches calculate_adx()
+
+    TR and DM sums use Wilder's running sum seeded with the sum of the first
+    period+1 values; ADX is seeded at bar 2*period-1 with the mean of DX.
+    """
+
+    name = "adx"
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        super().__init__()
+
+    def _reset(self) -> None:
+        self._prev: Optional[Bar] = None
+        self._trn = 0.0                 # seed sums until bar `period`, then smoothed
+        self._dmp = 0.0
+        self._dmm = 0.0
+        self._dx_sum = 0.0
+        self._dx_count = 0
+        self._adx = NaN
+
+    def _evaluate(self, bar):
+        i = self.bars
+        p = self.period
+        prev = self._prev
+
+        tr = _true_range(bar, None if prev is None else prev.close)
+        if prev is None:
+            dm_plus = dm_minus = 0.0
+        else:
+            up = bar.high - prev.high
+            down = prev.low - bar.low
+            dm_plus = max(up, 0.0) if up > down else 0.0
+            dm_minus = max(down, 0.0) if down > up else 0.0
+
+        if i <= p:
+            # Seed phase: plain sums (NaN TR of the first bar is skipped)
+            trn = self._trn + (0.0 if math.isnan(tr) else tr)
+            dmp = self._dmp + dm_plus
+            dmm = self._dmm + dm_minus
+        else:
+            trn = self._trn - self._trn / p + tr
+            dmp = self._dmp - self._dmp / p + dm_plus
+            dmm = self._dmm - self._dmm / p + dm_minus
+
+        di_plus = di_minus = dx = NaN
+        if i >= p:
+            di_plus = 100 * _div(dmp, trn)
+            di_minus = 100 * _div(dmm, trn)
+            dx = 100 * _div(abs(di_plus - di_minus), di_plus + di_minus)
+
+        dx_sum, dx_count, adx = self._dx_sum, self._dx_count, self._adx
+        if p <= i <= 2 * p - 1:
+            if not math.isnan(dx):
+                dx_sum, dx_count = dx_sum + dx, dx_count + 1
+            if i == 2 * p - 1:
+                adx = dx_sum / dx_count if dx_count else NaN
+        elif i > 2 * p - 1:
+            adx = ((p - 1) * adx + dx) / p
+
+        return (adx, di_plus, di_minus), (trn, dmp, dmm, dx_sum, dx_count, adx)
+
+    def _commit(self, bar, state):
+        self._trn, self._dmp, self._dmm, self._dx_sum, self._dx_count, self._adx = state
+        self._prev = bar
+
+    def _format(self, raw):
+        if raw is None:
+            return {"adx": None, "di_plus": None, "di_minus": None}
+        adx, di_plus, di_minus = raw
+        return {"adx": _clean(adx), "di_plus": _clean(di_plus), "di_minus": _clean(di_minus)}
+
+
+class StreamingSupertrend(StreamingIndicator):
+    """
+    Supertrend - matches TechnicalIndicatorsService.calculate_supertrend()
+
+    ATR = TR.ewm(com=period, min_periods=period); bands ratchet from bar
+    period+1 and the line is seeded at bar period, then follows the same
+    band-equality trend flips as indicator_kernels.supertrend_direction().
+    """
+
+    name = "supertrend"
+
+    def __init__(self, period: int = 7, multiplier: float = 3.0):
+        self.period = period
+        self.multiplier = multiplier
+        super().__init__()
+
+    def _reset(self) -> None:
+        self._atr = _Ewm(1.0 / (1 + self.period), self.period)
+        self._prev_close: Optional[float] = None
+        self._prev_upper = NaN
+        self._prev_lower = NaN
+        self._prev_strend = NaN
+
+    def _evaluate(self, bar):
+        i = self.bars
+        p = self.period
+
+        # TR of the first bar is High-Low (max(axis=1) skips the NaN components)
+        if self._prev_close is None:
+            tr = bar.high - bar.low
+        else:
+            tr = _true_range(bar, self._prev_close)
+        atr, atr_state = self._atr.peek(tr)
+
+        hl2 = (bar.high + bar.low) / 2
+        upper = hl2 + self.multiplier * atr
+        lower = hl2 - self.multiplier * atr
+
+        if i >= max(p + 1, 1):
+            if self._prev_close <= self._prev_upper:
+                upper = min(upper, self._prev_upper)
+            if self._prev_close >= self._prev_lower:
+                lower = max(lower, self._prev_lower)
+
+        strend, trend = NaN, 0
+        if i == p:
+            strend, trend = (upper, -1) if bar.close < upper else (lower, 1)
+        elif i > p:
+            if self._prev_strend == self._prev_upper:
+                strend, trend = (upper, -1) if bar.close <= upper else (lower, 1)
+            elif self._prev_strend == self._prev_lower:
+                strend, trend = (lower, 1) if bar.close >= lower else (upper, -1)
+
+        return (strend, trend, upper, lower), (atr_state, upper, lower, strend)
+
+    def _commit(self, bar, state):
+        atr_state, self._prev_upper, self._prev_lower, self._prev_strend = state
+        self._atr.commit(atr_state)
+        self._prev_close = bar.close
+
+    def _format(self, raw):
+        if raw is None:
+            return {"supertrend": None, "trend": 0, "final_upper": None, "final_lower": None}
+        strend, trend, upper, lower = raw
+        return {
+            "supertrend": _clean(strend),
+            "trend": int(trend),
+            "final_upper": _clean(upper),
+            "final_lower": _clean(lower)
+        }
+
+
+# ============================================================================
+# FACTORY / REGISTRY
+# ============================================================================
+
+STREAMING_INDICATORS: Dict[str, type] = {
+    cls.name: cls for cls in (
+        StreamingEMA, StreamingSMA, StreamingWMA, StreamingATR, StreamingRSI, StreamingMACD,
+        StreamingBollingerBands, StreamingStochastic, StreamingBreakout, StreamingADX, StreamingSupertrend
+    )
+}
+
+
+def create_indicator(name: str, **params) -> StreamingIndicator:
+    """
+    Build a streaming indicator by name
+
+    Args:
+        name: One of STREAMING_INDICATORS (ema, sma, wma, atr, rsi, macd,
+              bollinger, stochastic, breakout, adx, supertrend)
+        **params: Constructor parameters (period, multiplier, ...)
+
+    Returns:
+        New, unseeded indicator instance
+    """
+    try:
+        cls = STREAMING_INDICATORS[name.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown streaming indicator '{name}'. "
+                         f"Available: {', '.join(sorted(STREAMING_INDICATORS))}")
+    return cls(**params)
+
+
+class StreamingIndicatorRegistry:
+    """
+    One set of live indicator instances per symbol/timeframe
+
+    Example:
+        >>> rsi = streaming_registry.get_or_create("NSE:SBIN-EQ", "5", "rsi", period=14, seed_df=df)
+        >>> streaming_registry.update("NSE:SBIN-EQ", "5", closed_bar)
+        {'rsi:period=14': 61.2}
+    """
+
+    def __init__(self):
+        self._instances: Dict[Tuple[str, str], Dict[str, StreamingIndicator]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(name: str, **params) -> str:
+        """Stable key for an indicator configuration, e.g. 'supertrend:multiplier=3.0,period=7'"""
+        if not params:
+            return name.lower()
+        args = ",".join(f"{k}={params[k]}" for k in sorted(params))
+        return f"{name.lower()}:{args}"
+
+    def get_or_create(self, symbol: str, resolution: str, name: str,
+                      seed_df: Optional[pd.DataFrame] = None, **params) -> StreamingIndicator:
+        """
+        Return the indicator for symbol/timeframe, creating (and seeding) it once
+
+        Args:
+            symbol: Trading symbol
+            resolution: Candle timeframe
+            name: Indicator name (see create_indicator)
+            seed_df: History to seed a newly created instance with
+            **params: Indicator parameters
+        """
+        key = self.make_key(name, **params)
+        with self._lock:
+            indicators = self._instances.setdefault((symbol, str(resolution)), {})
+            indicator = indicators.get(key)
+            if indicator is None:
+                indicator = create_indicator(name, **params)
+                indicators[key] = indicator
+                created = True
+            else:
+                created = False
+
+        if created and seed_df is not None and len(seed_df) > 0:
+            indicator.seed(seed_df)
+        return indicator
+
+    def get(self, symbol: str, resolution: str) -> Dict[str, StreamingIndicator]:
+        """All indicators registered for symbol/timeframe"""
+        with self._lock:
+            return dict(self._instances.get((symbol, str(resolution)), {}))
+
+    def update(self, symbol: str, resolution: str, bar: Any) -> Dict[str, Any]:
+        """Commit a closed bar to every indicator of symbol/timeframe"""
+        return {key: ind.update(bar) for key, ind in self.get(symbol, resolution).items()}
+
+    def update_partial(self, symbol: str, resolution: str, tick: Any) -> Dict[str, Any]:
+        """Forming-bar values of every indicator of symbol/timeframe"""
+        return {key: ind.update_partial(tick) for key, ind in self.get(symbol, resolution).items()}
+
+    def remove(self, symbol: str, resolution: Optional[str] = None) -> None:
+        """Drop indicators for a symbol (one timeframe or all)"""
+        with self._lock:
+            for key in list(self._instances):
+                if key[0] == symbol and (resolution is None or key[1] == str(resolution)):
+                    del self._instances[key]
+
+
+# Global registry instance
+streaming_registry = StreamingIndicatorRegistry()
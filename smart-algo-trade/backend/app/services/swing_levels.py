@@ -0,0 +1,421 @@
+"""
+Swing Levels
+Support / resistance from clustered swing highs and lows
+
+A swing high is a High above the `window` bars before it and not below the
+`window` bars after it; swing lows mirror it on Low. A swing is therefore confirmed `window` bars after it
+prints and never changes afterwards, which is what lets the level set be
+built once over the full history and then extended bar by bar: each new
+closed bar only needs a scan of a short tail buffer, not of the history.
+
+Swing prices are folded chronologically into clusters - a swing within
+`tolerance` (relative) of an existing level is merged into it (running
+mean price, touch count), otherwise it starts a new level - so the full
+build and the incremental path produce the same levels. Levels are kept
+sorted by price: nearest support / resistance and chart-overlay range
+queries are a bisect over an in-memory list.
+
+Each symbol/resolution level set, with the tail buffer needed to resume,
+is persisted as JSON under SWING_LEVELS_DIR.
+
+    levels = SwingLevels("NSE:SBIN-EQ", "D", window=5, tolerance=0.005)
+    levels.build(df)                          # full history, once
+    levels.extend(recent_df)                  # only bars newer than the last one
+    levels.nearest(612.4)                     # bisect
+    levels.between(590, 640)                  # overlay range
+"""
+
+import bisect
+import json
+import logging
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.services.indicator_cache import last_closed_candle
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================================================
+# Swing detection
+# ============================================================================
+
+def swing_points(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Indices of confirmed swing highs of `values` (pass -low for swing lows)
+
+    Bar i is a swing when it is strictly above the `window` bars before it
+    and not below the `window` bars after it, so a flat top counts once, at
+    its first bar. The rule only looks `window` bars ahead - unlike
+    scipy.signal.find_peaks, which places a flat top at its midpoint and
+    so depends on where the plateau ends - and a swing is final as soon as
+    it is confirmed. Bars closer than `window` to either end are not (yet)
+    confirmed.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if window < 1 or n < 2 * window + 1:
+        return np.empty(0, dtype=np.int64)
+
+    # side_max[j] = max(values[j : j + window])
+    side_max = np.fmax.reduce(sliding_window_view(values, window), axis=1)
+    centre = values[window:n - window]
+    left = side_max[:n - 2 * window]
+    right = side_max[window + 1:]
+    return np.flatnonzero((centre > left) & (centre >= right)).astype(np.int64) + window
+
+
+def epoch_seconds(timestamps) -> np.ndarray:
+    """Timestamp column (naive UTC, tz-aware or epoch numbers) -> int64 epoch seconds"""
+    stamps = timestamps if isinstance(timestamps, pd.Series) else pd.Series(timestamps)
+    if pd.api.types.is_numeric_dtype(stamps):
+        return stamps.to_numpy(dtype=np.int64)
+    if pd.api.types.is_datetime64_any_dtype(stamps):
+        # datetime64 (tz-aware or naive UTC) converts straight to UTC seconds
+        return stamps.to_numpy(dtype="datetime64[s]").astype(np.int64)
+    stamps = pd.to_datetime(stamps)
+    if stamps.dt.tz is not None:
+        stamps = stamps.dt.tz_convert("UTC").dt.tz_localize(None)
+    return stamps.to_numpy(dtype="datetime64[s]").astype(np.int64)
+
+
+# ============================================================================
+# Level set
+# ============================================================================
+
+class SwingLevels:
+    """
+    Clustered swing levels for one symbol / resolution
+
+    Args:
+        symbol: Fyers symbol
+        resolution: Fyers resolution ("5", "60", "D", ...)
+        window: Bars on each side a swing must dominate (confirmation delay)
+        tolerance: Relative distance within which swings join a level (0.005 = 0.5%)
+
+    Each level is a dict: {"price", "touches", "swing_highs", "swing_lows",
+    "first_seen", "last_seen"} (times in epoch seconds).
+    """
+
+    def __init__(self, symbol: str, resolution: str, window: int = 5, tolerance: float = 0.005):
+        if window < 1:
+            raise ValueError("window must be >= 1")
+        if tolerance < 0:
+            raise ValueError("tolerance must be >= 0")
+
+        self.symbol = symbol
+        self.resolution = resolution
+        self.window = window
+        self.tolerance = tolerance
+        self.levels: List[Dict[str, Any]] = []
+        self._prices: List[float] = []
+
+        # Resume state: bars seen, last bar time, index through which swings are decided
+        self.total_bars = 0
+        self.last_time: Optional[int] = None
+        self._decided = -1
+        self._tail_times: List[int] = []
+        self._tail_highs: List[float] = []
+        self._tail_lows: List[float] = []
+
+    @property
+    def tail_size(self) -> int:
+        # Candidates decided on the latest bar plus a full window on each side
+        return 4 * self.window + 2
+
+    # ------------------------------------------------------------------
+    # Clustering
+    # ------------------------------------------------------------------
+
+    def _add_swing(self, price: float, kind: str, when: int) -> None:
+        """Fold one swing into the level set (chronological order)"""
+        prices = self._prices
+        i = bisect.bisect_left(prices, price)
+
+        nearest = None
+        for j in (i - 1, i):
+            if 0 <= j < len(prices) and abs(prices[j] - price) <= self.tolerance * abs(prices[j]):
+                if nearest is None or abs(prices[j] - price) < abs(prices[nearest] - price):
+                    nearest = j
+
+        if nearest is None:
+            level = {"price": price, "touches": 1, "swing_highs": int(kind == "high"),
+                     "swing_lows": int(kind == "low"), "first_seen": when, "last_seen": when}
+            self.levels.insert(i, level)
+            prices.insert(i, price)
+            return
+
+        level = self.levels[nearest]
+        level["price"] += (price - level["price"]) / (level["touches"] + 1)
+        level["touches"] += 1
+        level["swing_highs" if kind == "high" else "swing_lows"] += 1
+        level["last_seen"] = when
+        prices[nearest] = level["price"]
+        self._merge_neighbours(nearest)
+
+    def _merge_neighbours(self, j: int) -> None:
+        """Merge level j with adjacent levels its moved price now overlaps"""
+        for k in (j + 1, j - 1):
+            if not 0 <= k < len(self.levels) or not 0 <= j < len(self.levels):
+                continue
+            a, b = self.levels[min(j, k)], self.levels[max(j, k)]
+            if abs(b["price"] - a["price"]) > self.tolerance * abs(a["price"]):
+                continue
+            touches = a["touches"] + b["touches"]
+            a["price"] = (a["price"] * a["touches"] + b["price"] * b["touches"]) / touches
+            a["touches"] = touches
+            a["swing_highs"] += b["swing_highs"]
+            a["swing_lows"] += b["swing_lows"]
+            a["first_seen"] = min(a["first_seen"], b["first_seen"])
+            a["last_seen"] = max(a["last_seen"], b["last_seen"])
+            del self.levels[max(j, k)]
+            del self._prices[max(j, k)]
+            j = min(j, k)
+            self._prices[j] = a["price"]
+
+    def _fold(self, times: np.ndarray, highs: np.ndarray, lows: np.ndarray,
+              offset: int, first: int, last: int) -> None:
+        """Add swings with global index in [first, last] found in the given bars (offset = global index of bar 0)"""
+        if last < first:
+            return
+        hi = swing_points(highs, self.window) + offset
+        lo = swing_points(-lows, self.window) + offset
+        hi = hi[(hi >= first) & (hi <= last)]
+        lo = lo[(lo >= first) & (lo <= last)]
+
+        events = [(int(i), 0, float(highs[i - offset]), "high") for i in hi]
+        events += [(int(i), 1, float(lows[i - offset]), "low") for i in lo]
+        for i, _, price, kind in sorted(events):
+            self._add_swing(price, kind, int(times[i - offset]))
+
+    # ------------------------------------------------------------------
+    # Building / extending
+    # ------------------------------------------------------------------
+
+    def build(self, df: pd.DataFrame) -> "SwingLevels":
+        """Rebuild from full history (DataFrame with Timestamp/High/Low, closed bars)"""
+        self.levels, self._prices = [], []
+        times = epoch_seconds(df["Timestamp"])
+        highs = df["High"].to_numpy(dtype=float)
+        lows = df["Low"].to_numpy(dtype=float)
+
+        n = len(times)
+        self._fold(times, highs, lows, 0, 0, n - 1 - self.window)
+        self.total_bars = n
+        self._decided = n - 1 - self.window
+        self.last_time = int(times[-1]) if n else None
+        self._tail_times = times[-self.tail_size:].tolist()
+        self._tail_highs = highs[-self.tail_size:].tolist()
+        self._tail_lows = lows[-self.tail_size:].tolist()
+        return self
+
+    def update(self, when: int, high: float, low: float) -> int:
+        """
+        Append one closed bar; O(window)
+
+        Returns:
+            Number of levels after the update
+        """
+        if self.last_time is not None and when <= self.last_time:
+            return len(self.levels)
+
+        self._tail_times.append(int(when))
+        self._tail_highs.append(float(high))
+        self._tail_lows.append(float(low))
+        if len(self._tail_times) > self.tail_size:
+            del self._tail_times[0], self._tail_highs[0], self._tail_lows[0]
+        self.total_bars += 1
+        self.last_time = int(when)
+
+        decided = self.total_bars - 1 - self.window
+        offset = self.total_bars - len(self._tail_times)
+        self._fold(np.asarray(self._tail_times), np.asarray(self._tail_highs), np.asarray(self._tail_lows),
+                   offset, self._decided + 1, decided)
+        self._decided = max(self._decided, decided)
+        return len(self.levels)
+
+    def extend(self, df: pd.DataFrame, now: Optional[float] = None) -> int:
+        """
+        Append the closed bars of df that are newer than the last one seen
+
+        The still-forming candle (start after the last closed candle) is
+        skipped. Returns the number of bars appended.
+        """
+        times = epoch_seconds(df["Timestamp"])
+        closed = last_closed_candle(self.resolution, now)
+        keep = times <= closed
+        if self.last_time is not None:
+            keep &= times > self.last_time
+
+        highs = df["High"].to_numpy(dtype=float)
+        lows = df["Low"].to_numpy(dtype=float)
+        added = 0
+        for i in np.flatnonzero(keep):
+            self.update(int(times[i]), highs[i], lows[i])
+            added += 1
+        return added
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def nearest(self, price: float) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Closest level strictly above (resistance) and below (support) price"""
+        above = bisect.bisect_right(self._prices, price)
+        below = bisect.bisect_left(self._prices, price) - 1
+        return {
+            "resistance": self.levels[above] if above < len(self.levels) else None,
+            "support": self.levels[below] if below >= 0 else None,
+        }
+
+    def between(self, low: float, high: float, min_touches: int = 1) -> List[Dict[str, Any]]:
+        """Levels with low <= price <= high (ascending), e.g. the visible chart range"""
+        start = bisect.bisect_left(self._prices, low)
+        stop = bisect.bisect_right(self._prices, high)
+        if min_touches <= 1:
+            return self.levels[start:stop]
+        return [level for level in self.levels[start:stop] if level["touches"] >= min_touches]
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "resolution": self.resolution,
+            "window": self.window,
+            "tolerance": self.tolerance,
+            "total_bars": self.total_bars,
+            "last_time": self.last_time,
+            "decided": self._decided,
+            "tail": {"times": self._tail_times, "highs": self._tail_highs, "lows": self._tail_lows},
+            "levels": self.levels,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SwingLevels":
+        levels = cls(data["symbol"], data["resolution"], data["window"], data["tolerance"])
+        levels.total_bars = data["total_bars"]
+        levels.last_time = data["last_time"]
+        levels._decided = data["decided"]
+        levels._tail_times = list(data["tail"]["times"])
+        levels._tail_highs = list(data["tail"]["highs"])
+        levels._tail_lows = list(data["tail"]["lows"])
+        levels.levels = list(data["levels"])
+        levels._prices = [level["price"] for level in levels.levels]
+        return levels
+
+
+# ============================================================================
+# Store
+# ============================================================================
+
+class SwingLevelStore:
+    """
+    In-memory + JSON-persisted SwingLevels per (symbol, resolution)
+
+    Args:
+        directory: Where level files are written (default SWING_LEVELS_DIR)
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or settings.SWING_LEVELS_DIR
+        self._levels: Dict[Tuple[str, str], SwingLevels] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def path(self, symbol: str, resolution: str) -> str:
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", f"{symbol}_{resolution}")
+        return os.path.join(self.directory, f"{name}.json")
+
+    def _load(self, symbol: str, resolution: str) -> Optional[SwingLevels]:
+        path = self.path(symbol, resolution)
+        try:
+            if os.path.exists(path):
+                with open(path, 'r') as f:
+                    return SwingLevels.from_dict(json.load(f))
+        except Exception as e:
+            logger.warning(f"Could not load swing levels {path}: {e}")
+        return None
+
+    def save(self, levels: SwingLevels) -> None:
+        path = self.path(levels.symbol, levels.resolution)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(levels.to_dict(), f)
+            os.replace(tmp, path)
+        except Exception as e:
+            logger.error(f"Error saving swing levels {path}: {e}")
+
+    def get(self, symbol: str, resolution: str) -> Optional[SwingLevels]:
+        """Levels from memory or disk, without fetching"""
+        key = (symbol, resolution)
+        with self._lock:
+            levels = self._levels.get(key)
+            if levels is None:
+                levels = self._load(symbol, resolution)
+                if levels is not None:
+                    self._levels[key] = levels
+            return levels
+
+    def refresh(self, symbol: str, resolution: str,
+                fetch: Callable[[int], Optional[pd.DataFrame]],
+                history_duration: int, recent_duration: int,
+                window: int = 5, tolerance: float = 0.005, rebuild: bool = False) -> Optional[SwingLevels]:
+        """
+        Bring a level set up to date
+
+        Builds from `history_duration` days when there is no stored set, the
+        parameters changed or rebuild is requested; otherwise fetches only
+        `recent_duration` days and extends incrementally (falling back to a
+        rebuild if the stored set is older than that window).
+
+        Args:
+            fetch: fetch(duration_days) -> OHLC DataFrame or None
+        """
+        with self._refresh_lock:
+            return self._refresh(symbol, resolution, fetch, history_duration, recent_duration,
+                                 window, tolerance, rebuild)
+
+    def _refresh(self, symbol, resolution, fetch, history_duration, recent_duration,
+                 window, tolerance, rebuild) -> Optional[SwingLevels]:
+        levels = None if rebuild else self.get(symbol, resolution)
+        if levels is not None and (levels.window != window or levels.tolerance != tolerance):
+            levels = None
+
+        if levels is not None:
+            df = fetch(recent_duration)
+            if df is None or len(df) == 0:
+                return levels
+            first = int(epoch_seconds(df["Timestamp"].iloc[:1])[0])
+            if levels.last_time is not None and first <= levels.last_time:
+                if levels.extend(df):
+                    self.save(levels)
+                return levels
+            # Gap between the stored bars and the recent window: rebuild
+
+        df = fetch(history_duration)
+        if df is None or len(df) == 0:
+            return None
+
+        times = epoch_seconds(df["Timestamp"])
+        closed = df[times <= last_closed_candle(resolution)]
+        levels = SwingLevels(symbol, resolution, window, tolerance).build(closed)
+        with self._lock:
+            self._levels[(symbol, resolution)] = levels
+        self.save(levels)
+        logger.info(f"Swing levels built for {symbol} {resolution}: {levels.total_bars} bars, {len(levels.levels)} levels")
+        return levels
+
+
+swing_level_store = SwingLevelStore()
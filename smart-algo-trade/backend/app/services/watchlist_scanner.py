@@ -0,0 +1,163 @@
+"""
+Watchlist Scanner
+Concurrent indicator scans over many symbols
+
+Fetches OHLC for a whole watchlist on a bounded thread pool (the Fyers
+history call is synchronous), throttled by a shared rate limiter, computes
+the requested indicators in the same worker and yields one row per symbol
+as soon as it completes - so the first rows reach the client while the
+rest of the watchlist is still being fetched.
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def to_json_scalar(value: Any) -> Any:
+    """NaN/inf -> None, NumPy scalars -> int/float"""
+    if value is None:
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    number = float(value)
+    return number if math.isfinite(number) else None
+
+
+class RateLimiter:
+    """
+    Thread-safe request spacer
+
+    Hands out evenly spaced time slots (rate per second); callers sleep
+    until their slot outside the lock, so waiting threads do not serialise
+    each other beyond the configured rate.
+    """
+
+    def __init__(self, rate_per_second: float):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.interval <= 0:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class WatchlistScanner:
+    """
+    Scan a watchlist with TechnicalIndicatorsService
+
+    Args:
+        service: Object with fetch_ohlc() and calculate_batch() (TechnicalIndicatorsService)
+        max_workers: Concurrent fetch/compute workers
+        rate_limit: Max history requests per second across all scans
+    """
+
+    def __init__(self, service, max_workers: Optional[int] = None, rate_limit: Optional[float] = None):
+        self.service = service
+        self.max_workers = max_workers or settings.SCAN_MAX_WORKERS
+        self.rate_limiter = RateLimiter(rate_limit if rate_limit is not None else settings.HISTORY_RATE_LIMIT)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="watchlist-scan")
+
+    @staticmethod
+    def unique_symbols(symbols: List[str]) -> List[str]:
+        """Strip blanks and duplicates, keep order"""
+        seen = set()
+        result = []
+        for symbol in symbols:
+            symbol = symbol.strip()
+            if symbol and symbol not in seen:
+                seen.add(symbol)
+                result.append(symbol)
+        return result
+
+    def scan_symbol(self, symbol: str, resolution: str, duration: int,
+                    specs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Fetch + compute one symbol (runs on a worker thread)
+
+        Returns:
+            Row dict: {"symbol", "status", "current_close", "total_candles",
+                       "indicators": {id: {column: value}}, "elapsed_ms"}
+        """
+        start = time.perf_counter()
+        try:
+            self.rate_limiter.acquire()
+            df = self.service.fetch_ohlc(symbol, resolution, duration)
+
+            if df is None or len(df) == 0:
+                return {"symbol": symbol, "status": "error", "message": "Failed to fetch data",
+                        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+            results = self.service.calculate_batch(df, specs)
+
+            indicators = {}
+            for key, result in results.items():
+                if "error" in result:
+                    indicators[key] = {"error": result["error"]}
+                else:
+                    indicators[key] = {col: to_json_scalar(series.iloc[-1])
+                                       for col, series in result["columns"].items()}
+
+            return {
+                "symbol": symbol,
+                "status": "success",
+                "current_close": to_json_scalar(df['Close'].iloc[-1]),
+                "total_candles": len(df),
+                "indicators": indicators,
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)
+            }
+
+        except Exception as e:
+            logger.error(f"Watchlist scan failed for {symbol}: {e}")
+            return {"symbol": symbol, "status": "error", "message": str(e),
+                    "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+    def scan(self, symbols: List[str], resolution: str, duration: int,
+             specs: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Blocking scan; yields rows in completion order"""
+        futures = [self._executor.submit(self.scan_symbol, symbol, resolution, duration, specs)
+                   for symbol in self.unique_symbols(symbols)]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    async def scan_async(self, symbols: List[str], resolution: str, duration: int,
+                         specs: List[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Non-blocking scan for async endpoints; yields rows in completion order
+
+        Work not yet started is cancelled if the consumer stops early
+        (e.g. the HTTP client disconnects).
+        """
+        loop = asyncio.get_running_loop()
+        futures = [loop.run_in_executor(self._executor, self.scan_symbol, symbol, resolution, duration, specs)
+                   for symbol in self.unique_symbols(symbols)]
+        try:
+            for next_row in asyncio.as_completed(futures):
+                yield await next_row
+        finally:
+            for future in futures:
+                future.cancel()
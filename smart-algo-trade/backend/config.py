@@ -28,6 +28,54 @@ class Settings:
         "http://localhost:3000",
     ]
     
+    # Watchlist scans (Fyers history calls)
+    SCAN_MAX_WORKERS = int(os.getenv("SCAN_MAX_WORKERS", "8"))
+    HISTORY_RATE_LIMIT = float(os.getenv("HISTORY_RATE_LIMIT", "8"))  # requests per second
+    
+    # Indicator response cache
+    INDICATOR_CACHE_MAX_ENTRIES = int(os.getenv("INDICATOR_CACHE_MAX_ENTRIES", "512"))
+    INDICATOR_CACHE_MAX_MB = int(os.getenv("INDICATOR_CACHE_MAX_MB", "64"))
+    
+    # Indicator compute backend: numpy | numba | auto (numba when installed)
+    COMPUTE_BACKEND = os.getenv("COMPUTE_BACKEND", "numpy")
+    COMPUTE_BACKEND_VERIFY = os.getenv("COMPUTE_BACKEND_VERIFY", "True").lower() == "true"
+    
+    # Daily pivots precomputed at startup (comma-separated symbols)
+    PIVOT_WATCHLIST = [s.strip() for s in os.getenv("PIVOT_WATCHLIST", "").split(",") if s.strip()]
+    PIVOT_WATCHLIST_MAX = int(os.getenv("PIVOT_WATCHLIST_MAX", "500"))  # symbols kept for the daily refresh
+    
+    # Swing support/resistance level sets (one JSON file per symbol/resolution)
+    SWING_LEVELS_DIR = os.getenv("SWING_LEVELS_DIR", "data/swing_levels")
+    
+    # Universe pattern screener (comma-separated symbols, e.g. the F&O list)
+    SCREENER_UNIVERSE = [s.strip() for s in os.getenv("SCREENER_UNIVERSE", "").split(",") if s.strip()]
+    SCREENER_RESOLUTION = os.getenv("SCREENER_RESOLUTION", "5")
+    SCREENER_INTERVAL_SECONDS = int(os.getenv("SCREENER_INTERVAL_SECONDS", "300"))
+    SCREENER_PROCESSES = int(os.getenv("SCREENER_PROCESSES", "0"))  # 0 = CPU count
+    SCREENER_PROCESS_MIN_CELLS = int(os.getenv("SCREENER_PROCESS_MIN_CELLS", "500000"))  # symbols x bars
+    
+    # Pattern occurrence index (NumPy .npz)
+    PATTERN_INDEX_PATH = os.getenv("PATTERN_INDEX_PATH", "data/pattern_index.npz")
+    
+    # Local candle store (.npz per symbol / resolution / month)
+    CANDLE_STORE_DIR = os.getenv("CANDLE_STORE_DIR", "data/candles")
+    CANDLE_STORE_ENABLED = os.getenv("CANDLE_STORE_ENABLED", "True").lower() == "true"
+    
+    # In-memory candle series for /api/portfolio/history (LRU by bytes)
+    CANDLE_CACHE_MAX_MB = int(os.getenv("CANDLE_CACHE_MAX_MB", "128"))
+    
+    # Cached 1m -> 5m -> 15m -> 1h -> 1D pyramids for /multi-timeframe
+    PYRAMID_CACHE_MAX_ENTRIES = int(os.getenv("PYRAMID_CACHE_MAX_ENTRIES", "32"))
+    PYRAMID_CACHE_MAX_MB = int(os.getenv("PYRAMID_CACHE_MAX_MB", "64"))
+    
+    # Full-history backfills (chunked, concurrent)
+    HISTORY_DOWNLOAD_WORKERS = int(os.getenv("HISTORY_DOWNLOAD_WORKERS", "4"))
+    HISTORY_DOWNLOAD_RATE_LIMIT = float(os.getenv("HISTORY_DOWNLOAD_RATE_LIMIT", "5"))  # requests per second
+    HISTORY_DOWNLOAD_RETRIES = int(os.getenv("HISTORY_DOWNLOAD_RETRIES", "3"))
+    
+    # Shared Fyers history client (one keep-alive session)
+    HISTORY_HTTP_TIMEOUT = float(os.getenv("HISTORY_HTTP_TIMEOUT", "30"))  # seconds
+    
     TOKEN_EXPIRE_MINUTES = 1440  # 24 hours
     REFRESH_TOKEN_EXPIRE_DAYS = 7
     
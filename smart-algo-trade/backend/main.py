@@ -86,9 +86,34 @@ app.include_router(historical_data_router, prefix="/api/portfolio", tags=["Histo
 @app.on_event("startup")
 def startup_event():
     """Initialize on startup."""
-    logger.info("Application started")
+    from app.services import compute_backend
+    logger.info(f"Application started (compute backend: {compute_backend.active().name})")
+
+    import asyncio
+    from app.api.websocket_market import market_data_manager, publish_pattern_event
+    from app.services.pattern_stream import pattern_stream
+    # Bar-close pattern events come from the aggregator thread
+    market_data_manager.bind_loop(asyncio.get_running_loop())
+    pattern_stream.add_listener(publish_pattern_event)
+
+    from config import settings
+    if settings.PIVOT_WATCHLIST:
+        import threading
+        from app.api.technical_indicators import pivot_store
+        # One daily fetch per symbol - keep it off the startup path
+        threading.Thread(target=pivot_store.refresh, args=(settings.PIVOT_WATCHLIST,),
+                         name="pivot-store-warmup", daemon=True).start()
+
+    if settings.SCREENER_UNIVERSE:
+        from app.api.price_action import pattern_screener
+        pattern_screener.start(settings.SCREENER_UNIVERSE, settings.SCREENER_RESOLUTION,
+                               interval=settings.SCREENER_INTERVAL_SECONDS)
 
 @app.on_event("shutdown")
 def shutdown_event():
     """Cleanup on shutdown."""
+    from app.api.price_action import pattern_screener
+    from app.services.pattern_index import pattern_index
+    pattern_screener.shutdown()
+    pattern_index.flush()
     logger.info("Application shutdown")
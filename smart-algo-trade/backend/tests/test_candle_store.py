@@ -0,0 +1,110 @@
+"""
+Candle store coverage
+
+Repeat and widened requests must ask the broker only for the days not yet
+covered and return the same frame as a direct fetch; days after the last
+completed session are never marked covered.
+"""
+
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+from app.services.candle_store import CandleStore
+from app.services.pivot_store import IST
+
+SYMBOL = "NSE:TEST-EQ"
+
+
+class FakeHistory:
+    """Broker history call: 25 fifteen-minute candles per weekday, recorded"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, data):
+        start = date.fromisoformat(data["range_from"])
+        end = date.fromisoformat(data["range_to"])
+        self.calls.append((start, end))
+
+        candles = []
+        for day in pd.date_range(start, end, freq="B"):
+            open_time = IST.localize(datetime(day.year, day.month, day.day, 9, 15))
+            for k in range(25):
+                t = int(open_time.timestamp()) + k * 900
+                price = 100 + (t // 900 % 997) / 10
+                candles.append([t, price, price + 1, price - 1, price + 0.5, 1000 + k])
+        if not candles:
+            return {"s": "no_data"}
+        return {"s": "ok", "candles": candles}
+
+
+@pytest.fixture
+def history():
+    return FakeHistory()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CandleStore(directory=str(tmp_path), enabled=True)
+
+
+def direct(start, end):
+    return CandleStore(enabled=False).fetch_range(FakeHistory(), SYMBOL, "15", start, end)
+
+
+def test_repeat_request_is_served_from_disk(store, history):
+    start, end = date(2024, 1, 1), date(2024, 1, 31)
+    first = store.fetch_range(history, SYMBOL, "15", start, end)
+    second = store.fetch_range(history, SYMBOL, "15", start, end)
+
+    assert history.calls == [(start, end)]
+    assert len(first) == 23 * 25
+    pd.testing.assert_frame_equal(second, first)
+    pd.testing.assert_frame_equal(second, direct(start, end))
+    assert store.missing(SYMBOL, "15", start, end) == []
+
+
+def test_widened_request_fetches_only_missing_days(store, history):
+    store.fetch_range(history, SYMBOL, "15", date(2024, 1, 10), date(2024, 1, 20))
+    history.calls.clear()
+
+    start, end = date(2024, 1, 1), date(2024, 1, 31)
+    frame = store.fetch_range(history, SYMBOL, "15", start, end)
+
+    assert history.calls == [(date(2024, 1, 1), date(2024, 1, 9)), (date(2024, 1, 21), date(2024, 1, 31))]
+    pd.testing.assert_frame_equal(frame, direct(start, end))
+
+
+def test_request_across_months_is_chunked_and_merged(store, history):
+    start, end = date(2023, 10, 1), date(2024, 3, 31)
+    frame = store.fetch_range(history, SYMBOL, "15", start, end)
+
+    assert len(history.calls) == 2
+    assert frame["Timestamp"].is_monotonic_increasing and frame["Timestamp"].is_unique
+    pd.testing.assert_frame_equal(frame, direct(start, end))
+
+
+def test_ingest_marks_spans_covered(store, history):
+    spans = [(date(2024, 2, 1), date(2024, 2, 10)), (date(2024, 2, 20), date(2024, 2, 29))]
+    candles = [row for span in spans for row in history({
+        "range_from": span[0].isoformat(), "range_to": span[1].isoformat()})["candles"]]
+    store.ingest(SYMBOL, "15", spans, candles)
+
+    assert store.missing(SYMBOL, "15", date(2024, 2, 1), date(2024, 2, 29)) == \
+        [(date(2024, 2, 11), date(2024, 2, 19))]
+
+
+def test_unfinished_session_is_refetched(store, history, monkeypatch):
+    last_complete = date(2024, 1, 15)
+    monkeypatch.setattr(CandleStore, "_complete_until", staticmethod(lambda now=None: last_complete))
+
+    start, end = date(2024, 1, 10), date(2024, 1, 17)
+    store.fetch_range(history, SYMBOL, "15", start, end)
+    assert store.missing(SYMBOL, "15", start, end) == [(date(2024, 1, 16), end)]
+
+    history.calls.clear()
+    frame = store.fetch_range(history, SYMBOL, "15", start, end)
+    assert history.calls == [(date(2024, 1, 16), end)]
+    pd.testing.assert_frame_equal(frame, direct(start, end))
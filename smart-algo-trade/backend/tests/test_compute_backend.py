@@ -0,0 +1,91 @@
+"""
+Compute backend parity
+
+Every kernel is run on the NumPy backend and on the Numba backend and
+compared. The NumPy kernels are also checked against the loop versions
+the Numba backend compiles, run as plain Python, so the reference is not
+only compared with itself. The Numba side is skipped when numba is not
+installed.
+"""
+
+import pytest
+
+from app.services import compute_backend as compute
+
+KERNELS = (
+    "linear_recurrence",
+    "wilder_sum",
+    "wilder_average",
+    "supertrend_bands",
+    "supertrend_direction",
+    "supertrend_bands_grid",
+    "supertrend_direction_grid",
+    "breakout_grid",
+    "breakout_mask",
+)
+
+CASES = dict(compute._parity_cases(size=600, seed=11))
+
+requires_numba = pytest.mark.skipif(not compute.NUMBA_AVAILABLE, reason="numba is not installed")
+
+
+class LoopBackend(compute.NumbaBackend):
+    """The Numba backend's loop kernels, uncompiled"""
+
+    name = "loop"
+
+    def __init__(self):
+        self._recurrence = compute._recurrence_loop
+        self._bands = compute._bands_loop
+        self._direction = compute._direction_loop
+        self._breakout = compute._breakout_loop
+
+
+@pytest.fixture(scope="module")
+def numpy_backend():
+    return compute.NumpyBackend()
+
+
+@pytest.fixture(scope="module")
+def numba_backend():
+    return compute.NumbaBackend()
+
+
+def test_every_kernel_has_a_case():
+    covered = {name.replace("_cross", "") for name in CASES}
+    assert covered == set(KERNELS)
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_numpy_matches_loops(case, numpy_backend):
+    call = CASES[case]
+    assert compute._same(call(LoopBackend()), call(numpy_backend))
+
+
+@requires_numba
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_numba_matches_numpy(case, numpy_backend, numba_backend):
+    call = CASES[case]
+    assert compute._same(call(numpy_backend), call(numba_backend))
+
+
+@requires_numba
+def test_verify_parity_numba(numba_backend):
+    assert compute.verify_parity(numba_backend) == []
+
+
+def test_verify_parity_reports_mismatch(numpy_backend):
+    class Broken(compute.NumpyBackend):
+        name = "broken"
+
+        def breakout_mask(self, high, low, lookback):
+            return ~super().breakout_mask(high, low, lookback)
+
+    assert compute.verify_parity(Broken(), numpy_backend) == ["breakout_mask"]
+
+
+def test_select_backend_falls_back_to_numpy():
+    assert compute.select_backend("nope").name == "numpy"
+    expected = "numba" if compute.NUMBA_AVAILABLE else "numpy"
+    assert compute.select_backend("auto").name == expected
+
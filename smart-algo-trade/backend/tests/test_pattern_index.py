@@ -0,0 +1,79 @@
+"""
+Pattern index incremental updates
+
+Indexing a history in pieces must give the same occurrence rows as one
+scan over the whole of it; a piece that starts after the watermark must
+record the hole and not scan its first candle against the stale tail.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import pattern_scanner
+from app.services.pattern_index import PatternIndex
+from app.services.swing_levels import epoch_seconds
+
+SYMBOL = "NSE:TEST-EQ"
+
+
+@pytest.fixture
+def candles():
+    rng = np.random.default_rng(5)
+    n = 400
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    open_ = close + rng.normal(0, 0.8, n)
+    open_[::9] = close[::9]
+    high = np.maximum(open_, close) + rng.exponential(0.4, n)
+    low = np.minimum(open_, close) - rng.exponential(0.4, n)
+    stamps = pd.date_range("2024-01-01 09:15", periods=n, freq="15min", tz="Asia/Kolkata")
+    return pd.DataFrame({"Timestamp": stamps, "Open": open_, "High": high, "Low": low, "Close": close})
+
+
+def occurrences(index):
+    table = index._table()
+    return dict(zip(table["time"].tolist(), table["mask"].tolist()))
+
+
+def full_scan(df):
+    mask = pattern_scanner.scan_patterns(df["Open"], df["High"], df["Low"], df["Close"])
+    times = epoch_seconds(df["Timestamp"])
+    rows = np.flatnonzero(mask)
+    return dict(zip(times[rows].tolist(), mask[rows].tolist()))
+
+
+def test_piecewise_updates_match_full_scan(tmp_path, candles):
+    index = PatternIndex(path=str(tmp_path / "index.npz"))
+    # Overlapping pieces, as repeated fetches of a sliding window return them
+    for start, end in ((0, 100), (60, 180), (170, 171), (150, 400)):
+        index.update(SYMBOL, "15", candles[start:end], closed_only=False, save=False)
+
+    assert occurrences(index) == full_scan(candles)
+    assert index.stats()["bars_indexed"] == len(candles)
+    assert index.gaps(SYMBOL, "15") == []
+
+
+def test_gap_is_recorded_and_not_bridged(tmp_path, candles):
+    index = PatternIndex(path=str(tmp_path / "index.npz"))
+    index.update(SYMBOL, "15", candles[:100], closed_only=False, save=False)
+    scanned = index.update(SYMBOL, "15", candles[300:], closed_only=False, save=False)
+
+    times = epoch_seconds(candles["Timestamp"]).tolist()
+    assert scanned == 100
+    assert index.stats()["bars_indexed"] == 200
+    assert index.gaps(SYMBOL, "15") == [(times[99], times[300])]
+    # Each span scanned on its own - no context carried across the hole
+    assert occurrences(index) == {**full_scan(candles[:100]), **full_scan(candles[300:])}
+
+
+def test_gaps_survive_save_and_load(tmp_path, candles):
+    path = str(tmp_path / "index.npz")
+    index = PatternIndex(path=path)
+    index.update(SYMBOL, "15", candles[:100], closed_only=False, save=False)
+    index.update(SYMBOL, "15", candles[300:], closed_only=False, save=False)
+    index.save()
+
+    reloaded = PatternIndex(path=path)
+    assert reloaded.gaps(SYMBOL, "15") == index.gaps(SYMBOL, "15")
+    assert occurrences(reloaded) == occurrences(index)
+    assert reloaded.watermark(SYMBOL, "15") == index.watermark(SYMBOL, "15")
@@ -0,0 +1,66 @@
+"""
+Swing levels incremental extend
+
+Building over a prefix of the history and extending bar by bar - with a
+save / load in between - must give the same level set and resume state as
+one build over the whole history.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.swing_levels import SwingLevels
+
+SYMBOL = "NSE:TEST-EQ"
+
+
+@pytest.fixture
+def candles():
+    rng = np.random.default_rng(7)
+    n = 600
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    high = close + rng.exponential(0.5, n)
+    low = close - rng.exponential(0.5, n)
+    # Flat tops and bottoms, so ties between neighbouring bars are exercised
+    high[100:103] = high[100:103].max()
+    low[200:204] = low[200:204].min()
+    stamps = pd.date_range("2024-01-01 09:15", periods=n, freq="15min", tz="Asia/Kolkata")
+    return pd.DataFrame({"Timestamp": stamps, "High": high, "Low": low, "Close": close})
+
+
+def state(levels):
+    data = levels.to_dict()
+    return data["levels"], data["total_bars"], data["last_time"], data["decided"], data["tail"]
+
+
+@pytest.mark.parametrize("window", [1, 3, 5])
+def test_extend_matches_full_build(candles, window):
+    full = SwingLevels(SYMBOL, "15", window=window).build(candles)
+
+    incremental = SwingLevels(SYMBOL, "15", window=window).build(candles[:150])
+    for start, end in ((150, 151), (151, 400), (400, 600)):
+        assert incremental.extend(candles[start:end]) == end - start
+
+    assert len(full.levels) > 10
+    assert state(incremental) == state(full)
+
+
+def test_extend_resumes_after_reload(candles):
+    full = SwingLevels(SYMBOL, "15").build(candles)
+
+    saved = SwingLevels(SYMBOL, "15").build(candles[:300]).to_dict()
+    resumed = SwingLevels.from_dict(saved)
+    resumed.extend(candles)
+
+    assert state(resumed) == state(full)
+
+
+def test_extend_skips_seen_and_forming_bars(candles):
+    levels = SwingLevels(SYMBOL, "15").build(candles[:300])
+    assert levels.extend(candles[:300]) == 0
+
+    # With "now" inside bar 310, bars up to 309 are closed
+    now = candles["Timestamp"].iloc[310].timestamp() + 60
+    assert levels.extend(candles[:400], now=now) == 10
+    assert levels.total_bars == 310